@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 
 from models import User, MasterReference, Job
@@ -13,7 +14,10 @@ from schemas_auth import (
 from dependencies import get_current_active_user
 from services.auth_service import auth_service
 from services.file_manager import FileManager
-from database import SessionLocal
+from services.artifact_cache import artifact_cache
+from services.file_delivery import file_delivery
+from services.measurement_export import measurement_exporter, ExportUnavailableError
+from database import get_db
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 file_manager = FileManager()
@@ -161,13 +165,12 @@ async def get_master_references(current_user: User = Depends(get_current_active_
 async def update_master_reference(
     reference_id: int,
     update_data: dict,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
     """Update a master reference"""
-    from database import SessionLocal
     from sqlalchemy.orm import joinedload
 
-    db = SessionLocal()
     try:
         # Get master reference with creator relationship
         master_ref = db.query(MasterReference).options(
@@ -218,13 +221,12 @@ async def update_master_reference(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update master reference: {str(e)}"
         )
-    finally:
-        db.close()
 
 
 @router.get("/master-references/{reference_id}/download")
 async def download_master_reference(
     reference_id: int,
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """Download master reference file"""
@@ -243,11 +245,11 @@ async def download_master_reference(
                 detail="File not found"
             )
 
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            path=master_ref.file_path,
-            filename=master_ref.file_name,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return await file_delivery.response(
+            request,
+            master_ref.file_path,
+            master_ref.file_name,
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
 
     except HTTPException:
@@ -346,11 +348,73 @@ async def get_jobs(
         )
 
 
+@router.get("/jobs/export")
+async def export_jobs(
+    format: str = "parquet",
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Export measurements of completed jobs created in [created_from, created_to] as Parquet, Arrow IPC or CSV"""
+    try:
+        measurement_exporter.check_format(format)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    query = db.query(Job.id).filter(Job.status == "completed")
+    if created_from:
+        query = query.filter(Job.created_at >= datetime.combine(created_from, datetime.min.time()))
+    if created_to:
+        query = query.filter(Job.created_at < datetime.combine(created_to + timedelta(days=1), datetime.min.time()))
+    job_ids = [job_id for job_id, in query.order_by(Job.created_at)]
+
+    name = f"measurements_{created_from or 'awal'}_{created_to or 'akhir'}"
+    return export_response(job_ids, format, name)
+
+
+@router.get("/jobs/{job_id}/export")
+async def export_job(
+    job_id: str,
+    format: str = "parquet",
+    current_user: User = Depends(get_current_active_user)
+):
+    """Export a job's children and measurements with validation flags as Parquet, Arrow IPC or CSV"""
+    try:
+        measurement_exporter.check_format(format)
+    except ExportUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    job = Job.get_by_id(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Job belum selesai"
+        )
+
+    return export_response([job.id], format, job.id)
+
+
+def export_response(job_ids: List[str], format: str, name: str) -> StreamingResponse:
+    media_type, extension = measurement_exporter.FORMATS[format]
+    # Sync iterator, chunks are queried and encoded on the threadpool
+    return StreamingResponse(
+        measurement_exporter.iter_export(job_ids, format),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{name}.{extension}"'}
+    )
+
+
 @router.get("/jobs/{job_id}", response_model=JobStatusExtended)
 async def get_job_extended(job_id: str, current_user: User = Depends(get_current_active_user)):
     """Get detailed job information"""
     try:
-        job = Job.get_by_id(job_id)
+        job = Job.get_by_id(job_id, with_relations=True)
         if not job:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -413,13 +477,12 @@ async def get_job_extended(job_id: str, current_user: User = Depends(get_current
 @router.delete("/jobs/{job_id}")
 async def delete_job(
     job_id: str,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
     """Delete a job and its associated files"""
     import os
-    from database import SessionLocal
 
-    db = SessionLocal()
     try:
         # Get the job with all its relationships
         job = db.query(Job).filter(Job.id == job_id).first()
@@ -432,19 +495,22 @@ async def delete_job(
         # Delete associated files if they exist
         files_deleted = []
 
-        if job.excel_path and os.path.exists(job.excel_path):
+        reports = ((job.excel_path, "Excel report"), (job.report_path, "Text report"),
+                   (job.context_path, "Context report"))
+        for report_path, label in reports:
+            if not report_path:
+                continue
             try:
-                os.remove(job.excel_path)
-                files_deleted.append("Excel report")
+                # Compressed copies made for downloads (.gz/.zst), also when the report itself is gone
+                file_delivery.remove_variants(report_path)
+                if os.path.exists(report_path):
+                    os.remove(report_path)
+                    files_deleted.append(label)
             except Exception as e:
-                print(f"Warning: Could not delete Excel file {job.excel_path}: {e}")
+                print(f"Warning: Could not delete {label.lower()} file {report_path}: {e}")
 
-        if job.report_path and os.path.exists(job.report_path):
-            try:
-                os.remove(job.report_path)
-                files_deleted.append("Text report")
-            except Exception as e:
-                print(f"Warning: Could not delete text report file {job.report_path}: {e}")
+        # Drop reports rendered on download (REPORT_RENDER_MODE=lazy)
+        artifact_cache.invalidate(job_id)
 
         # Delete the uploaded lapangan file
         if job.lapangan_path and os.path.exists(job.lapangan_path):
@@ -492,6 +558,4 @@ async def delete_job(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete job: {str(e)}"
-        )
-    finally:
-        db.close()
\ No newline at end of file
+        )
\ No newline at end of file
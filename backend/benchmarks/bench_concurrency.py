@@ -0,0 +1,185 @@
+"""
+Benchmark reads and small writes while analyses bulk-insert their results.
+
+Writer processes save jobs batch by batch like GrowthAnalyzer._validate_and_save_data;
+reader threads poll a job like GET /api/jobs/{job_id} (job row and preview page) and a
+renewer thread renews a queue lease every 100ms like a queue worker (JobQueue.renew).
+Each profile runs on its own temporary SQLite database:
+
+    default  rollback journal, pysqlite settings, one write transaction per job
+    tuned    the SQLITE_* profile from config, one short locked transaction per batch
+
+    cd backend && python benchmarks/bench_concurrency.py [--writers 2] [--jobs 3] [--readers 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+PROFILES = {
+    "default": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT_MS": "5000",
+        "SQLITE_MMAP_SIZE_MB": "0",
+        "SQLITE_CACHE_SIZE_MB": "2"
+    },
+    "tuned": {}
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def write_jobs(worker: int, args, per_batch: bool):
+    """
+    Save args.jobs jobs of args.batches batches each, sleeping args.validate_ms per batch
+    for the validation done between inserts
+    """
+    from database import engine, SessionLocal, serialized_writer
+    from services.analyzer import GrowthAnalyzer
+    from bench_persist import make_batch
+
+    engine.dispose(close=False)  # Connections of the parent process are not shared
+    analyzer = GrowthAnalyzer()
+    children, validated = make_batch(args.children, args.months)
+    db = SessionLocal()
+    try:
+        for number in range(args.jobs):
+            job_id = f"bulk-{worker}-{number}"
+            for _ in range(args.batches):
+                time.sleep(args.validate_ms / 1000)
+                if per_batch:
+                    with serialized_writer():
+                        analyzer._save_batch(db, job_id, children, validated)
+                        db.commit()
+                else:
+                    analyzer._save_batch(db, job_id, children, validated)
+            db.commit()
+    finally:
+        db.close()
+
+
+def run_profile(args):
+    import multiprocessing
+    from sqlalchemy.exc import OperationalError
+    from database import Base, engine, SessionLocal, session_scope
+    from models import Job, Measurement
+    from services.job_queue import JobQueue
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    job_ids = ["polled"] + [f"bulk-{worker}-{number}" for worker in range(args.writers) for number in range(args.jobs)]
+    for job_id in job_ids:
+        db.add(Job(id=job_id, default_gender="L", analyzer_name="bench", analyzer_institution="bench"))
+    db.commit()
+    db.close()
+    queue = JobQueue()
+    queue.enqueue("polled")
+    claimed = queue.claim("bench")
+    engine.dispose()
+
+    context = multiprocessing.get_context("fork")
+    per_batch = args.profile == "tuned"
+    writers = [context.Process(target=write_jobs, args=(worker, args, per_batch)) for worker in range(args.writers)]
+
+    reads, read_errors, renewals, renewal_errors = [], [], [], []
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                with session_scope():
+                    Job.get_by_id("polled")
+                    Measurement.get_page("bulk-0-0", limit=10)
+                reads.append(time.perf_counter() - start)
+            except OperationalError as e:
+                read_errors.append(str(e.orig))
+            time.sleep(args.poll_ms / 1000)
+
+    def renew():
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                assert queue.renew(claimed.entry_id, claimed.worker_id)
+                renewals.append(time.perf_counter() - start)
+            except OperationalError as e:
+                renewal_errors.append(str(e.orig))
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=poll) for _ in range(args.readers)] + [threading.Thread(target=renew)]
+    start = time.perf_counter()
+    for process in writers:
+        process.start()
+    for thread in threads:
+        thread.start()
+    for process in writers:
+        process.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    rows = args.writers * args.jobs * args.batches * args.children * (args.months + 1)
+    return {
+        "profile": args.profile,
+        "rows_per_second": rows / elapsed,
+        "reads": len(reads),
+        "read_p50_ms": percentile(reads, 0.50) * 1000,
+        "read_p99_ms": percentile(reads, 0.99) * 1000,
+        "read_max_ms": max(reads, default=float("nan")) * 1000,
+        "read_errors": len(read_errors),
+        "renewal_p99_ms": percentile(renewals, 0.99) * 1000,
+        "renewal_max_ms": max(renewals, default=float("nan")) * 1000,
+        "renewal_errors": len(renewal_errors)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite reads during bulk writes")
+    parser.add_argument("--profile", choices=["both"] + list(PROFILES), default="both")
+    parser.add_argument("--writers", type=int, default=2, help="Concurrent analyses (processes)")
+    parser.add_argument("--jobs", type=int, default=3, help="Jobs saved per writer")
+    parser.add_argument("--batches", type=int, default=5, help="Streamed batches per job")
+    parser.add_argument("--children", type=int, default=2000, help="Children per batch")
+    parser.add_argument("--months", type=int, default=12, help="Measurements per child")
+    parser.add_argument("--validate-ms", type=float, default=100.0, help="Validation time per batch")
+    parser.add_argument("--readers", type=int, default=4, help="Polling threads")
+    parser.add_argument("--poll-ms", type=float, default=20.0, help="Pause between polls of a reader")
+    args = parser.parse_args()
+
+    if args.profile != "both":
+        print(json.dumps(run_profile(args)))
+        return
+
+    print(f"{args.writers} writers x {args.jobs} jobs x {args.batches} batches of {args.children} children, "
+          f"{args.readers} readers")
+    for profile, overrides in PROFILES.items():
+        directory = tempfile.mkdtemp(prefix="bench-concurrency-")
+        env = dict(os.environ, **overrides, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        command = [sys.executable, os.path.abspath(__file__), "--profile", profile] + [
+            f"--{name.replace('_', '-')}={value}" for name, value in vars(args).items() if name != "profile"
+        ]
+        output = subprocess.run(command, env=env, cwd=directory, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"  {profile:8} reads p50 {result['read_p50_ms']:7.1f}ms  p99 {result['read_p99_ms']:7.1f}ms  "
+              f"max {result['read_max_ms']:7.1f}ms  errors {result['read_errors']:3}  |  "
+              f"renewals p99 {result['renewal_p99_ms']:7.1f}ms  max {result['renewal_max_ms']:7.1f}ms  "
+              f"errors {result['renewal_errors']:3}  |  {result['rows_per_second']:9,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark persisting validated children and measurements.
+
+Compares the original ORM path (add + flush per child to get its id, one ORM object
+per measurement) with GrowthAnalyzer._save_batch (executemany inserts with child ids
+from INSERT ... RETURNING; COPY on PostgreSQL), on a temporary SQLite database or the
+database of BENCH_DATABASE_URL:
+
+    cd backend && python benchmarks/bench_persist.py [--children 10000] [--months 12]
+    BENCH_DATABASE_URL=postgresql+psycopg2://postgres@localhost/bench python benchmarks/bench_persist.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read on first import, use a throwaway database
+_db_path = os.path.join(tempfile.mkdtemp(prefix="bench-persist-"), "bench.db")
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{_db_path}")
+
+import numpy as np
+import pandas as pd
+
+from database import Base, engine, SessionLocal
+from models import Job, Child, Measurement
+from services.analyzer import GrowthAnalyzer
+
+
+def make_batch(n_children: int, months: int):
+    """
+    ExcelParser children table and a validated measurements table, like one parsed upload
+    """
+    children = pd.DataFrame({
+        'nama_anak': [f'Anak {i}' for i in range(n_children)],
+        'nik': [str(10 ** 15 + i) for i in range(n_children)],
+        'jenis_kelamin': 'L',
+        'tgl_lahir': pd.Timestamp('2022-01-01')
+    })
+    validated = pd.DataFrame({
+        'child_index': np.repeat(np.arange(n_children), months),
+        'bulan': 'JANUARI',
+        'tgl_ukur': pd.Timestamp('2023-01-05'),
+        'umur_bulan': pd.array(np.tile(np.arange(months), n_children), dtype='Int64'),
+        'berat': 8.5,
+        'tinggi': 70.1,
+        'cara_ukur': 'Berdiri',
+        'status_berat': 'Ideal',
+        'status_tinggi': 'Ideal',
+        'validasi_input': 'OK',
+        'keterangan': ''
+    })
+    return children, validated
+
+
+def save_orm(db, job_id: str, children: pd.DataFrame, validated: pd.DataFrame):
+    """
+    The original persistence loop: flush per child, ORM object per measurement
+    """
+    records = validated.astype(object).where(validated.notna(), None)
+    child_ids = {}
+    for child_index, child in zip(children.index, children.itertuples(index=False)):
+        record = Child(job_id=job_id, nik=child.nik, nama=child.nama_anak,
+                       jenis_kelamin=child.jenis_kelamin, tgl_lahir=child.tgl_lahir)
+        db.add(record)
+        db.flush()  # Get child ID
+        child_ids[child_index] = record.id
+
+    for m in records.itertuples(index=False):
+        db.add(Measurement(
+            job_id=job_id, child_id=child_ids[m.child_index], bulan=m.bulan, tgl_ukur=m.tgl_ukur,
+            umur_bulan=m.umur_bulan, berat=m.berat, tinggi=m.tinggi, cara_ukur=m.cara_ukur,
+            status_berat=m.status_berat, status_tinggi=m.status_tinggi,
+            validasi_input=m.validasi_input, keterangan=m.keterangan
+        ))
+
+
+def check_saved(db, job_id: str, children: pd.DataFrame, months: int):
+    saved_children = db.query(Child).filter(Child.job_id == job_id).order_by(Child.id).all()
+    saved = db.query(Measurement.child_id).filter(Measurement.job_id == job_id).order_by(Measurement.id).all()
+    assert [child.nama for child in saved_children] == children['nama_anak'].tolist()
+    assert all(saved_children[i // months].id == row.child_id for i, row in enumerate(saved))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark saving validated results")
+    parser.add_argument("--children", type=int, default=10000)
+    parser.add_argument("--months", type=int, default=12, help="Measurements per child")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    children, validated = make_batch(args.children, args.months)
+    rows = len(children) + len(validated)
+    analyzer = GrowthAnalyzer()
+
+    db = SessionLocal()
+    try:
+        # Rows of earlier runs on a persistent database
+        for column in (Measurement.job_id, Child.job_id, Job.id):
+            db.query(column.class_).filter(column.in_(("orm", "bulk"))).delete()
+        for job_id in ("orm", "bulk"):
+            db.add(Job(id=job_id, default_gender="L", analyzer_name="bench", analyzer_institution="bench"))
+        db.commit()
+
+        results = {}
+        for job_id, save in (("orm", save_orm), ("bulk", analyzer._save_batch)):
+            start = time.perf_counter()
+            save(db, job_id, children, validated)
+            db.commit()
+            results[job_id] = time.perf_counter() - start
+            check_saved(db, job_id, children, args.months)
+    finally:
+        db.close()
+
+    print(f"{args.children} children, {rows} rows")
+    for job_id, seconds in results.items():
+        print(f"  {job_id:5} {seconds:7.2f}s  {rows / seconds:10,.0f} rows/s")
+    print(f"  speedup {results['orm'] / results['bulk']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,31 @@ class Settings(BaseSettings):
     MAX_UPLOAD_MB: int = 10
     DEFAULT_GENDER: str = "L"
     DATABASE_URL: str = "sqlite:///./sitracking.db"
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL, DELETE
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # NORMAL, FULL
+    SQLITE_BUSY_TIMEOUT_MS: int = 30000
+    SQLITE_MMAP_SIZE_MB: float = 256.0
+    SQLITE_CACHE_SIZE_MB: float = 64.0
+    DB_POOL_SIZE: int = 5  # Server databases (PostgreSQL): connections kept per process
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    REFERENCE_CACHE_SIZE: int = 16
+    STREAMING_PARSE_THRESHOLD_MB: float = 2.0
+    STREAMING_CHUNK_ROWS: int = 2000
+    ANALYSIS_EXECUTOR: str = "process"  # process, queue, inline
+    ANALYSIS_WORKERS: int = 2
+    JOB_LEASE_SECONDS: int = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 30.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    EXCEL_REPORT_MODE: str = "streaming"  # streaming, standard
+    REPORT_RENDER_MODE: str = "eager"  # eager, lazy (rendered on first download)
+    ARTIFACT_CACHE_MAX_MB: float = 512.0
+    ARTIFACT_CACHE_MAX_AGE_HOURS: float = 72.0
+    DOWNLOAD_DELIVERY: str = "app"  # app, x-accel (nginx serves files under FILE_STORE)
+    X_ACCEL_REDIRECT_PREFIX: str = "/protected-files/"
+    EXPORT_CHUNK_ROWS: int = 20000
 
     class Config:
         env_file = ".env"
@@ -1,21 +1,248 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    engine_options = {
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        }
+    }
+else:
+    # Server databases (PostgreSQL): a bounded pool per process, connections checked
+    # before use so a database restart does not fail the next requests
+    engine_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS
+    }
+
+engine = create_engine(settings.DATABASE_URL, **engine_options)
+
+
+def sqlite_pragmas():
+    """
+    PRAGMAs of the SQLite profile (config SQLITE_*), in the order they are applied.
+    WAL lets the API read while an analysis writes; NORMAL synchronous is safe with WAL
+    (a power loss may drop the last commits, never corrupts).
+    """
+    return [
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+        ("mmap_size", int(settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024)),
+        ("cache_size", -int(settings.SQLITE_CACHE_SIZE_MB * 1024))  # Negative: KiB
+    ]
+
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in sqlite_pragmas():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+class SerializedWriter:
+    """
+    Lets one bulk writer at a time into the SQLite database, across threads and
+    processes (API, analysis pool and queue workers), through a lock file next to it.
+    SQLite allows a single writer anyway; queuing on the lock keeps the bulk inserts
+    of concurrent analyses from failing each other with "database is locked", and
+    keeping each locked write short leaves room for small writes (job status, lease
+    renewals), which wait on the busy timeout instead.
+    """
+
+    def __init__(self, database_path: Optional[str], enabled: bool = True):
+        self.lock_path = f"{database_path}.writer.lock" if database_path else None
+        self.enabled = enabled  # Server databases handle concurrent writers themselves
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        with self._thread_lock:
+            if self.lock_path is None or fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _database_path() -> Optional[str]:
+    database = engine.url.database
+    if not IS_SQLITE or not database or database == ":memory:":
+        return None
+    return os.path.abspath(database)
+
+
+class _Scope:
+    """
+    A request or job: the session shared by everything run inside it, and what it cost
+    """
+
+    def __init__(self):
+        self.session: Optional[Session] = None
+        self.active = True
+        self.sessions = 0
+        self.queries = 0
+
+
+_scope: ContextVar[Optional[_Scope]] = ContextVar("db_scope", default=None)
+
+
+class _CountedSession(Session):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        scope = _scope.get()
+        if scope is not None:
+            scope.sessions += 1
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    scope = _scope.get()
+    if scope is not None:
+        scope.queries += 1
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=_CountedSession)
 
 Base = declarative_base()
 
 
-def get_db():
+@contextmanager
+def unit_of_work(new: bool = False) -> Iterator[Session]:
+    """
+    Session of the current request or job.
+
+    Inside a scope (see session_scope) every call gets the scope's session, so model
+    helpers called during one request share one session and the objects they return
+    stay attached (relationships load in the same session). Outside a scope each call
+    gets its own session, closed on exit. Commits stay explicit.
+    """
+    scope = _scope.get()
+    if scope is not None and scope.active and not new:
+        if scope.session is None:
+            scope.session = SessionLocal()
+        yield scope.session
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+@contextmanager
+def session_scope() -> Iterator[_Scope]:
+    """
+    Open a scope for a request or a job; its session is closed when the scope ends.
+    Tasks and threads started inside the scope see it until then and use their own
+    sessions afterwards.
+    """
+    scope = _Scope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        scope.active = False
+        session, scope.session = scope.session, None
+        if session is not None:
+            session.close()
+
+
+def get_db():
+    with unit_of_work() as db:
+        yield db
+
+
+class DatabaseMetrics:
+    """
+    Sessions and queries per HTTP request, summed for /metrics
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.sessions = 0
+        self.queries = 0
+        self.max_queries = 0
+
+    def record(self, scope: _Scope):
+        with self._lock:
+            self.requests += 1
+            self.sessions += scope.sessions
+            self.queries += scope.queries
+            self.max_queries = max(self.max_queries, scope.queries)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'sessions_per_request': self.sessions / self.requests if self.requests else 0.0,
+            'queries_per_request': self.queries / self.requests if self.requests else 0.0,
+            'max_queries_per_request': self.max_queries
+        }
+
+
+class SessionScopeMiddleware:
+    """
+    ASGI middleware running each HTTP request in a session scope. The response headers
+    X-DB-Sessions and X-DB-Queries carry the counts up to the response start; db_metrics
+    records the totals, including queries made while streaming the body (exports).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with session_scope() as db_scope:
+            async def send_with_counts(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"x-db-sessions", str(db_scope.sessions).encode()),
+                        (b"x-db-queries", str(db_scope.queries).encode())
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_counts)
+            finally:
+                db_metrics.record(db_scope)
+
+
+# Global instance
+db_metrics = DatabaseMetrics()
+serialized_writer = SerializedWriter(_database_path(), enabled=IS_SQLITE)
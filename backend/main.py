@@ -1,6 +1,7 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks, Depends, Request
 from typing import Optional
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import uuid
@@ -8,13 +9,22 @@ from pathlib import Path
 import logging
 from contextlib import asynccontextmanager
 
-from database import engine, Base
-from models import Job, User, MasterReference
-from schemas import AnalysisRequest, AnalysisResponse, JobStatus
+from database import Base, SessionScopeMiddleware, db_metrics, session_scope
+from migrations import create_tables, run_migrations
+from models import Job, User, MasterReference, Measurement
+from schemas import (
+    AnalysisRequest, AnalysisResponse, JobStatus, MeasurementItem, MeasurementPage, ValidationStatus, GrowthStatus
+)
 from schemas_auth import JobCreateRequest
-from services.analyzer import GrowthAnalyzer
+from services.executor import analysis_executor
+from services.job_queue import job_queue
 from services.file_manager import FileManager
+from services.report_generator import ReportGenerator
+from services.report_data import load_report_data
 from services.auth_service import auth_service
+from services.worker_stats import worker_stats
+from services.artifact_cache import artifact_cache
+from services.file_delivery import file_delivery
 from dependencies import get_current_active_user
 from config import settings
 from auth_routes import router as auth_router
@@ -40,7 +50,9 @@ os.makedirs(f"{settings.FILE_STORE}/outputs", exist_ok=True)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    Base.metadata.create_all(bind=engine)
+    create_tables(Base.metadata)
+    # Schema changes to existing databases (create_all only creates missing tables)
+    run_migrations()
 
     # Create default admin user
     auth_service.create_default_admin()
@@ -48,6 +60,7 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup completed")
     yield
     # Shutdown
+    analysis_executor.shutdown()
     logger.info("Application shutdown")
 
 
@@ -67,9 +80,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# One database session per request, shared by the model helpers it calls
+app.add_middleware(SessionScopeMiddleware)
+
 # Services
 file_manager = FileManager()
-analyzer = GrowthAnalyzer()
+report_generator = ReportGenerator()
 
 # Include auth routes
 app.include_router(auth_router)
@@ -85,6 +101,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Cache statistics for monitoring, summed over the processes that run analyses
+    """
+    return {
+        **worker_stats.collect(),
+        "artifact_cache": artifact_cache.stats(),
+        "database": db_metrics.stats(),
+        "job_queue": job_queue.stats()
+    }
+
+
 @app.post("/api/analyze", response_model=AnalysisResponse)
 async def analyze_data(
     background_tasks: BackgroundTasks,
@@ -200,14 +229,18 @@ async def analyze_data(
             created_by=current_user.id
         )
 
-        # Run analysis in background
-        background_tasks.add_task(
-            analyzer.run_analysis,
-            job_id=job_id,
-            lapangan_path=lapangan_path,
-            referensi_path=referensi_path,
-            default_gender=jenis_kelamin_default
-        )
+        if analysis_executor.backend == "queue":
+            # Persist the job for worker.py processes
+            await run_in_threadpool(job_queue.enqueue, job_id)
+        else:
+            # Run analysis in background, outside the event loop
+            background_tasks.add_task(
+                analysis_executor.submit,
+                job_id=job_id,
+                lapangan_path=lapangan_path,
+                referensi_path=referensi_path,
+                default_gender=jenis_kelamin_default
+            )
 
         logger.info(f"Started analysis job {job_id}")
 
@@ -241,8 +274,75 @@ async def get_job_status(job_id: str):
         raise HTTPException(status_code=500, detail="Gagal mengambil status job")
 
 
+@app.get("/api/jobs/{job_id}/measurements", response_model=MeasurementPage)
+async def get_job_measurements(
+    job_id: str,
+    limit: int = 50,
+    after: Optional[str] = None,
+    validasi_input: Optional[ValidationStatus] = None,
+    status_berat: Optional[GrowthStatus] = None,
+    status_tinggi: Optional[GrowthStatus] = None,
+    bulan: Optional[str] = None,
+    nama: Optional[str] = None
+):
+    """
+    Browse a job's measurements, ordered by child, with keyset pagination:
+    pass next_cursor of the previous page as `after`
+    """
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit harus antara 1 dan 500")
+
+    cursor = None
+    if after:
+        try:
+            child_id, measurement_id = (int(part) for part in after.split('.'))
+            cursor = (child_id, measurement_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor tidak valid")
+
+    try:
+        job = Job.get_by_id(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+
+        # One row more than the page tells whether there is a next page
+        rows = await run_in_threadpool(
+            Measurement.get_page, job_id, after=cursor, limit=limit + 1,
+            validasi_input=validasi_input.value if validasi_input else None,
+            status_berat=status_berat.value if status_berat else None,
+            status_tinggi=status_tinggi.value if status_tinggi else None,
+            bulan=bulan, nama=nama
+        )
+        items = [
+            MeasurementItem(
+                id=m.id,
+                child_id=m.child_id,
+                nama_anak=nama_anak,
+                bulan=m.bulan,
+                tgl_ukur=m.tgl_ukur,
+                umur=m.umur_bulan,
+                berat=m.berat,
+                tinggi=m.tinggi,
+                cara_ukur=m.cara_ukur,
+                status_berat=m.status_berat,
+                status_tinggi=m.status_tinggi,
+                validasi_input=m.validasi_input,
+                keterangan=m.keterangan or ""
+            )
+            for m, nama_anak in rows[:limit]
+        ]
+        next_cursor = f"{items[-1].child_id}.{items[-1].id}" if len(rows) > limit else None
+        return MeasurementPage(items=items, next_cursor=next_cursor)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting measurements: {str(e)}")
+        raise HTTPException(status_code=500, detail="Gagal mengambil data pengukuran")
+
+
 @app.get("/api/download/{filename}")
-async def download_file(filename: str, job: str):
+async def download_file(filename: str, job: str, request: Request):
     """
     Download analysis results
     """
@@ -261,13 +361,19 @@ async def download_file(filename: str, job: str):
         else:
             file_path = job_record.report_path
 
-        if not file_path or not os.path.exists(file_path):
+        if job_record.status == "completed" and job_record.excel_path is None:
+            # Rendered on first download (REPORT_RENDER_MODE=lazy)
+            file_path = await artifact_cache.get_or_render(job_record.id, filename, report_renderer(job_record, filename))
+        elif not file_path or not os.path.exists(file_path):
+            if filename.endswith('.txt') and job_record.status == "completed":
+                return await stream_text_report(job_record, filename)
             raise HTTPException(status_code=404, detail="File tidak ditemukan")
 
-        return FileResponse(
-            path=file_path,
-            filename=filename,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' if filename.endswith('.xlsx') else 'text/plain'
+        return await file_delivery.response(
+            request,
+            file_path,
+            filename,
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' if filename.endswith('.xlsx') else 'text/plain'
         )
 
     except HTTPException:
@@ -277,6 +383,46 @@ async def download_file(filename: str, job: str):
         raise HTTPException(status_code=500, detail="Gagal mengunduh file")
 
 
+def report_renderer(job_record: Job, filename: str):
+    """
+    Render function for the artifact cache: writes the report from the saved results.
+    The render may outlive the request (a disconnected client does not cancel it), so it
+    reads with its own session and copies of the job's fields, not the request's session.
+    """
+    job_id, default_gender, summary = job_record.id, job_record.default_gender, job_record.get_summary()
+
+    def render(path: str):
+        with session_scope():
+            report_data = load_report_data(job_id)
+        if filename == "hasil_validasi.xlsx":
+            report_generator.write_excel_report(path, report_data, default_gender)
+        elif filename == "konteks_lengkap.txt":
+            report_generator.write_context_report(path, report_data, summary, default_gender)
+        else:
+            report_generator.write_text_report(path, report_data, summary)
+    return render
+
+
+async def stream_text_report(job_record: Job, filename: str) -> StreamingResponse:
+    """
+    Render a text report whose file is missing (not written yet or cleaned up) from the
+    saved results, streaming it to the client chunk by chunk instead of writing it to disk
+    """
+    report_data = await run_in_threadpool(load_report_data, job_record.id)
+    summary = job_record.get_summary()
+    if filename == "konteks_lengkap.txt":
+        chunks = report_generator.iter_context_report(report_data, summary, job_record.default_gender)
+    else:
+        chunks = report_generator.iter_text_report(report_data, summary)
+
+    # Sync iterators are consumed on the threadpool, off the event loop
+    return StreamingResponse(
+        chunks,
+        media_type='text/plain; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Versioned schema migrations.
+
+Each module vNNNN_<name>.py in this package defines upgrade(connection) and is applied
+once, in version order, by run_migrations(); applied versions are recorded in the
+schema_migrations table. The API and the worker run it on startup after
+Base.metadata.create_all, and it can be run by hand:
+
+    python -m migrations            apply pending migrations
+    python -m migrations status     list migrations and whether they are applied
+
+A version's row is inserted before its upgrade runs, in the same transaction, so a
+second process starting at the same time waits for it and then skips the version.
+Tables are created with create_tables(), which also tolerates such a second process.
+Upgrades must be idempotent (see ops.py): databases created by create_all already have
+the current schema, so on those every migration only gets recorded.
+"""
+import re
+import pkgutil
+import importlib
+import logging
+from datetime import datetime
+from typing import List, NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DatabaseError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module: object
+
+
+def discover() -> List[Migration]:
+    """
+    Migration modules of this package, in version order
+    """
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = re.fullmatch(r"v(\d{4})_(\w+)", module_info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{module_info.name}")
+            migrations.append(Migration(int(match.group(1)), match.group(2), module))
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+def applied_versions(bind: Engine = None) -> List[int]:
+    bind = bind or _default_engine()
+    if not inspect(bind).has_table(schema_migrations.name):
+        return []
+    with bind.connect() as connection:
+        return [version for version, in connection.execute(
+            select(schema_migrations.c.version).order_by(schema_migrations.c.version))]
+
+
+def create_tables(metadata: MetaData, bind: Engine = None):
+    """
+    Create the missing tables of metadata. When the API and the worker start together,
+    the other process may create a table between the existence check and CREATE TABLE
+    ("table already exists"); checking again then skips it.
+    """
+    bind = bind or _default_engine()
+    try:
+        metadata.create_all(bind)
+    except DatabaseError as e:
+        logger.info(f"Creating tables raced with another process, checking again: {e.orig}")
+        metadata.create_all(bind)
+
+
+def run_migrations(bind: Engine = None) -> List[int]:
+    """
+    Apply pending migrations, returning the versions applied by this call
+    """
+    bind = bind or _default_engine()
+    create_tables(schema_migrations.metadata, bind)
+    applied = set(applied_versions(bind))
+    newly_applied = []
+
+    for migration in discover():
+        if migration.version in applied:
+            continue
+        try:
+            with bind.begin() as connection:
+                # Claims the version; blocks while another process applies it
+                connection.execute(insert(schema_migrations).values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()))
+                logger.info(f"Applying migration {migration.version:04d} {migration.name}")
+                migration.module.upgrade(connection)
+        except IntegrityError:
+            logger.info(f"Migration {migration.version:04d} {migration.name} was applied by another process")
+            continue
+        newly_applied.append(migration.version)
+
+    return newly_applied
+
+
+def _default_engine() -> Engine:
+    from database import engine
+    return engine
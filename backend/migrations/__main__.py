@@ -0,0 +1,18 @@
+import sys
+import logging
+
+from database import Base
+import models  # noqa: F401  (registers the tables)
+from migrations import applied_versions, create_tables, discover, run_migrations
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["status"]:
+        applied = set(applied_versions())
+        for migration in discover():
+            print(f"{migration.version:04d} {migration.name:<32} {'applied' if migration.version in applied else 'pending'}")
+    else:
+        create_tables(Base.metadata)
+        versions = run_migrations()
+        print(f"Applied {len(versions)} migration(s)" + (f": {versions}" if versions else ""))
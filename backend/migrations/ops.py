@@ -0,0 +1,20 @@
+"""
+Idempotent schema operations for migrations
+"""
+from typing import Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def add_column(connection: Connection, table: str, column: str, ddl_type: str):
+    """
+    ALTER TABLE ... ADD COLUMN unless the column exists
+    """
+    columns = {info["name"] for info in inspect(connection).get_columns(table)}
+    if column not in columns:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def create_index(connection: Connection, name: str, table: str, columns: Sequence[str]):
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
@@ -0,0 +1,8 @@
+"""
+Add jobs.context_path (formerly migrate_database.py)
+"""
+from .ops import add_column
+
+
+def upgrade(connection):
+    add_column(connection, "jobs", "context_path", "TEXT")
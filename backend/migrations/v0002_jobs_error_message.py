@@ -0,0 +1,8 @@
+"""
+Add jobs.error_message (formerly add_error_message_column.py)
+"""
+from .ops import add_column
+
+
+def upgrade(connection):
+    add_column(connection, "jobs", "error_message", "TEXT")
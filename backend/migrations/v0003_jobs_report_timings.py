@@ -0,0 +1,8 @@
+"""
+Add jobs.report_timings_json (formerly add_report_timings_column.py)
+"""
+from .ops import add_column
+
+
+def upgrade(connection):
+    add_column(connection, "jobs", "report_timings_json", "TEXT")
@@ -0,0 +1,25 @@
+"""
+Indexes for the hot queries, the same ones models.py declares:
+
+- measurements (job_id): report data and exports, read in id order
+- measurements (job_id, child_id): measurement pages ordered by (child_id, id)
+- measurements (child_id), children (job_id): lookups by parent and cascading deletes
+- jobs (created_at), jobs (status, created_at): job listing and ranged exports
+- jobs (referensi_path): reference sharing check when a job is deleted
+"""
+from .ops import create_index
+
+INDEXES = (
+    ("ix_measurements_job_id", "measurements", ("job_id",)),
+    ("ix_measurements_job_id_child_id", "measurements", ("job_id", "child_id")),
+    ("ix_measurements_child_id", "measurements", ("child_id",)),
+    ("ix_children_job_id", "children", ("job_id",)),
+    ("ix_jobs_created_at", "jobs", ("created_at",)),
+    ("ix_jobs_status_created_at", "jobs", ("status", "created_at")),
+    ("ix_jobs_referensi_path", "jobs", ("referensi_path",)),
+)
+
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        create_index(connection, name, table, columns)
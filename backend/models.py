@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Date, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Date, Boolean, Index, tuple_
 from sqlalchemy.orm import relationship, joinedload
 from sqlalchemy.sql import func
 from datetime import datetime
 import json
-from database import Base
+from database import Base, unit_of_work
 
 
 class User(Base):
@@ -19,9 +19,7 @@ class User(Base):
 
     @classmethod
     def create(cls, username: str, password_hash: str, full_name: str):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             user = cls(
                 username=username,
                 password_hash=password_hash,
@@ -31,26 +29,17 @@ class User(Base):
             db.commit()
             db.refresh(user)
             return user
-        finally:
-            db.close()
 
     @classmethod
     def get_by_username(cls, username: str):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             return db.query(cls).filter(cls.username == username).first()
-        finally:
-            db.close()
 
     def update_last_login(self):
         self.last_login = datetime.utcnow()
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
+            db.merge(self)
             db.commit()
-        finally:
-            db.close()
 
 
 class MasterReference(Base):
@@ -70,9 +59,7 @@ class MasterReference(Base):
 
     @classmethod
     def create(cls, name: str, file_path: str, file_name: str, description: str = None, created_by: int = None):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             master_ref = cls(
                 name=name,
                 file_path=file_path,
@@ -84,34 +71,22 @@ class MasterReference(Base):
             db.commit()
             db.refresh(master_ref)
             return master_ref
-        finally:
-            db.close()
 
     @classmethod
     def get_all_active(cls):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             return db.query(cls).options(
                 joinedload(cls.creator)
             ).filter(cls.is_active == True).order_by(cls.created_at.desc()).all()
-        finally:
-            db.close()
 
     @classmethod
     def get_by_id(cls, master_id: int):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             return db.query(cls).filter(cls.id == master_id).first()
-        finally:
-            db.close()
 
     def update(self, name: str = None, description: str = None):
         """Update master reference data"""
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             # Get the object in the current session with all required relationships
             master_ref = db.query(MasterReference).options(
                 joinedload(MasterReference.creator)
@@ -125,20 +100,19 @@ class MasterReference(Base):
                 # Update self object
                 self.name = master_ref.name
                 self.description = master_ref.description
-        finally:
-            db.close()
 
     def delete(self):
         """Delete master reference and its file"""
         import os
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             # Get the object in the current session
             master_ref = db.query(MasterReference).filter(MasterReference.id == self.id).first()
             if master_ref:
                 # Delete the file if it exists
                 if master_ref.file_path and os.path.exists(master_ref.file_path):
+                    # Drop the parsed tables cached for this file before it disappears
+                    from services.reference_cache import reference_cache
+                    reference_cache.invalidate(master_ref.file_path)
                     try:
                         os.remove(master_ref.file_path)
                     except Exception as e:
@@ -147,15 +121,16 @@ class MasterReference(Base):
                 # Delete the database record
                 db.delete(master_ref)
                 db.commit()
-        finally:
-            db.close()
 
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
 
     id = Column(String, primary_key=True)
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(DateTime, default=func.now(), index=True)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     default_gender = Column(String(1), nullable=False)
     status = Column(String(20), default="processing")  # processing, completed, failed
@@ -164,8 +139,9 @@ class Job(Base):
     report_path = Column(Text)
     context_path = Column(Text)  # New field for comprehensive context file
     lapangan_path = Column(Text)
-    referensi_path = Column(Text)
+    referensi_path = Column(Text, index=True)
     error_message = Column(Text)  # Store detailed error messages
+    report_timings_json = Column(Text)  # Seconds spent rendering each report artifact
 
     # New fields for user and institution tracking
     analyzer_name = Column(String(100), nullable=False)  # e.g., "Nur Azis"
@@ -178,13 +154,12 @@ class Job(Base):
     measurements = relationship("Measurement", back_populates="job", cascade="all, delete-orphan")
     master_reference = relationship("MasterReference", foreign_keys=[master_reference_id])
     creator = relationship("User", foreign_keys=[created_by])
+    queue_entries = relationship("JobQueueEntry", back_populates="job", cascade="all, delete-orphan")
 
     @classmethod
     def create(cls, job_id: str, default_gender: str, lapangan_path: str, referensi_path: str,
                analyzer_name: str, analyzer_institution: str, master_reference_id: int = None, created_by: int = None):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             job = cls(
                 id=job_id,
                 default_gender=default_gender,
@@ -199,38 +174,28 @@ class Job(Base):
             db.commit()
             db.refresh(job)  # Refresh to get the committed data
             return job
-        finally:
-            db.close()
 
     @classmethod
-    def get_by_id(cls, job_id: str):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
-            return db.query(cls).filter(cls.id == job_id).first()
-        finally:
-            db.close()
+    def get_by_id(cls, job_id: str, with_relations: bool = False):
+        """with_relations: load master_reference and creator in the same query"""
+        with unit_of_work() as db:
+            query = db.query(cls)
+            if with_relations:
+                query = query.options(joinedload(cls.master_reference), joinedload(cls.creator))
+            return query.filter(cls.id == job_id).first()
 
     @classmethod
     def get_all(cls, limit: int = 50, offset: int = 0):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             return db.query(cls).order_by(cls.created_at.desc()).offset(offset).limit(limit).all()
-        finally:
-            db.close()
 
     @classmethod
     def get_all_with_relations(cls, limit: int = 50, offset: int = 0):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             return db.query(cls).options(
                 joinedload(cls.master_reference),
                 joinedload(cls.creator)
             ).order_by(cls.created_at.desc()).offset(offset).limit(limit).all()
-        finally:
-            db.close()
 
     def update_status(self, status: str, error_message: str = None):
         self.status = status
@@ -238,33 +203,46 @@ class Job(Base):
         if error_message:
             self.error_message = error_message
 
-    def save_results(self, summary: dict, excel_path: str, report_path: str, context_path: str = None):
+    def save_results(self, summary: dict, excel_path: str, report_path: str, context_path: str = None,
+                     report_timings: dict = None):
         self.status = "completed"
         self.summary_json = json.dumps(summary)
         self.excel_path = excel_path
         self.report_path = report_path
         if context_path:
             self.context_path = context_path
+        if report_timings is not None:
+            self.report_timings_json = json.dumps(report_timings)
         self.updated_at = datetime.utcnow()
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
+        with unit_of_work() as db:
             db.merge(self)  # Merge the object into session before committing
             db.commit()
-        finally:
-            db.close()
+
+    def save_context_report(self, context_path: str, report_timings: dict = None):
+        """Attach the context report once it is rendered (after the job completed)"""
+        self.context_path = context_path
+        if report_timings is not None:
+            self.report_timings_json = json.dumps(report_timings)
+        with unit_of_work() as db:
+            db.merge(self)
+            db.commit()
 
     def get_summary(self):
         if self.summary_json:
             return json.loads(self.summary_json)
         return None
 
+    def get_report_timings(self):
+        if self.report_timings_json:
+            return json.loads(self.report_timings_json)
+        return None
+
 
 class Child(Base):
     __tablename__ = "children"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False, index=True)
     nik = Column(String(50), nullable=True)
     nama = Column(String(255), nullable=False)
     tgl_lahir = Column(Date, nullable=True)
@@ -277,10 +255,14 @@ class Child(Base):
 
 class Measurement(Base):
     __tablename__ = "measurements"
+    __table_args__ = (
+        # Keyset pages of a job ordered by (child_id, id)
+        Index("ix_measurements_job_id_child_id", "job_id", "child_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
-    child_id = Column(Integer, ForeignKey("children.id"), nullable=False)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False, index=True)
+    child_id = Column(Integer, ForeignKey("children.id"), nullable=False, index=True)
     bulan = Column(String(20), nullable=False)  # "JANUARI", "FEBRUARI", etc.
     tgl_ukur = Column(Date, nullable=True)
     umur_bulan = Column(Integer, nullable=True)
@@ -294,4 +276,49 @@ class Measurement(Base):
 
     # Relationships
     job = relationship("Job", back_populates="measurements")
-    child = relationship("Child", back_populates="measurements")
\ No newline at end of file
+    child = relationship("Child", back_populates="measurements")
+
+    @classmethod
+    def get_page(cls, job_id: str, after: tuple = None, limit: int = 50, validasi_input: str = None,
+                 status_berat: str = None, status_tinggi: str = None, bulan: str = None, nama: str = None):
+        """
+        Measurements of a job ordered by (child_id, id) with the child's name, as
+        (measurement, nama) pairs. after is the (child_id, id) of the last row of the
+        previous page (keyset pagination), so every page costs the same.
+        """
+        with unit_of_work() as db:
+            query = db.query(cls, Child.nama).join(Child, cls.child_id == Child.id).filter(cls.job_id == job_id)
+            if validasi_input:
+                query = query.filter(cls.validasi_input == validasi_input)
+            if status_berat:
+                query = query.filter(cls.status_berat == status_berat)
+            if status_tinggi:
+                query = query.filter(cls.status_tinggi == status_tinggi)
+            if bulan:
+                query = query.filter(cls.bulan == bulan.upper())
+            if nama:
+                query = query.filter(Child.nama.ilike(f"%{nama}%"))
+            if after:
+                child_id, measurement_id = after
+                # Row value comparison, seeks in ix_measurements_job_id_child_id
+                query = query.filter(tuple_(cls.child_id, cls.id) > tuple_(child_id, measurement_id))
+            return query.order_by(cls.child_id, cls.id).limit(limit).all()
+
+
+class JobQueueEntry(Base):
+    __tablename__ = "job_queue"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False, index=True)
+    status = Column(String(20), default="queued", index=True)  # queued, running, done, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    available_at = Column(DateTime, nullable=False)  # Not claimable before this time (retry backoff)
+    lease_owner = Column(String(100), nullable=True)  # Worker holding the job
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # Relationships
+    job = relationship("Job", back_populates="queue_entries")
\ No newline at end of file
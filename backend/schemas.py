@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 
@@ -32,6 +32,27 @@ class MeasurementPreview(BaseModel):
     keterangan: str = ""
 
 
+class MeasurementItem(BaseModel):
+    id: int
+    child_id: int
+    nama_anak: str
+    bulan: str
+    tgl_ukur: Optional[date] = None
+    umur: Optional[int] = None
+    berat: Optional[float] = None
+    tinggi: Optional[float] = None
+    cara_ukur: Optional[str] = None
+    status_berat: Optional[GrowthStatus] = None
+    status_tinggi: Optional[GrowthStatus] = None
+    validasi_input: Optional[ValidationStatus] = None
+    keterangan: str = ""
+
+
+class MeasurementPage(BaseModel):
+    items: List[MeasurementItem]
+    next_cursor: Optional[str] = None  # Pass as `after` for the next page, None on the last page
+
+
 class AnalysisSummary(BaseModel):
     total_anak: int
     total_records: int
@@ -60,55 +81,48 @@ class JobStatus(BaseModel):
     downloads: Optional[Downloads] = None
     preview: Optional[List[MeasurementPreview]] = None
     error_message: Optional[str] = None
+    report_timings: Optional[Dict[str, float]] = None  # Seconds per report artifact
 
     @classmethod
     def from_job(cls, job):
-        from database import SessionLocal
-        from models import Measurement, Child
+        from models import Measurement
         import json
 
-        db = SessionLocal()
-        try:
-            summary_data = None
-            downloads_data = None
-            preview_data = None
-
-            if job.status == "completed" and job.summary_json:
-                summary_data = json.loads(job.summary_json)
-                summary_data = AnalysisSummary(**summary_data)
-
-                downloads_data = Downloads(
-                    excel=f"/api/download/hasil_validasi.xlsx?job={job.id}",
-                    laporan=f"/api/download/laporan_validasi.txt?job={job.id}"
-                )
-
-                # Get preview data (first 10 records)
-                measurements = db.query(Measurement).join(Child).filter(
-                    Measurement.job_id == job.id
-                ).limit(10).all()
-
-                preview_data = []
-                for m in measurements:
-                    preview_data.append(MeasurementPreview(
-                        nama_anak=m.child.nama,
-                        bulan=m.bulan,
-                        umur=m.umur_bulan,
-                        berat=m.berat,
-                        tinggi=m.tinggi,
-                        status_berat=m.status_berat,
-                        status_tinggi=m.status_tinggi,
-                        validasi_input=m.validasi_input,
-                        keterangan=m.keterangan or ""
-                    ))
-
-            return cls(
-                job_id=job.id,
-                status=job.status,
-                created_at=job.created_at,
-                summary=summary_data,
-                downloads=downloads_data,
-                preview=preview_data,
-                error_message=job.error_message
+        summary_data = None
+        downloads_data = None
+        preview_data = None
+
+        if job.status == "completed" and job.summary_json:
+            summary_data = json.loads(job.summary_json)
+            summary_data = AnalysisSummary(**summary_data)
+
+            downloads_data = Downloads(
+                excel=f"/api/download/hasil_validasi.xlsx?job={job.id}",
+                laporan=f"/api/download/laporan_validasi.txt?job={job.id}"
             )
-        finally:
-            db.close()
\ No newline at end of file
+
+            # Preview: first page of /api/jobs/{job_id}/measurements, names loaded in the same query
+            preview_data = []
+            for m, nama in Measurement.get_page(job.id, limit=10):
+                preview_data.append(MeasurementPreview(
+                    nama_anak=nama,
+                    bulan=m.bulan,
+                    umur=m.umur_bulan,
+                    berat=m.berat,
+                    tinggi=m.tinggi,
+                    status_berat=m.status_berat,
+                    status_tinggi=m.status_tinggi,
+                    validasi_input=m.validasi_input,
+                    keterangan=m.keterangan or ""
+                ))
+
+        return cls(
+            job_id=job.id,
+            status=job.status,
+            created_at=job.created_at,
+            summary=summary_data,
+            downloads=downloads_data,
+            preview=preview_data,
+            error_message=job.error_message,
+            report_timings=job.get_report_timings()
+        )
\ No newline at end of file
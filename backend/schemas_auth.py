@@ -8,12 +8,6 @@ class LoginRequest(BaseModel):
     password: str = Field(..., description="Password for login")
 
 
-class LoginResponse(BaseModel):
-    access_token: str
-    token_type: str = "bearer"
-    user: "UserInfo"
-
-
 class UserInfo(BaseModel):
     id: int
     username: str
@@ -25,6 +19,12 @@ class UserInfo(BaseModel):
         from_attributes = True
 
 
+class LoginResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    user: UserInfo
+
+
 class MasterReferenceCreate(BaseModel):
     name: str = Field(..., description="Name of the master reference")
     description: Optional[str] = Field(None, description="Description of the master reference")
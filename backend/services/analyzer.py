@@ -1,364 +1,372 @@
+import os
+import time
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple, Iterable, Iterator
+from itertools import chain
 from datetime import datetime
 import pandas as pd
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
 from models import Job, Child, Measurement
-from database import SessionLocal
+from database import serialized_writer, session_scope, unit_of_work
 from .excel_parser import ExcelParser
+from .growth_reference import GrowthReference
+from .validation_engine import MeasurementValidator
 from .report_generator import ReportGenerator
+from .report_data import ReportData, ReportCounts, build_child_results, count_statuses
 from .file_manager import FileManager
+from .bulk_loader import insert_returning_ids, insert_rows
 from config import settings
 
 logger = logging.getLogger(__name__)
 
 
+class TransientAnalysisError(ValueError):
+    """
+    Unexpected failure that is not caused by the uploaded files, so the job may be retried
+    """
+
+
+class FieldDataError(ValueError):
+    """
+    A streamed chunk of the field data file could not be parsed; like a file that fails
+    to parse up front, the job fails without a retry
+    """
+
+
+class LeaseLostError(Exception):
+    """
+    The queue lease of the job was lost (expired and reclaimed), so this run must not
+    save its results; another attempt owns the job now
+    """
+
+
 class GrowthAnalyzer:
+    # Number of detected field-data layouts remembered for re-runs of the same file
+    LAYOUT_CACHE_SIZE = 32
+
     def __init__(self):
         self.parser = ExcelParser()
+        self.validator = MeasurementValidator()
         self.report_generator = ReportGenerator()
         self.file_manager = FileManager()
+        # (path, size, mtime, streaming) -> layout returned by the parser
+        self.field_layouts: Dict[Tuple[str, int, float, bool], Dict[str, Any]] = {}
 
-    async def run_analysis(self, job_id: str, lapangan_path: str, referensi_path: str, default_gender: str):
+    async def run_analysis(self, job_id: str, lapangan_path: str, referensi_path: str, default_gender: str,
+                           lease_check: Optional[Callable[[], bool]] = None):
         """
-        Run complete analysis workflow
+        Run complete analysis workflow.
+        lease_check: for queued jobs, returns whether this run still holds the job's lease;
+        checked before results are committed, LeaseLostError is raised when it does not.
         """
-        db = SessionLocal()
-        try:
-            # Update job status
-            job = db.query(Job).filter(Job.id == job_id).first()
-            if not job:
-                raise ValueError(f"Job {job_id} not found")
+        with session_scope(), unit_of_work() as db:
+            try:
+                # Update job status
+                job = db.query(Job).filter(Job.id == job_id).first()
+                if not job:
+                    raise ValueError(f"Job {job_id} not found")
+
+                logger.info(f"Starting analysis for job {job_id}")
+
+                # Step 1: Parse reference data
+                logger.info("Parsing reference data...")
+                try:
+                    reference_data = self.parser.parse_reference_file(referensi_path)
+                except Exception as e:
+                    logger.error(f"Error parsing reference file: {str(e)}")
+                    error_msg = f"Format file referensi tidak valid: {str(e)}"
+                    job.update_status("failed", error_msg)
+                    db.commit()  # Force immediate commit
+                    raise ValueError(error_msg)
+
+                # Step 2: Parse field data with immediate error handling
+                logger.info("Parsing field data...")
+                try:
+                    field_data = self._load_field_data(lapangan_path)
+                except Exception as e:
+                    logger.error(f"Error parsing field data: {str(e)}")
+                    error_msg = self._field_data_error(e)
+                    job.update_status("failed", error_msg)
+                    db.commit()  # Force immediate commit
+                    raise ValueError(error_msg)
 
-            logger.info(f"Starting analysis for job {job_id}")
+                # Check if field data is empty
+                if not field_data:
+                    error_msg = "File data lapangan kosong atau tidak ada data yang valid. Pastikan file memiliki data anak yang akan dianalisis."
+                    job.update_status("failed", error_msg)
+                    db.commit()  # Force immediate commit
+                    raise ValueError(error_msg)
+
+                # Step 3: Validate and save data
+                logger.info("Validating and saving data...")
+                lazy_reports = settings.REPORT_RENDER_MODE == "lazy"
+                validation_results = self._validate_and_save_data(
+                    db, job_id, field_data, reference_data, default_gender, lease_check,
+                    collect_report_data=not lazy_reports
+                )
 
-            # Step 1: Parse reference data
-            logger.info("Parsing reference data...")
-            try:
-                reference_data = self.parser.parse_reference_file(referensi_path)
-            except Exception as e:
-                logger.error(f"Error parsing reference file: {str(e)}")
-                error_msg = f"Format file referensi tidak valid: {str(e)}"
-                job.update_status("failed", error_msg)
-                db.commit()  # Force immediate commit
-                raise ValueError(error_msg)
+                if lazy_reports:
+                    # Reports are rendered from the saved data on first download
+                    self._ensure_lease(db, lease_check)
+                    job.save_results(summary=validation_results['summary'], excel_path=None, report_path=None)
+                    logger.info(f"Analysis completed for job {job_id}, reports deferred to download")
+                    logger.info(f"Summary: {validation_results['summary']}")
+                    return
+
+                # Step 4: Render the reports concurrently
+                logger.info("Generating reports...")
+                summary = validation_results['summary']
+                report_tasks = self._start_reports(job_id, validation_results, default_gender)
+                try:
+                    (excel_path, excel_seconds), (text_path, text_seconds) = await asyncio.gather(
+                        report_tasks['excel'], report_tasks['text']
+                    )
+                except Exception:
+                    for task in report_tasks.values():
+                        task.cancel()
+                    raise
+
+                # Step 5: Complete the job as soon as the reports offered for download are ready
+                report_timings = {'excel': excel_seconds, 'text': text_seconds}
+                self._ensure_lease(db, lease_check)
+                job.save_results(
+                    summary=summary,
+                    excel_path=excel_path,
+                    report_path=text_path,
+                    report_timings=report_timings
+                )
 
-            # Step 2: Parse field data with immediate error handling
-            logger.info("Parsing field data...")
-            try:
-                field_data = self.parser.parse_field_data(lapangan_path)
-            except Exception as e:
-                logger.error(f"Error parsing field data: {str(e)}")
-                # Provide user-friendly error message
-                if "Kolom wajib tidak ditemukan" in str(e):
-                    error_msg = f"Format Excel tidak sesuai. {str(e)}"
-                elif "not found" in str(e).lower():
-                    error_msg = f"File Excel tidak ditemukan atau rusak. Silakan upload ulang file yang valid."
-                else:
-                    error_msg = f"Format file data lapangan tidak valid: {str(e)}"
-
-                job.update_status("failed", error_msg)
+                logger.info(f"Analysis completed for job {job_id}")
+                logger.info(f"Summary: {summary}")
+
+                # Step 6: Attach the context report when it finishes
+                try:
+                    context_path, context_seconds = await report_tasks['context']
+                    report_timings['context'] = context_seconds
+                    self._ensure_lease(db, lease_check)
+                    job.save_context_report(context_path, report_timings)
+                except LeaseLostError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error generating context report for job {job_id}: {str(e)}")
+
+                logger.info(f"Report timings for job {job_id}: {report_timings}")
+
+            except LeaseLostError:
+                logger.warning(f"Lease on job {job_id} lost, results of this run discarded")
+                raise
+            except FieldDataError as e:
+                logger.error(f"Field data error in analysis for job {job_id}: {str(e)}")
+                self._discard_results(db, job_id, lease_check)
+                job.update_status("failed", str(e))
                 db.commit()  # Force immediate commit
-                raise ValueError(error_msg)
+                raise
+            except ValueError as e:
+                # Re-raise validation errors with user-friendly messages
+                logger.error(f"Validation error in analysis for job {job_id}: {str(e)}")
+                self._discard_results(db, job_id, lease_check)
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error in analysis for job {job_id}: {str(e)}")
+                self._discard_results(db, job_id, lease_check)
+                # Try to update job status to failed
+                try:
+                    job = db.query(Job).filter(Job.id == job_id).first()
+                    if job:
+                        job.update_status("failed", f"Terjadi kesalahan saat memproses data: {str(e)}")
+                        db.commit()  # Force immediate commit
+                except:
+                    pass
+                raise TransientAnalysisError(f"Terjadi kesalahan saat memproses data: {str(e)}")
+
+    def _load_field_data(self, lapangan_path: str) -> Optional[Iterable[Tuple[pd.DataFrame, pd.DataFrame]]]:
+        """
+        Parse field data into (children, measurements) table batches.
+        Large workbooks are streamed in bounded chunks; smaller ones are a single batch.
+        Returns None when the file contains no children.
+        """
+        stat = os.stat(lapangan_path)
+        size_mb = stat.st_size / (1024 * 1024)
+        streaming = size_mb >= settings.STREAMING_PARSE_THRESHOLD_MB
+
+        # A retried or re-run job parses the same file again, reuse its detected layout
+        layout_key = (os.path.abspath(lapangan_path), stat.st_size, stat.st_mtime, streaming)
+        known_layout = self.field_layouts.get(layout_key)
+
+        if not streaming:
+            children, measurements, layout = self.parser.parse_field_data(lapangan_path, layout=known_layout)
+            self._remember_layout(layout_key, layout)
+            return [(children, measurements)] if len(children) else None
+
+        logger.info(f"Streaming field data ({size_mb:.1f} MB)")
+        layout, batches = self.parser.iter_field_data(lapangan_path, layout=known_layout)
+        self._remember_layout(layout_key, layout)
+        first = next(batches, None)
+        if first is None:
+            return None
+        return chain([first], self._checked_batches(batches))
+
+    def _checked_batches(self, batches: Iterator[Tuple[pd.DataFrame, pd.DataFrame]]):
+        """
+        Later chunks are parsed while the analysis consumes them, past the step 2 error
+        handling; report their parse errors the same way
+        """
+        try:
+            yield from batches
+        except Exception as e:
+            logger.error(f"Error parsing field data: {str(e)}")
+            raise FieldDataError(self._field_data_error(e)) from e
 
-            # Check if field data is empty
-            if not field_data:
-                error_msg = "File data lapangan kosong atau tidak ada data yang valid. Pastikan file memiliki data anak yang akan dianalisis."
-                job.update_status("failed", error_msg)
-                db.commit()  # Force immediate commit
-                raise ValueError(error_msg)
-
-            # Step 3: Validate and save data
-            logger.info("Validating and saving data...")
-            validation_results = self._validate_and_save_data(
-                db, job_id, field_data, reference_data, default_gender
-            )
-
-            # Step 4: Generate reports
-            logger.info("Generating reports...")
-            report_paths = await self._generate_reports(
-                job_id, validation_results, default_gender
-            )
-
-            # Step 5: Update job with results
-            summary = validation_results['summary']
-            job.save_results(
-                summary=summary,
-                excel_path=report_paths['excel'],
-                report_path=report_paths['text'],
-                context_path=report_paths['context']
-            )
-
-            logger.info(f"Analysis completed for job {job_id}")
-            logger.info(f"Summary: {summary}")
-
-        except ValueError as e:
-            # Re-raise validation errors with user-friendly messages
-            logger.error(f"Validation error in analysis for job {job_id}: {str(e)}")
-            raise
+    @staticmethod
+    def _field_data_error(e: Exception) -> str:
+        """
+        User-friendly message for a field data file that could not be parsed
+        """
+        if "Kolom wajib tidak ditemukan" in str(e):
+            return f"Format Excel tidak sesuai. {str(e)}"
+        if "not found" in str(e).lower():
+            return f"File Excel tidak ditemukan atau rusak. Silakan upload ulang file yang valid."
+        return f"Format file data lapangan tidak valid: {str(e)}"
+
+    def _ensure_lease(self, db: Session, lease_check: Optional[Callable[[], bool]]):
+        if lease_check is not None and not lease_check():
+            db.rollback()
+            raise LeaseLostError("Lease pekerjaan hilang, hasil proses ini dibuang")
+
+    def _discard_results(self, db: Session, job_id: str, lease_check: Optional[Callable[[], bool]]):
+        """
+        Remove the batches a failed run already committed, unless another attempt owns the job now
+        """
+        try:
+            db.rollback()
+            with serialized_writer():
+                db.execute(delete(Measurement).where(Measurement.job_id == job_id))
+                db.execute(delete(Child).where(Child.job_id == job_id))
+                if lease_check is not None and not lease_check():
+                    db.rollback()
+                    return
+                db.commit()
         except Exception as e:
-            logger.error(f"Unexpected error in analysis for job {job_id}: {str(e)}")
-            # Try to update job status to failed
-            try:
-                job = db.query(Job).filter(Job.id == job_id).first()
-                if job:
-                    job.update_status("failed", f"Terjadi kesalahan saat memproses data: {str(e)}")
-                    db.commit()  # Force immediate commit
-            except:
-                pass
-            raise ValueError(f"Terjadi kesalahan saat memproses data: {str(e)}")
-        finally:
-            db.close()
-
-    def _validate_and_save_data(self, db: Session, job_id: str, field_data: List[Dict],
-                              reference_data: Dict, default_gender: str) -> Dict:
+            logger.error(f"Could not remove partial results of job {job_id}: {str(e)}")
+
+    def _remember_layout(self, key: Tuple[str, int, float, bool], layout: Dict[str, Any]):
+        self.field_layouts.pop(key, None)
+        self.field_layouts[key] = layout
+        while len(self.field_layouts) > self.LAYOUT_CACHE_SIZE:
+            self.field_layouts.pop(next(iter(self.field_layouts)))
+
+    def _validate_and_save_data(self, db: Session, job_id: str, field_data: Iterable[Tuple[pd.DataFrame, pd.DataFrame]],
+                              reference_data: GrowthReference, default_gender: str,
+                              lease_check: Optional[Callable[[], bool]] = None,
+                              collect_report_data: bool = True) -> Dict:
         """
-        Validate measurements and save to database
+        Validate measurements and save to database.
+        field_data is an iterable of (children, measurements) tables from ExcelParser;
+        batches may be produced lazily. Without collect_report_data no ReportData is kept
+        in memory (report_data is None).
         """
-        total_records = 0
-        valid_count = 0
-        warning_count = 0
-        error_count = 0
+        children_count = 0
+        counts = ReportCounts(0, 0, 0, 0, 0, 0)
         missing_count = 0
-
-        for child_data in field_data:
-            # Save child record
-            child = Child(
-                job_id=job_id,
-                nik=child_data.get('nik'),
-                nama=child_data['nama_anak'],
-                jenis_kelamin=child_data.get('jenis_kelamin'),
-                tgl_lahir=child_data.get('tgl_lahir')
-            )
-            db.add(child)
-            db.flush()  # Get child ID
-
-            # Process measurements for this child
-            measurements = child_data.get('measurements', [])
-
-            # Sort measurements by age
-            measurements.sort(key=lambda x: x.get('umur_bulan', 0))
-
-            # Use child-specific gender, fallback to default if not provided
-            child_gender = child_data.get('jenis_kelamin') or default_gender
-            logger.info(f"Processing {child_data['nama_anak']} with gender: {child_gender}")
-
-            # Validate measurements
-            validated_measurements = self._validate_child_measurements(
-                measurements, reference_data, child_gender
-            )
-
-            # Save measurements
-            for measurement in validated_measurements:
-                measurement_record = Measurement(
-                    job_id=job_id,
-                    child_id=child.id,
-                    bulan=measurement['bulan'],
-                    tgl_ukur=measurement.get('tgl_ukur'),
-                    umur_bulan=measurement.get('umur_bulan'),
-                    berat=measurement.get('berat'),
-                    tinggi=measurement.get('tinggi'),
-                    cara_ukur=measurement.get('cara_ukur'),
-                    status_berat=measurement['status_berat'],
-                    status_tinggi=measurement['status_tinggi'],
-                    validasi_input=measurement['validasi_input'],
-                    keterangan=measurement.get('keterangan', '')
-                )
-                db.add(measurement_record)
-
-                # Update counters
-                total_records += 1
-                validation_status = measurement['validasi_input']
-                if validation_status == 'OK':
-                    valid_count += 1
-                elif validation_status == 'ERROR':
-                    error_count += 1
-                elif validation_status == 'WARNING':
-                    warning_count += 1
-
-                if measurement['status_berat'] == 'Missing' or measurement['status_tinggi'] == 'Missing':
-                    missing_count += 1
-
-        db.commit()
+        child_results = []
+
+        for children, measurements in field_data:
+            # Validate the whole batch at once, rows come back sorted by child then age
+            validated = self.validator.validate(children, measurements, reference_data, default_gender)
+
+            children_count += len(children)
+            # Short write transaction per batch, so small writes of other jobs and
+            # lease renewals are not held up for the whole analysis
+            with serialized_writer():
+                self._save_batch(db, job_id, children, validated)
+                self._ensure_lease(db, lease_check)
+                db.commit()
+            if collect_report_data:
+                child_results.extend(build_child_results(children, validated))
+
+            # Update counters
+            counts = ReportCounts(*(total + batch for total, batch in zip(counts, count_statuses(validated))))
+            missing_count += int(((validated['status_berat'] == 'Missing') |
+                                  (validated['status_tinggi'] == 'Missing')).sum())
 
         summary = {
-            'total_anak': len(field_data),
-            'total_records': total_records,
-            'valid': valid_count,
-            'warning': warning_count,
-            'error': error_count,
+            'total_anak': children_count,
+            'total_records': counts.total_records,
+            'valid': counts.valid,
+            'warning': counts.warning,
+            'error': counts.error,
             'missing': missing_count
         }
 
         return {
             'summary': summary,
-            'children_count': len(field_data),
-            'total_measurements': total_records
+            'children_count': children_count,
+            'total_measurements': counts.total_records,
+            'report_data': ReportData(tuple(child_results), counts) if collect_report_data else None
         }
 
-    def _validate_child_measurements(self, measurements: List[Dict],
-                                   reference_data: Dict, default_gender: str) -> List[Dict]:
+    def _save_batch(self, db: Session, job_id: str, children: pd.DataFrame, validated: pd.DataFrame):
         """
-        Validate measurements for a single child using hierarchy rules
+        Insert a batch of children and their validated measurements in bulk: COPY on
+        PostgreSQL, executemany statements elsewhere (see bulk_loader.py). Child ids come
+        back in row order, so no per-child flush is needed. Committing is left to the caller.
         """
-        validated_measurements = []
-        previous_height = None
-        previous_weight = None
-        previous_age = None
-
-        for i, measurement in enumerate(measurements):
-            validated = measurement.copy()
-
-            # Extract values
-            current_age = measurement.get('umur_bulan')
-            current_weight = measurement.get('berat')
-            current_height = measurement.get('tinggi')
-
-            # Default gender (since we don't have gender info in field data)
-            gender = default_gender
-
-            # Initialize validation status
-            validation_status = 'OK'
-            keterangan = []
-            validated['validasi_input'] = 'OK'  # Initialize in the dict
-
-            # Rule 1: Missing Data Check
-            if current_weight is None and current_height is None:
-                validated['status_berat'] = 'Missing'
-                validated['status_tinggi'] = 'Missing'
-                validated['validasi_input'] = 'WARNING'
-                validated['keterangan'] = 'Data berat dan tinggi kosong'
-                validated_measurements.append(validated)
-                continue
-            elif current_weight is None:
-                validated['status_berat'] = 'Missing'
-                validated['validasi_input'] = 'WARNING'
-                keterangan.append('Data berat kosong')
-            elif current_height is None:
-                validated['status_tinggi'] = 'Missing'
-                validated['validasi_input'] = 'WARNING'
-                keterangan.append('Data tinggi kosong')
-
-            # Rule 2: Missing month gap check
-            if previous_age is not None and current_age is not None:
-                age_gap = current_age - previous_age
-                if age_gap > 1:
-                    validated['validasi_input'] = 'WARNING'
-                    keterangan.append(f'Gap data: tidak ada pengukuran untuk {age_gap-1} bulan')
-
-            # Rule 3: Height consistency check
-            if previous_height is not None and current_height is not None:
-                if current_height < previous_height:
-                    validated['validasi_input'] = 'ERROR'
-                    keterangan.append(f'Tinggi menurun: {previous_height}cm → {current_height}cm')
-                elif validated['validasi_input'] == 'OK':
-                    # Check for unusual height increase (more than 5cm in one month)
-                    if current_height - previous_height > 5:
-                        validated['validasi_input'] = 'WARNING'
-                        keterangan.append(f'Tinggi naik drastis: +{current_height - previous_height:.1f}cm')
-
-            # Rule 4: Weight anomaly check
-            if previous_weight is not None and current_weight is not None:
-                weight_change = current_weight - previous_weight
-                if weight_change < 0:  # Weight loss
-                    loss_percentage = abs(weight_change) / previous_weight * 100
-                    if loss_percentage > 10:
-                        validated['validasi_input'] = 'WARNING'
-                        keterangan.append(f'Anomali berat: turun {loss_percentage:.1f}%')
-
-            # Rule 5: Rationality vs reference table
-            if current_age is not None:
-                # Validate weight
-                if current_weight is not None:
-                    weight_range = reference_data.get(f'BB_{gender}', {}).get(current_age)
-                    if weight_range:
-                        if not (weight_range[0] <= current_weight <= weight_range[1]):
-                            validated['status_berat'] = 'Tidak Ideal'
-                            if validated['validasi_input'] == 'OK':
-                                validated['validasi_input'] = 'WARNING'
-                                keterangan.append(f'Berat tidak ideal: {current_weight}kg (rentang: {weight_range[0]}-{weight_range[1]}kg)')
-                        else:
-                            validated['status_berat'] = 'Ideal'
-                    else:
-                        validated['status_berat'] = 'Ideal'  # No reference data
-
-                # Validate height
-                if current_height is not None:
-                    height_range = reference_data.get(f'PB_{gender}', {}).get(current_age)
-                    if height_range:
-                        if not (height_range[0] <= current_height <= height_range[1]):
-                            validated['status_tinggi'] = 'Tidak Ideal'
-                            if validated['validasi_input'] == 'OK':
-                                validated['validasi_input'] = 'WARNING'
-                                keterangan.append(f'Tinggi tidak ideal: {current_height}cm (rentang: {height_range[0]}-{height_range[1]}cm)')
-                        else:
-                            validated['status_tinggi'] = 'Ideal'
-                    else:
-                        validated['status_tinggi'] = 'Ideal'  # No reference data
-
-            # Set default statuses if not already set
-            if 'status_berat' not in validated:
-                validated['status_berat'] = 'Ideal' if current_weight is not None else 'Missing'
-            if 'status_tinggi' not in validated:
-                validated['status_tinggi'] = 'Ideal' if current_height is not None else 'Missing'
-
-            # Final validation status override priority: ERROR > WARNING > OK
-            if 'ERROR' in str(validated.get('keterangan', '')):
-                validated['validasi_input'] = 'ERROR'
-            elif 'Anomali berat' in str(validated.get('keterangan', '')) or 'tidak ideal' in str(validated.get('keterangan', '')).lower():
-                if validated['validasi_input'] == 'OK':
-                    validated['validasi_input'] = 'WARNING'
-
-            # Set keterangan
-            validated['keterangan'] = '; '.join(keterangan) if keterangan else ''
-
-            # Update previous values for next iteration
-            if current_height is not None:
-                previous_height = current_height
-            if current_weight is not None:
-                previous_weight = current_weight
-            if current_age is not None:
-                previous_age = current_age
-
-            validated_measurements.append(validated)
-
-        return validated_measurements
-
-    async def _generate_reports(self, job_id: str, validation_results: Dict, default_gender: str) -> Dict[str, str]:
+        if children.empty:
+            return
+
+        # Plain column lists with None for missing values
+        child_ids = insert_returning_ids(db, Child.__table__, {
+            'job_id': [job_id] * len(children),
+            'nik': self._plain_list(children['nik']),
+            'nama': self._plain_list(children['nama_anak']),
+            'jenis_kelamin': self._plain_list(children['jenis_kelamin']),
+            'tgl_lahir': self._plain_list(children['tgl_lahir'])
+        })
+
+        if validated.empty:
+            return
+
+        columns = ['bulan', 'tgl_ukur', 'umur_bulan', 'berat', 'tinggi', 'cara_ukur',
+                   'status_berat', 'status_tinggi', 'validasi_input', 'keterangan']
+        insert_rows(db, Measurement.__table__, {
+            'job_id': [job_id] * len(validated),
+            'child_id': pd.Series(child_ids, index=children.index).reindex(validated['child_index']).tolist(),
+            **{column: self._plain_list(validated[column]) for column in columns}
+        })
+
+    @staticmethod
+    def _plain_list(series: pd.Series) -> list:
+        return series.astype(object).where(series.notna(), None).tolist()
+
+    def _start_reports(self, job_id: str, validation_results: Dict, default_gender: str) -> Dict[str, asyncio.Task]:
         """
-        Generate Excel, text, and context reports
+        Start rendering the Excel, text, and context reports in parallel.
+        Each task returns (path, seconds taken).
         """
-        # Get data from database
-        db = SessionLocal()
-        try:
-            measurements = db.query(Measurement).join(Child).filter(
-                Measurement.job_id == job_id
-            ).all()
-
-            # Generate Excel report
-            excel_path = self.file_manager.get_output_path(job_id, "hasil_validasi.xlsx")
-            await self.report_generator.generate_excel_report(
-                excel_path, measurements, default_gender
-            )
-
-            # Generate text report (existing report - keep as is)
-            text_path = self.file_manager.get_output_path(job_id, "laporan_validasi.txt")
-            await self.report_generator.generate_text_report(
-                text_path, measurements, validation_results['summary']
-            )
-
-            # Generate comprehensive context report for AI
-            context_path = self.file_manager.get_output_path(job_id, "konteks_lengkap.txt")
-            await self.report_generator.generate_context_report(
-                context_path, measurements, validation_results['summary'], default_gender
-            )
-
-            return {
-                'excel': excel_path,
-                'text': text_path,
-                'context': context_path
-            }
-
-        finally:
-            db.close()
\ No newline at end of file
+        report_data = validation_results['report_data']
+        summary = validation_results['summary']
+
+        excel_path = self.file_manager.get_output_path(job_id, "hasil_validasi.xlsx")
+        text_path = self.file_manager.get_output_path(job_id, "laporan_validasi.txt")
+        # Comprehensive context report for AI
+        context_path = self.file_manager.get_output_path(job_id, "konteks_lengkap.txt")
+
+        return {
+            'excel': asyncio.create_task(self._timed(
+                excel_path, self.report_generator.generate_excel_report(excel_path, report_data, default_gender)
+            )),
+            'text': asyncio.create_task(self._timed(
+                text_path, self.report_generator.generate_text_report(text_path, report_data, summary)
+            )),
+            'context': asyncio.create_task(self._timed(
+                context_path, self.report_generator.generate_context_report(context_path, report_data, summary, default_gender)
+            ))
+        }
+
+    async def _timed(self, path: str, render) -> Tuple[str, float]:
+        start = time.perf_counter()
+        await render
+        return path, round(time.perf_counter() - start, 3)
\ No newline at end of file
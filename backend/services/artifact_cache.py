@@ -0,0 +1,154 @@
+import os
+import time
+import uuid
+import shutil
+import asyncio
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCache:
+    """
+    Report artifacts rendered on first download (REPORT_RENDER_MODE=lazy).
+
+    Files live in <FILE_STORE>/cache/artifacts/<job_id>/<filename>. Rendering is
+    single-flight within the process: concurrent requests for the same artifact await
+    one render. Files are written under a temporary name and renamed into place, so
+    readers never see a partial file. After each render the cache is trimmed: files not
+    used (atime) for ARTIFACT_CACHE_MAX_AGE_HOURS are removed, then the least recently used
+    ones until the total size fits ARTIFACT_CACHE_MAX_MB.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_mb: Optional[float] = None,
+                 max_age_hours: Optional[float] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(settings.FILE_STORE) / "cache" / "artifacts"
+        self.max_bytes = int((max_mb if max_mb is not None else settings.ARTIFACT_CACHE_MAX_MB) * 1024 * 1024)
+        self.max_age_seconds = (max_age_hours if max_age_hours is not None else settings.ARTIFACT_CACHE_MAX_AGE_HOURS) * 3600
+        self._renders: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+
+    def path_for(self, job_id: str, filename: str) -> Path:
+        return self.cache_dir / job_id / filename
+
+    async def get_or_render(self, job_id: str, filename: str, render: Callable[[str], Any]) -> str:
+        """
+        Path of the cached artifact, calling render(path) on a worker thread on a miss
+        """
+        path = self.path_for(job_id, filename)
+        key = (job_id, filename)
+
+        task = self._renders.get(key)
+        if task is None:
+            if path.exists():
+                self.hits += 1
+                self._touch(path)
+                return str(path)
+
+            self.misses += 1
+            task = asyncio.create_task(self._render(path, render))
+            self._renders[key] = task
+            task.add_done_callback(lambda _: self._renders.pop(key, None))
+        else:
+            self.hits += 1
+
+        # Shielded: a client that disconnects does not cancel the render for the others
+        await asyncio.shield(task)
+        return str(path)
+
+    def evict(self) -> int:
+        """
+        Remove expired artifacts, then least recently used ones over the size limit.
+        Returns the number of removed files.
+        """
+        now = time.time()
+        files = []
+        for path in self.cache_dir.glob('*/*'):
+            if path.name.startswith('.') or path.name.endswith('.tmp'):
+                continue  # Being written
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+
+        removed = 0
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in sorted(files, key=lambda item: item[0]):
+            if now - mtime <= self.max_age_seconds and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                removed += 1
+                total -= size
+            except FileNotFoundError:
+                pass
+
+        for job_dir in self.cache_dir.glob('*'):
+            try:
+                job_dir.rmdir()  # Only succeeds when empty
+            except OSError:
+                pass
+
+        if removed:
+            logger.info(f"Evicted {removed} cached artifact(s), {total / (1024 * 1024):.1f} MB left")
+        return removed
+
+    def invalidate(self, job_id: str):
+        """
+        Drop all cached artifacts of a job. Renders still running for it cannot be
+        stopped, their files are dropped when they finish.
+        """
+        job_dir = self.cache_dir / job_id
+        rendering = [task for (render_job_id, _), task in self._renders.items() if render_job_id == job_id]
+        if rendering:
+            # Removing the directory now would fail the renders writing into it
+            asyncio.gather(*rendering, return_exceptions=True).add_done_callback(
+                lambda _: shutil.rmtree(job_dir, ignore_errors=True)
+            )
+        else:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'renders': self.renders,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    async def _render(self, path: Path, render: Callable[[str], Any]):
+        start = time.perf_counter()
+        await asyncio.to_thread(self._render_file, path, render)
+        self.renders += 1
+        logger.info(f"Rendered {path} in {time.perf_counter() - start:.2f}s")
+        await asyncio.to_thread(self.evict)
+
+    def _render_file(self, path: Path, render: Callable[[str], Any]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.{path.name}")
+        try:
+            render(str(tmp_path))
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _touch(self, path: Path):
+        try:
+            # atime is the last use for eviction; mtime stays the render time, which
+            # identifies the content for ETags and precompressed variants
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except OSError:
+            pass
+
+
+# Global instance
+artifact_cache = ArtifactCache()
@@ -0,0 +1,92 @@
+"""
+Bulk inserts of job results: COPY on PostgreSQL (psycopg2), executemany statements elsewhere.
+Rows are passed column-wise, {column name: list of values}, None for NULL.
+"""
+import io
+from datetime import date
+from typing import Dict, List, Sequence
+
+from sqlalchemy import Table, insert, text
+from sqlalchemy.orm import Session
+
+# COPY text format: backslash escapes, \N for NULL
+_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def uses_copy(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def insert_rows(db: Session, table: Table, columns: Dict[str, Sequence]):
+    """
+    Insert the rows in the session's transaction
+    """
+    if not _row_count(columns):
+        return
+    if uses_copy(db):
+        copy_rows(db, table, columns)
+    else:
+        db.execute(insert(table), _row_dicts(columns))
+
+
+def insert_returning_ids(db: Session, table: Table, columns: Dict[str, Sequence]) -> List[int]:
+    """
+    Insert the rows and return their ids in row order. With COPY the ids are taken from
+    the table's sequence first, since COPY returns nothing.
+    """
+    count = _row_count(columns)
+    if not count:
+        return []
+    if uses_copy(db):
+        ids = db.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count) ORDER BY 1"),
+            {'table': table.name, 'count': count}
+        ).scalars().all()
+        copy_rows(db, table, {'id': ids, **columns})
+        return ids
+    return db.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), _row_dicts(columns)
+    ).scalars().all()
+
+
+def copy_rows(db: Session, table: Table, columns: Dict[str, Sequence]):
+    """
+    COPY the rows into table over the session's connection, inside its transaction
+    """
+    fields = [_copy_values(values) for values in columns.values()]
+    data = '\n'.join(map('\t'.join, zip(*fields))) + '\n'
+
+    connection = db.connection().connection.driver_connection
+    with connection.cursor() as cursor:
+        # Sent as UTF-8 bytes, whatever the connection's client encoding
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (ENCODING 'UTF8')",
+            io.BytesIO(data.encode('utf-8'))
+        )
+
+
+def _copy_values(values: Sequence) -> List[str]:
+    """
+    One column in COPY text format. Each distinct value is converted once: most columns
+    repeat a few values (months, statuses, the job id).
+    """
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, str):
+        convert = lambda value: str(value).translate(_ESCAPES)
+    elif isinstance(sample, date):
+        convert = date.isoformat  # Datetimes (pandas Timestamps) too, as their date
+    else:
+        convert = str
+    converted = {value: convert(value) for value in set(values) if value is not None}
+    converted[None] = '\\N'
+    return [converted[value] for value in values]
+
+
+def _row_count(columns: Dict[str, Sequence]) -> int:
+    return len(next(iter(columns.values()), ()))
+
+
+def _row_dicts(columns: Dict[str, Sequence]) -> List[Dict]:
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
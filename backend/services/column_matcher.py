@@ -0,0 +1,115 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnMatcher:
+    """
+    Classifies sheet headers into standard column names.
+    Month patterns are compiled once, and results are memoized by the tuple of
+    header strings so uploads of a known template skip matching entirely.
+    """
+
+    def __init__(self, month_names: Sequence[str], subcolumns: Sequence[str], max_templates: int = 128):
+        self.month_names = list(month_names)
+        self.subcolumns = list(subcolumns)
+        self.max_templates = max_templates
+
+        # (month, subcol) -> compiled pattern, in the precedence order of the original scan
+        self._month_patterns: List[Tuple[str, str, re.Pattern]] = [
+            (month, subcol, re.compile(f"{month}_{subcol}|{month}.*{subcol}|{subcol}.*{month}", re.IGNORECASE))
+            for month in self.month_names
+            for subcol in self.subcolumns
+        ]
+
+        self._templates: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def classify(self, columns: Sequence[Any]) -> Dict[Any, str]:
+        """
+        Map raw header names to standard column names
+        (nama_anak, NIK, TANGGAL LAHIR, JENIS_KELAMIN, MONTH_SUBCOLUMN)
+        """
+        return dict(self._memoized(('classify', tuple(columns)), lambda: self._classify(columns)))
+
+    def find_columns(self, columns: Sequence[Any], candidates: Dict[str, Sequence[str]]) -> Dict[str, Optional[Any]]:
+        """
+        Resolve each key of candidates to the first column matching one of its names
+        (case-insensitive, exact or contained)
+        """
+        key = ('find', tuple(columns), tuple((name, tuple(options)) for name, options in candidates.items()))
+        return dict(self._memoized(key, lambda: self._find_columns(columns, candidates)))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'templates': len(self._templates),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def _memoized(self, key: tuple, compute) -> Any:
+        with self._lock:
+            if key in self._templates:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return self._templates[key]
+
+        result = compute()
+
+        with self._lock:
+            self.misses += 1
+            self._templates[key] = result
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        return result
+
+    def _classify(self, columns: Sequence[Any]) -> Dict[Any, str]:
+        column_mapping = {}
+
+        for col in columns:
+            col_clean = str(col).strip().upper()
+
+            # Identity columns - flexible matching of common variations
+            if 'NAMA' in col_clean and ('ANAK' in col_clean or 'BALITA' in col_clean or 'BAYI' in col_clean):
+                column_mapping[col] = 'nama_anak'
+            elif col_clean in ['NIK', 'NO_NIK', 'NOMOR_NIK']:
+                column_mapping[col] = 'NIK'
+            elif 'TANGGAL' in col_clean and ('LAHIR' in col_clean or 'LHR' in col_clean):
+                column_mapping[col] = 'TANGGAL LAHIR'
+            elif 'JENIS' in col_clean and ('KELAMIN' in col_clean or 'SEX' in col_clean or 'GENDER' in col_clean):
+                column_mapping[col] = 'JENIS_KELAMIN'
+
+            # Month columns: a pattern can only match when both words occur in the header,
+            # so the compiled patterns run only for those pairs. The last match wins.
+            months = [month for month in self.month_names if month in col_clean]
+            if not months:
+                continue
+            subcols = [subcol for subcol in self.subcolumns if subcol in col_clean]
+            for month, subcol, pattern in self._month_patterns:
+                if month in months and subcol in subcols and pattern.search(col_clean):
+                    column_mapping[col] = f"{month}_{subcol}"
+
+        return column_mapping
+
+    def _find_columns(self, columns: Sequence[Any], candidates: Dict[str, Sequence[str]]) -> Dict[str, Optional[Any]]:
+        cleaned = [(col, str(col).strip().lower()) for col in columns]
+        found = {}
+        for name, options in candidates.items():
+            found[name] = None
+            for target in options:
+                target_lower = target.lower()
+                target_clean = target_lower.strip()
+                match = next((col for col, col_clean in cleaned
+                              if col_clean == target_clean or target_lower in col_clean), None)
+                if match is not None:
+                    found[name] = match
+                    break
+        return found
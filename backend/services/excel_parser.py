@@ -1,9 +1,15 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterator
+from itertools import chain
 import logging
 from datetime import datetime
-import re
+from openpyxl import load_workbook
+
+from config import settings
+from .reference_cache import reference_cache
+from .column_matcher import ColumnMatcher
+from .growth_reference import GrowthReference
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +24,49 @@ class ExcelParser:
     # Required sub-columns for each month
     REQUIRED_SUBCOLUMNS = ["TANGGALUKUR", "UMUR", "BERAT", "TINGGI", "CARAUKUR"]
 
+    # Number of leading rows considered when looking for the header row
+    HEADER_SCAN_ROWS = 4
+
+    # Text formats accepted for date cells, tried in order
+    DATE_FORMATS = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y']
+
+    # Day zero of Excel serial dates
+    EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+    # Accepted header names for each reference column, in order of preference
+    REFERENCE_COLUMNS = {
+        'age': ['Umur', 'Age', 'Bulan', 'usia'],
+        'male_weight': ['BB Ideal (L)', 'BB L', 'Berat Ideal L', 'BB Laki-laki'],
+        'male_height': ['PB Ideal (L)', 'TB Ideal (L)', 'PB L', 'Tinggi Ideal L', 'PB Laki-laki'],
+        'female_weight': ['BB Ideal (P)', 'BB P', 'Berat Ideal P', 'BB Perempuan'],
+        'female_height': ['PB Ideal (P)', 'TB Ideal (P)', 'PB P', 'Tinggi Ideal P', 'PB Perempuan']
+    }
+
+    # Accepted JENIS_KELAMIN values (upper-cased) and their normalized form
+    GENDER_VALUES = {'L': 'L', 'P': 'P', 'LAKI-LAKI': 'L', 'PEREMPUAN': 'P'}
+
     def __init__(self):
-        self.growth_reference = {}
+        self.growth_reference = GrowthReference({})
 
-    def parse_reference_file(self, file_path: str) -> Dict[str, Dict[int, Tuple[float, float]]]:
+    def parse_reference_file(self, file_path: str) -> GrowthReference:
         """
         Parse growth reference Excel file
-        Returns: {
+        Returns: GrowthReference compiled from {
             'BB_L': {age: (min_weight, max_weight)},
             'PB_L': {age: (min_height, max_height)},
             'BB_P': {age: (min_weight, max_weight)},
             'PB_P': {age: (min_height, max_height)}
         }
+        Parsed tables are cached by file content, so repeated analyses against the
+        same master reference skip the workbook entirely.
+        """
+        reference = reference_cache.get_or_parse(file_path, self._parse_reference_workbook)
+        self.growth_reference = reference
+        return reference
+
+    def _parse_reference_workbook(self, file_path: str) -> GrowthReference:
+        """
+        Read and parse the reference workbook itself (uncached)
         """
         try:
             df = pd.read_excel(file_path)
@@ -41,30 +78,14 @@ class ExcelParser:
             }
 
             # Expected columns in reference file (flexible matching)
-            column_mapping = {}
+            column_mapping = column_matcher.find_columns(list(df.columns), self.REFERENCE_COLUMNS)
 
-            # Map age column
-            age_col = self._find_column(df, ['Umur', 'Age', 'Bulan', 'usia'])
-            if not age_col:
+            if not column_mapping['age']:
                 raise ValueError("Kolom umur/age tidak ditemukan di file referensi. Harap ada kolom 'Umur' atau 'Age'")
-            column_mapping['age'] = age_col
-
-            # Map gender-specific columns
-            male_weight_col = self._find_column(df, ['BB Ideal (L)', 'BB L', 'Berat Ideal L', 'BB Laki-laki'])
-            male_height_col = self._find_column(df, ['PB Ideal (L)', 'TB Ideal (L)', 'PB L', 'Tinggi Ideal L', 'PB Laki-laki'])
-            female_weight_col = self._find_column(df, ['BB Ideal (P)', 'BB P', 'Berat Ideal P', 'BB Perempuan'])
-            female_height_col = self._find_column(df, ['PB Ideal (P)', 'TB Ideal (P)', 'PB P', 'Tinggi Ideal P', 'PB Perempuan'])
 
-            if not all([male_weight_col, male_height_col, female_weight_col, female_height_col]):
+            if not all(column_mapping[key] for key in ['male_weight', 'male_height', 'female_weight', 'female_height']):
                 raise ValueError("Kolom referensi tidak lengkap. Pastikan ada kolom untuk BB/TB ideal Laki-laki dan Perempuan")
 
-            column_mapping.update({
-                'male_weight': male_weight_col,
-                'male_height': male_height_col,
-                'female_weight': female_weight_col,
-                'female_height': female_height_col
-            })
-
             logger.info(f"Reference column mapping: {column_mapping}")
 
             for _, row in df.iterrows():
@@ -90,9 +111,8 @@ class ExcelParser:
                 if height_p_range:
                     reference['PB_P'][age] = height_p_range
 
-            self.growth_reference = reference
             logger.info(f"Parsed reference data for ages 0-{max(reference['BB_L'].keys())} months")
-            return reference
+            return GrowthReference(reference)
 
         except Exception as e:
             logger.error(f"Error parsing reference file: {str(e)}")
@@ -113,216 +133,315 @@ class ExcelParser:
         except:
             return None
 
-    def parse_field_data(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_field_data(self, file_path: str, layout: Optional[Dict[str, Any]] = None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
         """
-        Parse field data Excel file and convert to long format
-        Returns: List of measurement records
+        Parse field data Excel file and convert to long format.
+        The sheet is loaded once; pass the layout returned by a previous parse of the
+        same template to skip header detection.
+        Returns: (children, measurements, layout), see _reshape_field_data and _detect_layout
         """
         try:
-            # Try to read Excel with header detection
-            df = pd.read_excel(file_path)
+            # Load the sheet once, the header row is located in this in-memory copy
+            raw = pd.read_excel(file_path, header=None)
+
+            if layout is None:
+                layout = self._detect_layout([raw.iloc[i].tolist() for i in range(min(self.HEADER_SCAN_ROWS, len(raw)))])
+            self._check_required_columns(layout)
+
+            df = raw.iloc[layout['header_row'] + 1:].reset_index(drop=True)
+            df.columns = layout['columns']
+            df = df.rename(columns=layout['column_mapping'])
             logger.info(f"Loaded field data with {len(df)} rows and {len(df.columns)} columns")
 
-            # If all columns are 'Unnamed' or contain month names, try skipping rows
-            if all('Unnamed' in str(col) or any(month in str(col) for month in self.MONTH_NAMES) for col in df.columns):
-                logger.info("Detected potential header issues, trying to find proper header row...")
-
-                # Try reading with different header rows
-                for header_row in [1, 2, 3]:
-                    try:
-                        df_test = pd.read_excel(file_path, header=header_row)
-                        if not all('Unnamed' in str(col) for col in df_test.columns):
-                            df = df_test
-                            logger.info(f"Found proper header at row {header_row}")
-                            break
-                    except:
-                        continue
-
-            # Find header row and normalize column names
-            df, column_mapping = self._normalize_column_names(df)
-
-            # Validate required columns (after mapping)
-            required_identity_cols = ['nama_anak']
-            missing_identity = [col for col in required_identity_cols if col not in column_mapping.values()]
-            if missing_identity:
-                # Provide helpful error message
-                found_cols = list(df.columns)
-                raise ValueError(
-                    f"Kolom wajib tidak ditemukan: {missing_identity}. "
-                    f"Kolom yang ditemukan: {found_cols}. "
-                    f"Pastikan ada kolom nama anak (contoh: 'Nama Anak', 'nama_anak', 'NAMA BALITA', dll)."
-                )
-
-            # Convert to long format
-            long_data = []
-
-            for index, row in df.iterrows():
-                # Extract and validate gender from JENIS_KELAMIN column
-                gender = None
-                if 'JENIS_KELAMIN' in df.columns and pd.notna(row.get('JENIS_KELAMIN')):
-                    gender_value = str(row['JENIS_KELAMIN']).strip().upper()
-                    if gender_value in ['L', 'P', 'LAKI-LAKI', 'PEREMPUAN']:
-                        # Normalize gender values
-                        if gender_value in ['LAKI-LAKI']:
-                            gender_value = 'L'
-                        elif gender_value in ['PEREMPUAN']:
-                            gender_value = 'P'
-                        gender = gender_value
-                        logger.info(f"Detected gender for {row['nama_anak']}: {gender}")
-                    else:
-                        logger.warning(f"Invalid gender value '{row['JENIS_KELAMIN']}' for {row['nama_anak']}")
-                else:
-                    logger.info(f"No JENIS_KELAMIN column found or empty for {row['nama_anak']}, will use default gender")
-
-                child_data = {
-                    'nama_anak': str(row['nama_anak']).strip(),
-                    'nik': str(row.get('NIK', '')).strip() if pd.notna(row.get('NIK')) else None,
-                    'jenis_kelamin': gender,  # Add gender data
-                    'tgl_lahir': self._parse_date(row.get('TANGGAL LAHIR')) if 'TANGGAL LAHIR' in df.columns else None,
-                    'measurements': []
-                }
-
-                # Process each month
-                for month in self.MONTH_NAMES:
-                    month_measurements = self._extract_month_measurements(row, month, column_mapping)
-                    if month_measurements:
-                        child_data['measurements'].extend(month_measurements)
-
-                long_data.append(child_data)
-
-            logger.info(f"Parsed {len(long_data)} children with total measurements: {sum(len(c['measurements']) for c in long_data)}")
-            return long_data
+            children, measurements, date_failures = self._reshape_field_data(df)
+            logger.info(f"Parsed {len(children)} children with total measurements: {len(measurements)}")
+            self._log_date_failures(date_failures)
+            return children, measurements, layout
 
         except Exception as e:
             logger.error(f"Error parsing field data: {str(e)}")
             raise
 
-    def _normalize_column_names(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    def iter_field_data(self, file_path: str, layout: Optional[Dict[str, Any]] = None,
+                        chunk_rows: Optional[int] = None) -> Tuple[Dict[str, Any], Iterator[Tuple[pd.DataFrame, pd.DataFrame]]]:
         """
-        Normalize column names to standard format
+        Stream field data from a read-only workbook in bounded chunks of rows.
+        Header detection and column validation happen eagerly, so format errors
+        are raised here rather than on the first iteration.
+        Returns: (layout, generator of (children, measurements) tables, one pair per chunk)
         """
-        # Create column mapping
-        column_mapping = {}
-
-        # Find and map identity columns
-        for col in df.columns:
-            col_clean = str(col).strip().upper()
-
-            # Map common variations - more flexible matching
-            if 'NAMA' in col_clean and ('ANAK' in col_clean or 'ANAK' in col_clean or 'BALITA' in col_clean or 'BAYI' in col_clean):
-                column_mapping[col] = 'nama_anak'
-            elif col_clean in ['NIK', 'NO_NIK', 'NOMOR_NIK']:
-                column_mapping[col] = 'NIK'
-            elif 'TANGGAL' in col_clean and ('LAHIR' in col_clean or 'LHR' in col_clean):
-                column_mapping[col] = 'TANGGAL LAHIR'
-            elif 'JENIS' in col_clean and ('KELAMIN' in col_clean or 'SEX' in col_clean or 'GENDER' in col_clean):
-                column_mapping[col] = 'JENIS_KELAMIN'
-
-        # Debug: print all columns found
-        logger.info(f"Columns found in Excel file: {list(df.columns)}")
-        logger.info(f"Identity column mapping: {column_mapping}")
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
 
-        # Find and map month columns
-        for month in self.MONTH_NAMES:
-            for subcol in self.REQUIRED_SUBCOLUMNS:
-                pattern = f"{month}_{subcol}|{month}.*{subcol}|{subcol}.*{month}"
+            # Buffer the first rows so the header row can be detected like parse_field_data does
+            head_rows = []
+            for values in rows:
+                if any(v is not None for v in values):
+                    head_rows.append(values)
+                if len(head_rows) == self.HEADER_SCAN_ROWS:
+                    break
 
-                for col in df.columns:
-                    col_clean = str(col).strip().upper()
-                    if re.search(pattern, col_clean, re.IGNORECASE):
-                        standard_name = f"{month}_{subcol}"
-                        column_mapping[col] = standard_name
+            if layout is None:
+                layout = self._detect_layout(head_rows)
+            self._check_required_columns(layout)
 
-        # Apply mapping
-        df_normalized = df.rename(columns=column_mapping)
+        except Exception as e:
+            wb.close()
+            logger.error(f"Error parsing field data: {str(e)}")
+            raise
 
-        logger.info(f"Column mapping: {column_mapping}")
-        return df_normalized, column_mapping
+        return layout, self._iter_field_chunks(wb, head_rows[layout['header_row'] + 1:], rows, layout,
+                                               chunk_rows or settings.STREAMING_CHUNK_ROWS)
 
-    def _extract_month_measurements(self, row: pd.Series, month: str, column_mapping: Dict[str, str]) -> List[Dict[str, Any]]:
+    def _detect_layout(self, head_rows: List[Any]) -> Dict[str, Any]:
         """
-        Extract measurements for a specific month
+        Pick the header row among the first rows of the sheet.
+        Each candidate is scored by how many of its cells match the identity and
+        month/subcolumn vocabulary; a row containing the child name column wins
+        over rows that only carry month banners.
+        Returns: {'header_row': int, 'columns': [...], 'column_mapping': {raw: standard}}
         """
-        measurements = []
-        prefix = f"{month}_"
+        best = None
+        for index, values in enumerate(head_rows):
+            columns = self._header_names(values)
+            column_mapping = self._map_columns(columns)
+            score = len(column_mapping)
+            if 'nama_anak' in column_mapping.values():
+                score += len(columns)
+            if best is None or score > best[0]:
+                best = (score, index, columns, column_mapping)
+
+        if best is None:
+            return {'header_row': 0, 'columns': [], 'column_mapping': {}}
+
+        score, header_row, columns, column_mapping = best
+        if header_row:
+            logger.info(f"Found proper header at row {header_row}")
+        logger.info(f"Columns found in Excel file: {columns}")
+        logger.info(f"Column mapping: {column_mapping}")
 
-        # Check if this month has any data
-        has_data = False
-        for subcol in self.REQUIRED_SUBCOLUMNS:
-            col_name = prefix + subcol
-            if col_name in row and pd.notna(row[col_name]):
-                has_data = True
-                break
-
-        if not has_data:
-            return measurements
-
-        measurement = {
-            'bulan': month,
-            'tgl_ukur': self._parse_date(row.get(prefix + 'TANGGALUKUR')),
-            'umur_bulan': self._parse_int(row.get(prefix + 'UMUR')),
-            'berat': self._parse_float(row.get(prefix + 'BERAT')),
-            'tinggi': self._parse_float(row.get(prefix + 'TINGGI')),
-            'cara_ukur': str(row.get(prefix + 'CARAUKUR', '')).strip() if pd.notna(row.get(prefix + 'CARAUKUR')) else None
+        return {
+            'header_row': header_row,
+            'columns': columns,
+            'column_mapping': column_mapping
         }
 
-        measurements.append(measurement)
-        return measurements
-
-    def _parse_date(self, date_value) -> Optional[datetime]:
+    def _check_required_columns(self, layout: Dict[str, Any]):
         """
-        Parse date from various Excel date formats
+        Validate required columns (after mapping)
         """
-        if pd.isna(date_value):
-            return None
-
+        required_identity_cols = ['nama_anak']
+        missing_identity = [col for col in required_identity_cols if col not in layout['column_mapping'].values()]
+        if missing_identity:
+            # Provide helpful error message
+            raise ValueError(
+                f"Kolom wajib tidak ditemukan: {missing_identity}. "
+                f"Kolom yang ditemukan: {layout['columns']}. "
+                f"Pastikan ada kolom nama anak (contoh: 'Nama Anak', 'nama_anak', 'NAMA BALITA', dll)."
+            )
+
+    def _iter_field_chunks(self, wb, buffered_rows: List[tuple], rows: Iterator[tuple],
+                           layout: Dict[str, Any], chunk_rows: int) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Yield (children, measurements) tables for the data rows of a read-only worksheet
+        """
+        columns = layout['columns']
+        width = len(columns)
         try:
-            if isinstance(date_value, datetime):
-                return date_value
-            elif isinstance(date_value, str):
-                # Try common date formats
-                formats = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y']
-                for fmt in formats:
-                    try:
-                        return datetime.strptime(date_value.strip(), fmt)
-                    except ValueError:
-                        continue
-            elif isinstance(date_value, (int, float)):
-                # Excel numeric date
-                return datetime.fromtimestamp(datetime(1899, 12, 30).timestamp() + date_value * 86400)
-        except:
-            pass
+            date_failures = {}
+            offset = 0
+            total_measurements = 0
+            chunk = []
+            for values in chain(buffered_rows, rows):
+                if all(v is None for v in values):
+                    continue
+                values = tuple(values[:width]) + (None,) * (width - len(values))
+                chunk.append(values)
+                if len(chunk) == chunk_rows:
+                    children, measurements, failures = self._chunk_to_tables(chunk, layout, offset)
+                    self._add_date_failures(date_failures, failures)
+                    offset += len(children)
+                    total_measurements += len(measurements)
+                    chunk = []
+                    yield children, measurements
+
+            if chunk:
+                children, measurements, failures = self._chunk_to_tables(chunk, layout, offset)
+                self._add_date_failures(date_failures, failures)
+                offset += len(children)
+                total_measurements += len(measurements)
+                yield children, measurements
+
+            logger.info(f"Streamed {offset} children with total measurements: {total_measurements}")
+            self._log_date_failures(date_failures)
+        finally:
+            wb.close()
+
+    def _chunk_to_tables(self, chunk: List[tuple], layout: Dict[str, Any],
+                         offset: int) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+        # Keep cell values as read (no numeric upcasting), like the full-sheet load
+        df = pd.DataFrame(chunk, columns=layout['columns'], dtype=object)
+        df = df.rename(columns=layout['column_mapping'])
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        return self._reshape_field_data(df)
+
+    def _header_names(self, values: tuple) -> List[Any]:
+        """
+        Column names for a header row, following pandas conventions for blanks and duplicates
+        """
+        names = []
+        seen = {}
+        for index, value in enumerate(values):
+            blank = value is None or (isinstance(value, float) and np.isnan(value))
+            name = f"Unnamed: {index}" if blank else value
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        return names
+
+    def _reshape_field_data(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+        """
+        Convert the wide sheet (one row per child, MONTH_SUBCOLUMN columns) into two tables.
+        children: one row per child, indexed like df, with nama_anak, nik, jenis_kelamin, tgl_lahir
+        measurements: one row per child and month with data, ordered by child then month, with
+            child_index, bulan, tgl_ukur (datetime64), umur_bulan (Int64), berat, tinggi (float64), cara_ukur
+        date failures: {column: number of unparseable date cells}, only columns with failures
+        """
+        date_failures = {}
+        # Columns mapped to the same standard name keep their first occurrence
+        df = df.loc[:, ~df.columns.duplicated()]
+
+        children = pd.DataFrame(index=df.index)
+        children['nama_anak'] = df['nama_anak'].astype(str).str.strip()
+        children['nik'] = self._clean_text(df['NIK']) if 'NIK' in df.columns else None
+        children['jenis_kelamin'] = self._normalize_gender(df['JENIS_KELAMIN']) if 'JENIS_KELAMIN' in df.columns else None
+        if 'TANGGAL LAHIR' in df.columns:
+            children['tgl_lahir'], failed = self._parse_date_column(df['TANGGAL LAHIR'])
+            self._add_date_failures(date_failures, {'TANGGAL LAHIR': failed})
+        else:
+            children['tgl_lahir'] = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+
+        # Stack every month block into one long frame: row-major over (child, month)
+        n_children, n_months = len(df), len(self.MONTH_NAMES)
+        raw = {}
+        for subcol in self.REQUIRED_SUBCOLUMNS:
+            block = df.reindex(columns=[f"{month}_{subcol}" for month in self.MONTH_NAMES])
+            raw[subcol] = pd.Series(block.to_numpy(dtype=object).ravel())
+
+        has_data = np.zeros(n_children * n_months, dtype=bool)
+        for values in raw.values():
+            has_data |= values.notna().to_numpy()
+
+        child_index = np.repeat(df.index.to_numpy(), n_months)[has_data]
+        bulan = np.tile(np.array(self.MONTH_NAMES, dtype=object), n_children)[has_data]
+        raw = {subcol: values[has_data].reset_index(drop=True) for subcol, values in raw.items()}
+
+        tgl_ukur, failed = self._parse_date_column(raw['TANGGALUKUR'])
+        if failed:
+            unparsed = raw['TANGGALUKUR'].notna() & tgl_ukur.isna()
+            per_month = pd.Series(bulan[unparsed.to_numpy()]).value_counts()
+            self._add_date_failures(date_failures, {f"{month}_TANGGALUKUR": int(count) for month, count in per_month.items()})
+
+        umur = pd.to_numeric(raw['UMUR'], errors='coerce')
+        measurements = pd.DataFrame({
+            'child_index': child_index,
+            'bulan': bulan,
+            'tgl_ukur': tgl_ukur,
+            'umur_bulan': np.trunc(umur).astype('Int64'),
+            'berat': pd.to_numeric(raw['BERAT'], errors='coerce').astype('float64'),
+            'tinggi': pd.to_numeric(raw['TINGGI'], errors='coerce').astype('float64'),
+            'cara_ukur': self._clean_text(raw['CARAUKUR'])
+        })
+
+        return children, measurements, date_failures
+
+    def _clean_text(self, values: pd.Series) -> pd.Series:
+        """
+        Stripped string values, None where the cell is empty
+        """
+        return values.astype(str).str.strip().astype(object).where(values.notna(), None)
 
-        return None
+    def _normalize_gender(self, values: pd.Series) -> pd.Series:
+        """
+        Normalize JENIS_KELAMIN values to 'L'/'P', None for empty or unrecognized values
+        """
+        cleaned = values.astype(str).str.strip().str.upper()
+        gender = cleaned.map(self.GENDER_VALUES).astype(object)
+        gender = gender.where(values.notna() & gender.notna(), None)
 
-    def _parse_int(self, value) -> Optional[int]:
+        invalid = values.notna() & gender.isna()
+        if invalid.any():
+            logger.warning(f"Invalid gender value for {int(invalid.sum())} children: {sorted(set(values[invalid].astype(str)))[:10]}")
+        logger.info(f"Detected gender for {int(gender.notna().sum())} of {len(values)} children, others use default gender")
+        return gender
+
+    def _map_columns(self, columns: List[Any]) -> Dict[Any, str]:
         """
-        Parse integer value
+        Map raw header names to standard column names
         """
-        if pd.isna(value):
-            return None
-        try:
-            return int(float(value))
-        except:
-            return None
+        return column_matcher.classify(columns)
 
-    def _parse_float(self, value) -> Optional[float]:
+    def _parse_date_column(self, values: pd.Series) -> Tuple[pd.Series, int]:
         """
-        Parse float value
+        Parse a column of Excel date cells in bulk.
+        Accepts datetime cells, Excel serial numbers and '%d/%m/%Y', '%Y-%m-%d' or
+        '%d-%m-%Y' strings; anything else becomes NaT.
+        Returns: (datetime64 series, number of non-empty cells that could not be parsed)
         """
-        if pd.isna(value):
-            return None
-        try:
-            return float(value)
-        except:
-            return None
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values, 0
+
+        parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        present = values.notna()
+        if not present.any():
+            return parsed, 0
+
+        kinds = values[present].map(type)
+
+        is_datetime = kinds.map(lambda kind: issubclass(kind, datetime))
+        if is_datetime.any():
+            parsed[is_datetime[is_datetime].index] = pd.to_datetime(values[is_datetime[is_datetime].index], errors='coerce')
+
+        # Excel serial numbers count days from 1899-12-30
+        is_number = kinds.map(lambda kind: issubclass(kind, (int, float, np.number)))
+        if is_number.any():
+            index = is_number[is_number].index
+            parsed[index] = pd.to_datetime(values[index].astype('float64'), unit='D',
+                                           origin=self.EXCEL_EPOCH, errors='coerce')
+
+        is_text = kinds.map(lambda kind: issubclass(kind, str))
+        if is_text.any():
+            remaining = values[is_text[is_text].index].str.strip()
+            for fmt in self.DATE_FORMATS:
+                converted = pd.to_datetime(remaining, format=fmt, errors='coerce')
+                parsed[converted.dropna().index] = converted.dropna()
+                remaining = remaining[converted.isna()]
+                if remaining.empty:
+                    break
+
+        failed = int((present & parsed.isna()).sum())
+        return parsed, failed
+
+    @staticmethod
+    def _log_date_failures(date_failures: Dict[str, int]):
+        if date_failures:
+            logger.warning(f"Unparseable date cells per column: {date_failures}")
+
+    @staticmethod
+    def _add_date_failures(date_failures: Dict[str, int], failures: Dict[str, int]):
+        for column, count in failures.items():
+            if count:
+                date_failures[column] = date_failures.get(column, 0) + count
 
     def get_reference_range(self, gender: str, measurement_type: str, age: int) -> Optional[Tuple[float, float]]:
         """
         Get reference range for specific gender, measurement type, and age
         """
-        key = f"{measurement_type}_{gender}"
-        return self.growth_reference.get(key, {}).get(age)
+        return self.growth_reference.get_range(measurement_type, gender, age)
 
     def validate_growth_data(self, gender: str, age: int, weight: Optional[float], height: Optional[float]) -> Tuple[str, str]:
         """
@@ -344,15 +463,6 @@ class ExcelParser:
 
         return weight_status, height_status
 
-    def _find_column(self, df: pd.DataFrame, possible_names: List[str]) -> Optional[str]:
-        """
-        Find column name from list of possible names (case-insensitive)
-        """
-        for target in possible_names:
-            for col in df.columns:
-                if str(col).strip().lower() == target.lower().strip():
-                    return col
-                # Also check if target is contained in column name
-                if target.lower() in str(col).strip().lower():
-                    return col
-        return None
\ No newline at end of file
+
+# Shared across parser instances so known templates are matched once per process
+column_matcher = ColumnMatcher(ExcelParser.MONTH_NAMES, ExcelParser.REQUIRED_SUBCOLUMNS)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, Tuple
+
+from config import settings
+from .worker_stats import worker_stats
+
+logger = logging.getLogger(__name__)
+
+# GrowthAnalyzer of the current worker process, created on its first job
+_worker_analyzer = None
+
+
+def _init_worker():
+    """
+    Worker process initializer: same logging setup as the API process
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('sitracking.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def _lease_check(lease: Optional[Tuple[int, str]]) -> Optional[Callable[[], bool]]:
+    """
+    Callable telling whether the (queue entry id, worker id) lease is still held
+    """
+    if lease is None:
+        return None
+    from .job_queue import job_queue
+    entry_id, worker_id = lease
+    return lambda: job_queue.holds_lease(entry_id, worker_id)
+
+
+def _run_analysis_in_worker(job_id: str, lapangan_path: str, referensi_path: str, default_gender: str,
+                            lease: Optional[Tuple[int, str]] = None):
+    """
+    Entry point executed inside a worker process
+    """
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        from .analyzer import GrowthAnalyzer
+        _worker_analyzer = GrowthAnalyzer()
+
+    try:
+        asyncio.run(_worker_analyzer.run_analysis(
+            job_id=job_id,
+            lapangan_path=lapangan_path,
+            referensi_path=referensi_path,
+            default_gender=default_gender,
+            lease_check=_lease_check(lease)
+        ))
+    finally:
+        worker_stats.publish()
+
+
+class AnalysisExecutor:
+    """
+    Runs analysis jobs away from the API event loop.
+
+    Backends (ANALYSIS_EXECUTOR setting):
+      - process: bounded process pool with ANALYSIS_WORKERS workers
+      - queue: only enqueue in the persistent job queue, separate worker.py processes run the jobs
+      - inline: run on the event loop in the API process (development only)
+    """
+
+    BACKENDS = ('process', 'queue', 'inline')
+
+    def __init__(self, backend: Optional[str] = None, workers: Optional[int] = None):
+        self.backend = (backend or settings.ANALYSIS_EXECUTOR).lower()
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"Unknown ANALYSIS_EXECUTOR '{self.backend}', expected one of {self.BACKENDS}")
+        self.workers = max(1, workers or settings.ANALYSIS_WORKERS)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._analyzer = None
+
+    async def submit(self, job_id: str, lapangan_path: str, referensi_path: str, default_gender: str):
+        """
+        Run one analysis and wait for it without blocking the event loop.
+        Failures are already recorded on the job by run_analysis, so they are only logged here.
+        """
+        try:
+            await self.run(job_id, lapangan_path, referensi_path, default_gender)
+        except BrokenProcessPool as e:
+            logger.error(f"Analysis worker for job {job_id} died: {str(e)}")
+            self._mark_failed(job_id, "Terjadi kesalahan saat memproses data: proses analisis berhenti tiba-tiba")
+        except Exception as e:
+            logger.error(f"Analysis job {job_id} failed: {str(e)}")
+
+    async def run(self, job_id: str, lapangan_path: str, referensi_path: str, default_gender: str,
+                  lease: Optional[Tuple[int, str]] = None):
+        """
+        Run one analysis to completion, raising its error.
+        lease: (queue entry id, worker id) of a queued job, results are only saved while it is held
+        """
+        if self.backend == 'queue':
+            raise RuntimeError("Queue backend runs analyses in worker.py, not in the API process")
+
+        if self.backend == 'inline':
+            try:
+                await self._get_analyzer().run_analysis(
+                    job_id=job_id,
+                    lapangan_path=lapangan_path,
+                    referensi_path=referensi_path,
+                    default_gender=default_gender,
+                    lease_check=_lease_check(lease)
+                )
+            finally:
+                worker_stats.publish()
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self._get_pool(), _run_analysis_in_worker,
+                job_id, lapangan_path, referensi_path, default_gender, lease
+            )
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise
+
+    def shutdown(self):
+        """
+        Stop the worker processes, waiting for running analyses to finish
+        """
+        if self._pool is not None:
+            logger.info("Shutting down analysis workers")
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: workers must not inherit the API's open database connections or threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            logger.info(f"Started analysis process pool with {self.workers} workers")
+        return self._pool
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _get_analyzer(self):
+        if self._analyzer is None:
+            from .analyzer import GrowthAnalyzer
+            self._analyzer = GrowthAnalyzer()
+        return self._analyzer
+
+    def _mark_failed(self, job_id: str, error_message: str):
+        from database import unit_of_work
+        from models import Job
+        try:
+            with unit_of_work(new=True) as db:
+                job = db.query(Job).filter(Job.id == job_id).first()
+                if job and job.status == "processing":
+                    job.update_status("failed", error_message)
+                    db.commit()
+        except Exception as e:
+            logger.error(f"Could not mark job {job_id} as failed: {str(e)}")
+
+
+# Global instance
+analysis_executor = AnalysisExecutor()
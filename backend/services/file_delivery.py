@@ -0,0 +1,265 @@
+import os
+import gzip
+import uuid
+import shutil
+import hashlib
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+import logging
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileDelivery:
+    """
+    Serves report artifacts, which never change once written.
+
+    - Strong ETag from a SHA-256 of the content, 304 on a matching If-None-Match
+    - Single byte ranges (Range / If-Range), e.g. resuming on slow links
+    - Text artifacts precompressed once to <file>.zst / <file>.gz next to the file,
+      picked by Accept-Encoding; zstd only when the zstandard package is installed
+
+    A variant carries the mtime of the file it was compressed from and is rebuilt when
+    the file is rewritten. Hashes are remembered per (path, size, mtime).
+
+    With DOWNLOAD_DELIVERY=x-accel, files under FILE_STORE are handed to nginx with an
+    X-Accel-Redirect to X_ACCEL_REDIRECT_PREFIX + their path in the store; nginx then
+    serves them with sendfile, its own validators and ranges, and the .gz variant
+    (gzip_static). Files outside the store are still served by the app.
+    """
+
+    COMPRESSIBLE_SUFFIXES = ('.txt',)
+    ENCODINGS = ('zstd', 'gzip')
+    VARIANT_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+    CHUNK_SIZE = 256 * 1024
+    HASH_CACHE_SIZE = 256
+
+    def __init__(self):
+        self._hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self.encodings = tuple(encoding for encoding in self.ENCODINGS
+                               if encoding != 'zstd' or self._zstd_available())
+
+    async def response(self, request: Request, path: str, filename: str, media_type: str) -> Response:
+        """
+        Response for a GET of the artifact at path, honouring the request's conditional,
+        range and encoding headers
+        """
+        stat = await run_in_threadpool(os.stat, path)
+
+        location = self.accel_location(path) if settings.DOWNLOAD_DELIVERY == "x-accel" else None
+        if location:
+            if path.endswith(self.COMPRESSIBLE_SUFFIXES) and 'gzip' in self.encodings:
+                await run_in_threadpool(self.variant, path, stat, 'gzip')
+            return Response(media_type=media_type, headers={
+                'X-Accel-Redirect': location,
+                'Content-Disposition': self.content_disposition(filename),
+                'Cache-Control': 'no-cache'
+            })
+
+        digest = await run_in_threadpool(self.content_hash, path, stat)
+
+        headers = {'Cache-Control': 'no-cache', 'Accept-Ranges': 'bytes'}
+        encoding = None
+        if path.endswith(self.COMPRESSIBLE_SUFFIXES):
+            headers['Vary'] = 'Accept-Encoding'
+            encoding = self.choose_encoding(request.headers.get('accept-encoding', ''))
+
+        serve_path = path
+        etag = f'"{digest}"'
+        if encoding:
+            serve_path = await run_in_threadpool(self.variant, path, stat, encoding)
+            etag = f'"{digest}-{encoding}"'
+            headers['Content-Encoding'] = encoding
+        headers['ETag'] = etag
+
+        if self._etag_matches(request.headers.get('if-none-match'), etag):
+            headers.pop('Content-Encoding', None)
+            return Response(status_code=304, headers=headers)
+
+        range_header = request.headers.get('range')
+        if_range = request.headers.get('if-range')
+        if range_header and (if_range is None or if_range.strip() == etag):
+            size = stat.st_size if serve_path == path else os.path.getsize(serve_path)
+            try:
+                byte_range = self.parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+            if byte_range:
+                start, end = byte_range
+                headers.update({
+                    'Content-Range': f'bytes {start}-{end}/{size}',
+                    'Content-Length': str(end - start + 1),
+                    'Content-Disposition': self.content_disposition(filename)
+                })
+                # Sync iterator, read on the threadpool
+                return StreamingResponse(self._iter_range(serve_path, start, end), status_code=206,
+                                         media_type=media_type, headers=headers)
+
+        return FileResponse(path=serve_path, filename=filename, media_type=media_type, headers=headers)
+
+    def accel_location(self, path: str) -> Optional[str]:
+        """
+        Internal nginx location of a file in the file store, None for files outside it
+        """
+        root = os.path.realpath(settings.FILE_STORE)
+        real_path = os.path.realpath(path)
+        if os.path.commonpath([root, real_path]) != root:
+            return None
+        relative = os.path.relpath(real_path, root).replace(os.sep, '/')
+        return settings.X_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(relative)
+
+    @staticmethod
+    def content_disposition(filename: str) -> str:
+        quoted = quote(filename)
+        if quoted != filename:
+            return f"attachment; filename*=utf-8''{quoted}"
+        return f'attachment; filename="{filename}"'
+
+    def content_hash(self, path: str, stat: Optional[os.stat_result] = None) -> str:
+        stat = stat or os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                    sha.update(chunk)
+            digest = sha.hexdigest()[:32]
+            self._hashes[key] = digest
+            if len(self._hashes) > self.HASH_CACHE_SIZE:
+                self._hashes.popitem(last=False)
+        else:
+            self._hashes.move_to_end(key)
+        return digest
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """
+        Best available content coding acceptable to the client, None for identity
+        """
+        accepted = {}
+        for part in accept_encoding.split(','):
+            coding, _, params = part.strip().partition(';')
+            quality = 1.0
+            for param in params.split(';'):
+                name, _, value = param.strip().partition('=')
+                if name == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if coding:
+                accepted[coding.lower()] = quality
+
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def variant(self, path: str, stat: os.stat_result, encoding: str) -> str:
+        """
+        Path of the precompressed variant of path, written if missing or outdated
+        """
+        variant_path = path + self.VARIANT_SUFFIXES[encoding]
+        try:
+            if os.stat(variant_path).st_mtime_ns == stat.st_mtime_ns:
+                return variant_path
+        except FileNotFoundError:
+            pass
+
+        tmp_path = f"{variant_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                if encoding == 'zstd':
+                    import zstandard
+                    with zstandard.ZstdCompressor(level=10).stream_writer(dst, closefd=False) as writer:
+                        shutil.copyfileobj(src, writer, self.CHUNK_SIZE)
+                else:
+                    with gzip.GzipFile(fileobj=dst, mode='wb', compresslevel=9, mtime=0) as writer:
+                        shutil.copyfileobj(src, writer, self.CHUNK_SIZE)
+            os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(tmp_path, variant_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        logger.info(f"Precompressed {path} ({encoding}): {stat.st_size} -> {os.path.getsize(variant_path)} bytes")
+        return variant_path
+
+    def remove_variants(self, path: str):
+        for suffix in self.VARIANT_SUFFIXES.values():
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+        """
+        (start, end) of a single "bytes=" range, inclusive. None when the header is
+        ignored (malformed or several ranges, the full file is sent).
+        """
+        unit, _, spec = header.partition('=')
+        if unit.strip().lower() != 'bytes' or ',' in spec:
+            return None
+        first, sep, last = spec.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if first == '':
+                length = int(last)
+                if length <= 0 or size == 0:
+                    raise RangeNotSatisfiable()
+                return max(0, size - length), size - 1
+            start = int(first)
+            end = int(last) if last else size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            raise RangeNotSatisfiable()
+        if end < start:
+            return None
+        return start, min(end, size - 1)
+
+    @staticmethod
+    def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+        # Weak comparison, as required for If-None-Match
+        return '*' in candidates or etag in (c[2:] if c.startswith('W/') else c for c in candidates)
+
+    def _iter_range(self, path: str, start: int, end: int) -> Iterator[bytes]:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(self.CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    @staticmethod
+    def _zstd_available() -> bool:
+        try:
+            import zstandard  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+# Global instance
+file_delivery = FileDelivery()
@@ -0,0 +1,105 @@
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class GrowthReference:
+    """
+    Growth reference ranges compiled into dense arrays indexed by age in months.
+    minimum/maximum have shape (metric, gender, age) with NaN where the reference
+    has no range for that age, so single lookups are plain array indexing and whole
+    measurement columns can be range-checked with one vectorized comparison.
+    """
+
+    METRICS = ('BB', 'PB')
+    GENDERS = ('L', 'P')
+
+    def __init__(self, ranges: Dict[str, Dict[int, Tuple[float, float]]]):
+        """
+        ranges: {'BB_L': {age: (min, max)}, 'PB_L': ..., 'BB_P': ..., 'PB_P': ...}
+        """
+        ages = [age for table in ranges.values() for age in table if age >= 0]
+        self.max_age = max(ages) if ages else -1
+
+        shape = (len(self.METRICS), len(self.GENDERS), self.max_age + 1)
+        self.minimum = np.full(shape, np.nan)
+        self.maximum = np.full(shape, np.nan)
+
+        for key, table in ranges.items():
+            metric, gender = key.split('_')
+            m, g = self.METRICS.index(metric), self.GENDERS.index(gender)
+            for age, (low, high) in table.items():
+                if age >= 0:
+                    self.minimum[m, g, age] = low
+                    self.maximum[m, g, age] = high
+
+    def get_range(self, metric: str, gender: str, age: Optional[Union[int, float]]) -> Optional[Tuple[float, float]]:
+        """
+        (min, max) for one metric ('BB' or 'PB'), gender ('L' or 'P') and age, or None
+        """
+        if age is None or metric not in self.METRICS or gender not in self.GENDERS:
+            return None
+        if isinstance(age, float) and np.isnan(age):
+            return None
+        if age != int(age) or not 0 <= age <= self.max_age:
+            return None
+
+        m, g = self.METRICS.index(metric), self.GENDERS.index(gender)
+        low = self.minimum[m, g, int(age)]
+        if np.isnan(low):
+            return None
+        return float(low), float(self.maximum[m, g, int(age)])
+
+    def lookup(self, metric: str, genders: np.ndarray, ages: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized get_range: minimum and maximum arrays aligned with genders/ages,
+        NaN where there is no range (unknown gender, missing or out-of-table age)
+        """
+        genders = np.asarray(genders, dtype=object)
+        ages = np.asarray(ages, dtype='float64')
+
+        low = np.full(len(ages), np.nan)
+        high = np.full(len(ages), np.nan)
+        if metric not in self.METRICS or self.max_age < 0:
+            return low, high
+
+        gender_index = np.full(len(ages), -1)
+        for g, gender in enumerate(self.GENDERS):
+            gender_index[genders == gender] = g
+
+        with np.errstate(invalid='ignore'):
+            valid = (gender_index >= 0) & (ages >= 0) & (ages <= self.max_age) & (ages == np.floor(ages))
+
+        m = self.METRICS.index(metric)
+        age_index = ages[valid].astype(int)
+        low[valid] = self.minimum[m, gender_index[valid], age_index]
+        high[valid] = self.maximum[m, gender_index[valid], age_index]
+        return low, high
+
+    def in_range(self, metric: str, genders: np.ndarray, ages: np.ndarray,
+                 values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Range-check a whole column of values.
+        Returns: (has_range, within) boolean arrays; within is False where has_range is False
+        """
+        low, high = self.lookup(metric, genders, ages)
+        values = np.asarray(values, dtype='float64')
+        has_range = ~np.isnan(low)
+        with np.errstate(invalid='ignore'):
+            within = has_range & (low <= values) & (values <= high)
+        return has_range, within
+
+    def to_dict(self) -> Dict[str, Dict[int, Tuple[float, float]]]:
+        """
+        Inverse of the constructor, {'BB_L': {age: (min, max)}, ...}
+        """
+        ranges = {}
+        for m, metric in enumerate(self.METRICS):
+            for g, gender in enumerate(self.GENDERS):
+                ages = np.flatnonzero(~np.isnan(self.minimum[m, g]))
+                ranges[f"{metric}_{gender}"] = {
+                    int(age): (float(self.minimum[m, g, age]), float(self.maximum[m, g, age])) for age in ages
+                }
+        return ranges
@@ -0,0 +1,223 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select, update, delete, func
+
+from config import settings
+from database import serialized_writer, unit_of_work
+from models import Job, JobQueueEntry, Child, Measurement
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimedJob(NamedTuple):
+    entry_id: int
+    job_id: str
+    attempts: int
+    max_attempts: int
+    worker_id: str  # Lease owner, only this worker may complete or fail the entry
+
+
+class JobQueue:
+    """
+    Persistent analysis queue stored in the application database.
+
+    Workers claim queued entries with a time-limited lease and keep renewing it while
+    the analysis runs. A lease that expires (worker crashed or container restarted) is
+    reclaimed and the job is queued again with exponential backoff until max_attempts.
+    Queue writes take the serialized writer lock, so on SQLite a lease renewal gets its
+    turn between two bulk insert batches instead of polling on the busy timeout.
+    """
+
+    def __init__(self, lease_seconds: Optional[int] = None, max_attempts: Optional[int] = None,
+                 backoff_seconds: Optional[float] = None):
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else settings.JOB_RETRY_BACKOFF_SECONDS
+
+    def enqueue(self, job_id: str) -> int:
+        """
+        Add a job to the queue, returns the queue entry id
+        """
+        with serialized_writer(), unit_of_work(new=True) as db:
+            now = datetime.utcnow()
+            entry = JobQueueEntry(
+                job_id=job_id,
+                status="queued",
+                attempts=0,
+                max_attempts=self.max_attempts,
+                available_at=now
+            )
+            db.add(entry)
+            db.commit()
+            logger.info(f"Queued job {job_id}")
+            return entry.id
+
+    def claim(self, worker_id: str) -> Optional[ClaimedJob]:
+        """
+        Atomically take the oldest available entry and lease it to worker_id
+        """
+        now = datetime.utcnow()
+        candidate = (
+            select(JobQueueEntry.id)
+            .where(JobQueueEntry.status == "queued", JobQueueEntry.available_at <= now)
+            .order_by(JobQueueEntry.available_at, JobQueueEntry.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            update(JobQueueEntry)
+            .where(JobQueueEntry.id == candidate, JobQueueEntry.status == "queued")
+            .values(
+                status="running",
+                attempts=JobQueueEntry.attempts + 1,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                updated_at=now
+            )
+            .returning(JobQueueEntry.id, JobQueueEntry.job_id, JobQueueEntry.attempts, JobQueueEntry.max_attempts)
+        )
+
+        with serialized_writer(), unit_of_work(new=True) as db:
+            row = db.execute(statement).first()
+            db.commit()
+
+        if row is None:
+            return None
+        logger.info(f"Worker {worker_id} claimed job {row.job_id} (attempt {row.attempts}/{row.max_attempts})")
+        return ClaimedJob(row.id, row.job_id, row.attempts, row.max_attempts, worker_id)
+
+    def renew(self, entry_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease of a running entry. Returns False if the worker lost the lease.
+        """
+        now = datetime.utcnow()
+        with serialized_writer(), unit_of_work(new=True) as db:
+            result = db.execute(
+                update(JobQueueEntry)
+                .where(*self._lease_held(entry_id, worker_id))
+                .values(lease_expires_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            )
+            db.commit()
+            return result.rowcount == 1
+
+    def holds_lease(self, entry_id: int, worker_id: str) -> bool:
+        """
+        Whether worker_id still owns the running entry
+        """
+        with unit_of_work(new=True) as db:
+            return db.execute(
+                select(JobQueueEntry.id).where(*self._lease_held(entry_id, worker_id))
+            ).first() is not None
+
+    def complete(self, claimed: ClaimedJob) -> bool:
+        """
+        Mark an entry as successfully finished.
+        Returns False (and changes nothing) if the worker no longer holds the lease.
+        """
+        with serialized_writer(), unit_of_work(new=True) as db:
+            if not self._release(db, claimed, status="done"):
+                return False
+            db.commit()
+            return True
+
+    def fail(self, claimed: ClaimedJob, error: str, retry: bool, expired_before: Optional[datetime] = None) -> bool:
+        """
+        Record a failed attempt. Retryable failures are queued again with backoff
+        while attempts remain; otherwise the entry and the job are marked failed.
+        Returns False (and changes nothing) if the worker no longer holds the lease.
+        expired_before: only fail the entry if its lease expired before this time (reclaim)
+        """
+        with serialized_writer(), unit_of_work(new=True) as db:
+            if retry and claimed.attempts < claimed.max_attempts:
+                delay = self._backoff(claimed.attempts)
+                released = self._release(db, claimed, expired_before, status="queued", last_error=error,
+                                         available_at=datetime.utcnow() + timedelta(seconds=delay))
+                if not released:
+                    return False
+                self._reset_job(db, claimed.job_id)
+                db.commit()
+                logger.warning(f"Job {claimed.job_id} failed (attempt {claimed.attempts}), retrying in {delay:.0f}s: {error}")
+                return True
+
+            if not self._release(db, claimed, expired_before, status="failed", last_error=error):
+                return False
+            job = db.query(Job).filter(Job.id == claimed.job_id).first()
+            if job and job.status != "failed":
+                job.update_status("failed", error)
+            db.commit()
+            logger.error(f"Job {claimed.job_id} failed permanently after {claimed.attempts} attempt(s): {error}")
+            return True
+
+    def reclaim_expired(self) -> int:
+        """
+        Release entries whose lease expired, so crashed workers' jobs run again.
+        Returns the number of reclaimed entries.
+        """
+        now = datetime.utcnow()
+        with unit_of_work(new=True) as db:
+            expired: List[JobQueueEntry] = db.query(JobQueueEntry).filter(
+                JobQueueEntry.status == "running",
+                JobQueueEntry.lease_expires_at < now
+            ).all()
+            claims = [ClaimedJob(entry.id, entry.job_id, entry.attempts, entry.max_attempts, entry.lease_owner)
+                      for entry in expired]
+
+        # Guarded by owner and expiry, so a lease renewed in the meantime is left alone
+        reclaimed = sum(
+            self.fail(claimed, "Lease kedaluwarsa (worker berhenti saat memproses)", retry=True, expired_before=now)
+            for claimed in claims
+        )
+        if reclaimed:
+            logger.info(f"Reclaimed {reclaimed} job(s) with expired leases")
+        return reclaimed
+
+    def stats(self) -> Dict[str, int]:
+        with unit_of_work(new=True) as db:
+            rows = db.query(JobQueueEntry.status, func.count(JobQueueEntry.id)).group_by(JobQueueEntry.status).all()
+        counts = {status: 0 for status in ("queued", "running", "done", "failed")}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _backoff(self, attempts: int) -> float:
+        return self.backoff_seconds * (2 ** (attempts - 1))
+
+    def _lease_held(self, entry_id: int, worker_id: str) -> tuple:
+        return (JobQueueEntry.id == entry_id,
+                JobQueueEntry.status == "running",
+                JobQueueEntry.lease_owner == worker_id)
+
+    def _release(self, db, claimed: ClaimedJob, expired_before: Optional[datetime] = None, **values) -> bool:
+        """
+        Move a running entry out of its lease if claimed.worker_id still holds it
+        """
+        conditions = self._lease_held(claimed.entry_id, claimed.worker_id)
+        if expired_before is not None:
+            conditions += (JobQueueEntry.lease_expires_at < expired_before,)
+        result = db.execute(
+            update(JobQueueEntry)
+            .where(*conditions)
+            .values(lease_owner=None, lease_expires_at=None, updated_at=datetime.utcnow(), **values)
+        )
+        if result.rowcount != 1:
+            db.rollback()
+            logger.warning(f"Worker {claimed.worker_id} no longer holds the lease on job {claimed.job_id}, result ignored")
+            return False
+        return True
+
+    def _reset_job(self, db, job_id: str):
+        """
+        Remove partial results of a failed attempt so the retry starts clean
+        """
+        db.execute(delete(Measurement).where(Measurement.job_id == job_id))
+        db.execute(delete(Child).where(Child.job_id == job_id))
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if job:
+            job.status = "processing"
+            job.error_message = None
+            job.updated_at = datetime.utcnow()
+
+# Global instance
+job_queue = JobQueue()
@@ -0,0 +1,177 @@
+import io
+import csv
+from typing import Iterator, List, Sequence
+import logging
+
+from sqlalchemy import select
+
+from database import unit_of_work
+from models import Child, Measurement
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExportUnavailableError(ValueError):
+    """Requested export format cannot be produced here (pyarrow missing)"""
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object collecting what a pyarrow writer emits, drained after each batch
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class MeasurementExporter:
+    """
+    Columnar export of children + measurements with their validation flags, one row per
+    measurement, for analysis in notebooks.
+
+    Rows are read job by job in chunks of EXPORT_CHUNK_ROWS by measurement id (keyset),
+    each chunk in its own short query, so memory stays bounded and no read transaction is held open
+    while the response streams. Each chunk becomes a Parquet row group, an Arrow IPC
+    record batch or a block of CSV lines. pyarrow is only imported for Parquet/Arrow.
+    """
+
+    FORMATS = {
+        'parquet': ('application/vnd.apache.parquet', 'parquet'),
+        'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+        'csv': ('text/csv; charset=utf-8', 'csv')
+    }
+
+    COLUMNS = (
+        ('job_id', Measurement.job_id, 'string'),
+        ('child_id', Child.id, 'int64'),
+        ('nik', Child.nik, 'string'),
+        ('nama', Child.nama, 'string'),
+        ('tgl_lahir', Child.tgl_lahir, 'date32'),
+        ('jenis_kelamin', Child.jenis_kelamin, 'string'),
+        ('measurement_id', Measurement.id, 'int64'),
+        ('bulan', Measurement.bulan, 'string'),
+        ('tgl_ukur', Measurement.tgl_ukur, 'date32'),
+        ('umur_bulan', Measurement.umur_bulan, 'int64'),
+        ('berat', Measurement.berat, 'float64'),
+        ('tinggi', Measurement.tinggi, 'float64'),
+        ('cara_ukur', Measurement.cara_ukur, 'string'),
+        ('status_berat', Measurement.status_berat, 'string'),
+        ('status_tinggi', Measurement.status_tinggi, 'string'),
+        ('validasi_input', Measurement.validasi_input, 'string'),
+        ('keterangan', Measurement.keterangan, 'string'),
+    )
+
+    def __init__(self, chunk_rows: int = None):
+        self.chunk_rows = chunk_rows or settings.EXPORT_CHUNK_ROWS
+
+    def check_format(self, fmt: str):
+        """
+        Raise before streaming starts if fmt cannot be exported
+        """
+        if fmt not in self.FORMATS:
+            raise ExportUnavailableError(f"Format ekspor tidak dikenal: {fmt}. Pilih parquet, arrow atau csv")
+        if fmt != 'csv':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ExportUnavailableError(f"Ekspor {fmt} membutuhkan paket pyarrow")
+
+    def iter_export(self, job_ids: Sequence[str], fmt: str) -> Iterator[bytes]:
+        if fmt == 'csv':
+            return self._iter_csv(job_ids)
+        return self._iter_arrow(job_ids, fmt)
+
+    def iter_chunks(self, job_ids: Sequence[str]) -> Iterator[List[tuple]]:
+        """
+        Rows of the given jobs, job by job in measurement id order, chunk_rows at a time
+        """
+        pending = []
+        for job_id in job_ids:
+            for rows in self._iter_job_rows(job_id):
+                pending.extend(rows)
+                while len(pending) >= self.chunk_rows:
+                    yield pending[:self.chunk_rows]
+                    pending = pending[self.chunk_rows:]
+        if pending:
+            yield pending
+
+    def _iter_job_rows(self, job_id: str) -> Iterator[List[tuple]]:
+        # One job at a time: seeks in ix_measurements_job_id (job_id, id), no sort
+        query = (
+            select(*(column.label(name) for name, column, _ in self.COLUMNS))
+            .join(Child, Measurement.child_id == Child.id)
+            .where(Measurement.job_id == job_id)
+            .order_by(Measurement.id)
+            .limit(self.chunk_rows)
+        )
+        last_id = 0
+        while True:
+            with unit_of_work(new=True) as db:
+                rows = db.execute(query.where(Measurement.id > last_id)).all()
+            if rows:
+                yield rows
+            if len(rows) < self.chunk_rows:
+                return
+            last_id = rows[-1].measurement_id
+
+    def _iter_csv(self, job_ids: Sequence[str]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([name for name, _, _ in self.COLUMNS])
+        for rows in self.iter_chunks(job_ids):
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')  # Header of an empty export
+
+    def _iter_arrow(self, job_ids: Sequence[str], fmt: str) -> Iterator[bytes]:
+        import pyarrow as pa
+
+        schema = pa.schema([(name, getattr(pa, type_name)()) for name, _, type_name in self.COLUMNS])
+        sink = _ChunkSink()
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(sink, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+
+        try:
+            for rows in self.iter_chunks(job_ids):
+                columns = list(zip(*rows))
+                batch = pa.record_batch(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                )
+                if fmt == 'parquet':
+                    writer.write_batch(batch, row_group_size=len(rows))
+                else:
+                    writer.write_batch(batch)
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+
+# Global instance
+measurement_exporter = MeasurementExporter()
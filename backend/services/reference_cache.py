@@ -0,0 +1,166 @@
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of the cached reference changes so stale files are ignored
+CACHE_FORMAT_VERSION = 2
+
+
+class ReferenceCache:
+    """
+    LRU cache of parsed growth reference tables keyed by a hash of the file content.
+    Entries are kept in memory and persisted to disk as pickle files so that a
+    restarted worker does not need to re-parse the reference workbook.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(settings.FILE_STORE) / "cache" / "references"
+        self.max_entries = max_entries or settings.REFERENCE_CACHE_SIZE
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        # file_path -> (mtime_ns, size, digest), avoids re-hashing unchanged files
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_parse(self, file_path: str, parse: Callable[[str], Any]) -> Any:
+        """
+        Return the cached reference for file_path, parsing and storing it on a miss
+        """
+        digest = self.file_digest(file_path)
+
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return self._entries[digest]
+
+        reference = self._load(digest)
+        if reference is None:
+            self.misses += 1
+            reference = parse(file_path)
+            self._save(digest, reference)
+        else:
+            self.hits += 1
+            logger.info(f"Loaded reference {file_path} from disk cache")
+
+        with self._lock:
+            self._entries[digest] = reference
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return reference
+
+    def invalidate(self, file_path: str):
+        """
+        Drop the cached reference for file_path (memory and disk)
+        """
+        try:
+            digest = self.file_digest(file_path)
+        except OSError:
+            # File already gone, fall back to the last digest we saw for it
+            cached = self._digests.get(file_path)
+            if not cached:
+                return
+            digest = cached[2]
+
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._digests.pop(file_path, None)
+
+        entry_path = self._entry_path(digest)
+        try:
+            entry_path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove cached reference {entry_path}: {e}")
+
+        logger.info(f"Invalidated cached reference for {file_path}")
+
+    def file_digest(self, file_path: str) -> str:
+        """
+        SHA-256 of the file content, memoized by (mtime, size)
+        """
+        stat = os.stat(file_path)
+        cached = self._digests.get(file_path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+
+        self._digests[file_path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def _entry_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.pkl"
+
+    def _load(self, digest: str) -> Optional[Any]:
+        entry_path = self._entry_path(digest)
+        try:
+            with open(entry_path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached reference {entry_path}: {e}")
+            return None
+
+        if not isinstance(payload, dict) or payload.get('version') != CACHE_FORMAT_VERSION:
+            return None
+
+        # Touch the entry so disk eviction follows access order
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return payload['reference']
+
+    def _save(self, digest: str, reference: Any):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry_path = self._entry_path(digest)
+            tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': CACHE_FORMAT_VERSION, 'reference': reference}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+            self._prune_disk()
+        except Exception as e:
+            # The cache is an optimization; never fail an analysis because of it
+            logger.warning(f"Could not persist reference cache entry {digest}: {e}")
+
+    def _prune_disk(self):
+        entries = sorted(self.cache_dir.glob("*.pkl"), key=lambda p: p.stat().st_mtime)
+        for stale in entries[:-self.max_entries]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+# Global instance
+reference_cache = ReferenceCache()
@@ -0,0 +1,220 @@
+from datetime import date
+from itertools import groupby
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from database import unit_of_work
+from models import Child, Measurement
+
+
+class ChildRecord(NamedTuple):
+    nik: Optional[str]
+    nama: str
+    tgl_lahir: Optional[date]
+    jenis_kelamin: Optional[str]
+
+
+class MeasurementRecord(NamedTuple):
+    bulan: str
+    tgl_ukur: Optional[date]
+    umur_bulan: Optional[int]
+    berat: Optional[float]
+    tinggi: Optional[float]
+    cara_ukur: Optional[str]
+    status_berat: str
+    status_tinggi: str
+    validasi_input: str
+    keterangan: str
+
+
+class ChildFindings(NamedTuple):
+    """
+    Problems of one child, in report order, shared by the text and context reports
+    """
+    missing_months: Tuple[str, ...]  # Months with weight and/or height missing
+    height_issues: Tuple[str, ...]   # Height decreases
+    weight_issues: Tuple[str, ...]   # Weight anomalies
+    non_ideal: Tuple[str, ...]       # Weight/height outside the reference range
+    gaps: Tuple[str, ...]            # Months without measurement
+    errors: Tuple[str, ...]          # Notes of ERROR measurements
+    warnings: Tuple[str, ...]        # Notes of WARNING measurements
+
+    @property
+    def all_valid(self) -> bool:
+        return not (self.missing_months or self.height_issues or self.weight_issues or self.non_ideal or self.gaps)
+
+
+class ChildResult(NamedTuple):
+    child: ChildRecord
+    measurements: Tuple[MeasurementRecord, ...]  # In report order: by age, unknown age counted as 0
+    findings: ChildFindings
+
+
+class ReportCounts(NamedTuple):
+    total_records: int
+    valid: int
+    warning: int
+    error: int
+    missing_weight: int
+    missing_height: int
+
+
+class ReportData(NamedTuple):
+    """
+    Validated results of a job, grouped per child with their findings precomputed,
+    shared read-only by all reports.
+    Only children with at least one measurement are included, like the reports always did.
+    """
+    children: Tuple[ChildResult, ...]
+    counts: ReportCounts
+
+
+def build_child_results(children: pd.DataFrame, validated: pd.DataFrame) -> List[ChildResult]:
+    """
+    Group a validated measurement table (sorted by child_index) into per-child results
+    with plain python values: None for missing, date for dates, int/float for numbers
+    """
+    if validated.empty:
+        return []
+
+    values = [_plain_values(validated[field]) for field in MeasurementRecord._fields]
+    records = [MeasurementRecord(*row) for row in zip(*values)]
+
+    child_index = validated['child_index'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, child_index[1:] != child_index[:-1]])
+    ends = np.r_[starts[1:], len(child_index)]
+
+    owners = children.loc[child_index[starts]]
+    child_values = [
+        _plain_values(owners['nik']),
+        _plain_values(owners['nama_anak']),
+        _plain_values(owners['tgl_lahir']),
+        _plain_values(owners['jenis_kelamin'])
+    ]
+
+    results = []
+    for child, start, end in zip(zip(*child_values), starts.tolist(), ends.tolist()):
+        measurements = _report_order(records[start:end])
+        results.append(ChildResult(ChildRecord(*child), measurements, find_problems(measurements)))
+    return results
+
+
+def load_report_data(job_id: str) -> ReportData:
+    """
+    Rebuild a finished job's ReportData from its saved children and measurements,
+    for rendering a report again without the analysis results in memory
+    """
+    statement = (
+        select(Child.id, Child.nik, Child.nama, Child.tgl_lahir, Child.jenis_kelamin,
+               *(getattr(Measurement, field) for field in MeasurementRecord._fields))
+        .join(Measurement, Measurement.child_id == Child.id)
+        .where(Measurement.job_id == job_id)
+        .order_by(Measurement.id)  # Saved order: by child, then age
+    )
+
+    with unit_of_work() as db:
+        rows = db.execute(statement).all()
+
+    results = []
+    counts = [0] * len(ReportCounts._fields)
+    for _, child_rows in groupby(rows, key=lambda row: row[0]):
+        child_rows = list(child_rows)
+        measurements = _report_order([MeasurementRecord(*row[5:]) for row in child_rows])
+        results.append(ChildResult(ChildRecord(*child_rows[0][1:5]), measurements, find_problems(measurements)))
+        for measurement in measurements:
+            counts[0] += 1
+            counts[1] += measurement.validasi_input == 'OK'
+            counts[2] += measurement.validasi_input == 'WARNING'
+            counts[3] += measurement.validasi_input == 'ERROR'
+            counts[4] += measurement.status_berat == 'Missing'
+            counts[5] += measurement.status_tinggi == 'Missing'
+
+    return ReportData(tuple(results), ReportCounts(*counts))
+
+
+def count_statuses(validated: pd.DataFrame) -> ReportCounts:
+    """
+    Status counts of a validated measurement table
+    """
+    status = validated['validasi_input']
+    return ReportCounts(
+        total_records=len(validated),
+        valid=int((status == 'OK').sum()),
+        warning=int((status == 'WARNING').sum()),
+        error=int((status == 'ERROR').sum()),
+        missing_weight=int((validated['status_berat'] == 'Missing').sum()),
+        missing_height=int((validated['status_tinggi'] == 'Missing').sum())
+    )
+
+
+def find_problems(measurements: Tuple[MeasurementRecord, ...]) -> ChildFindings:
+    """
+    Collect the findings of one child's measurements (in report order) in a single pass
+    """
+    missing_months = []
+    height_issues = []
+    weight_issues = []
+    non_ideal = []
+    gaps = []
+    errors = []
+    warnings = []
+
+    previous_age = None
+    for measurement in measurements:
+        keterangan = measurement.keterangan or ''
+
+        # Check for missing data
+        if measurement.status_berat == 'Missing' or measurement.status_tinggi == 'Missing':
+            missing_months.append(measurement.bulan)
+
+        if measurement.validasi_input == 'ERROR':
+            # Check for height consistency
+            if 'menurun' in keterangan.lower():
+                height_issues.append(f"{keterangan} (Bulan: {measurement.bulan})")
+            if keterangan:
+                errors.append(f"{keterangan} (Bulan: {measurement.bulan})")
+        elif measurement.validasi_input == 'WARNING' and keterangan:
+            warnings.append(f"{keterangan} (Bulan: {measurement.bulan})")
+
+        # Check for weight anomalies
+        if 'Anomali berat' in keterangan:
+            weight_issues.append(f"{keterangan} (Bulan: {measurement.bulan})")
+
+        # Check for non-ideal measurements
+        if measurement.status_berat == 'Tidak Ideal':
+            non_ideal.append(f"Berat tidak ideal: {measurement.berat}kg (Bulan: {measurement.bulan})")
+        if measurement.status_tinggi == 'Tidak Ideal':
+            non_ideal.append(f"Tinggi tidak ideal: {measurement.tinggi}cm (Bulan: {measurement.bulan})")
+
+        # Check for age gaps
+        if measurement.umur_bulan is not None:
+            if previous_age is not None and measurement.umur_bulan - previous_age > 1:
+                gaps.append(f"Gap data: tidak ada pengukuran untuk {measurement.umur_bulan - previous_age - 1} bulan sebelum {measurement.bulan}")
+            previous_age = measurement.umur_bulan
+
+    return ChildFindings(
+        tuple(missing_months), tuple(height_issues), tuple(weight_issues), tuple(non_ideal),
+        tuple(gaps), tuple(errors), tuple(warnings)
+    )
+
+
+def _report_order(measurements: List[MeasurementRecord]) -> Tuple[MeasurementRecord, ...]:
+    """
+    Validated rows are sorted by age with unknown ages last; the reports have always
+    listed unknown ages as age 0. Only children with an unknown age need re-sorting.
+    """
+    if measurements[-1].umur_bulan is None:
+        return tuple(sorted(measurements, key=lambda x: x.umur_bulan or 0))
+    return tuple(measurements)
+
+
+def _plain_values(series: pd.Series) -> list:
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.date.to_numpy(dtype=object)
+    else:
+        values = series.to_numpy(dtype=object)
+    values[missing] = None
+    return values.tolist()
@@ -1,17 +1,40 @@
+import asyncio
+from copy import copy
 import pandas as pd
 from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Border, Side, Alignment, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
 from datetime import datetime
 import logging
 
-from models import Measurement, Child
+from config import settings
+from .report_data import ReportData
 
 logger = logging.getLogger(__name__)
 
 
 class ReportGenerator:
+    EXCEL_HEADERS = [
+        'No', 'NIK', 'Nama Anak', 'Tanggal Lahir', 'Bulan', 'Tanggal Ukur',
+        'Umur (bulan)', 'Berat (kg)', 'Tinggi (cm)', 'Cara Ukur',
+        'Status Berat', 'Status Tinggi', 'Validasi Input', 'Keterangan'
+    ]
+
+    # Validation status -> named style of its data rows in streaming mode
+    STATUS_STYLES = {
+        'ERROR': 'report_error',
+        'WARNING': 'report_warning',
+        'WARNING_ANOMALY': 'report_warning_anomaly',
+        'OK': 'report_ok',
+    }
+
+    # Text reports are produced as chunks of about this many characters
+    REPORT_CHUNK_SIZE = 256 * 1024
+
     def __init__(self):
         # Define color schemes for validation status
         self.colors = {
@@ -34,113 +57,21 @@ class ReportGenerator:
         self.header_font = Font(bold=True, color='FFFFFF')
         self.header_fill = PatternFill(start_color='2196F3', end_color='2196F3', fill_type='solid')  # Blue
 
-    async def generate_excel_report(self, file_path: str, measurements: List[Measurement], default_gender: str):
+    async def generate_excel_report(self, file_path: str, report_data: ReportData, default_gender: str):
+        """
+        Generate Excel report on a worker thread
+        """
+        await asyncio.to_thread(self.write_excel_report, file_path, report_data, default_gender)
+
+    def write_excel_report(self, file_path: str, report_data: ReportData, default_gender: str):
         """
         Generate Excel report with color coding
         """
         try:
-            # Create workbook
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Hasil Validasi"
-
-            # Define headers
-            headers = [
-                'No', 'NIK', 'Nama Anak', 'Tanggal Lahir', 'Bulan', 'Tanggal Ukur',
-                'Umur (bulan)', 'Berat (kg)', 'Tinggi (cm)', 'Cara Ukur',
-                'Status Berat', 'Status Tinggi', 'Validasi Input', 'Keterangan'
-            ]
-
-            # Write headers
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = self.header_font
-                cell.fill = self.header_fill
-                cell.border = self.thin_border
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-
-            # Group measurements by child
-            children_data = {}
-            for measurement in measurements:
-                if measurement.child_id not in children_data:
-                    children_data[measurement.child_id] = {
-                        'child': measurement.child,
-                        'measurements': []
-                    }
-                children_data[measurement.child_id]['measurements'].append(measurement)
-
-            # Write data
-            row_num = 2
-            for child_id, data in children_data.items():
-                child = data['child']
-                child_measurements = sorted(data['measurements'], key=lambda x: x.umur_bulan or 0)
-
-                for i, measurement in enumerate(child_measurements):
-                    # Only show child info in first row
-                    nik = child.nik if i == 0 else ''
-                    nama_anak = child.nama if i == 0 else ''
-                    tgl_lahir = child.tgl_lahir.strftime('%d/%m/%Y') if child.tgl_lahir and i == 0 else ''
-
-                    # Format measurement data
-                    tgl_ukur = measurement.tgl_ukur.strftime('%d/%m/%Y') if measurement.tgl_ukur else ''
-                    berat = f"{measurement.berat:.1f}" if measurement.berat is not None else ''
-                    tinggi = f"{measurement.tinggi:.1f}" if measurement.tinggi is not None else ''
-                    umur = str(measurement.umur_bulan) if measurement.umur_bulan is not None else ''
-
-                    # Write row data
-                    row_data = [
-                        row_num - 1,  # No
-                        nik,
-                        nama_anak,
-                        tgl_lahir,
-                        measurement.bulan,
-                        tgl_ukur,
-                        umur,
-                        berat,
-                        tinggi,
-                        measurement.cara_ukur or '',
-                        measurement.status_berat,
-                        measurement.status_tinggi,
-                        measurement.validasi_input,
-                        measurement.keterangan or ''
-                    ]
-
-                    for col_num, value in enumerate(row_data, 1):
-                        cell = ws.cell(row=row_num, column=col_num, value=value)
-                        cell.border = self.thin_border
-
-                        # Apply color coding based on validation status
-                        if measurement.validasi_input == 'ERROR':
-                            cell.fill = self.colors['ERROR']
-                        elif measurement.validasi_input == 'WARNING':
-                            # Check if it's an anomaly (weight loss > 10%)
-                            if 'Anomali berat' in (measurement.keterangan or ''):
-                                cell.fill = self.colors['WARNING_ANOMALY']
-                            else:
-                                cell.fill = self.colors['WARNING']
-                        elif measurement.validasi_input == 'OK':
-                            cell.fill = self.colors['OK']
-
-                    row_num += 1
-
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            # Freeze header row
-            ws.freeze_panes = 'A2'
-
-            # Add summary sheet
-            self._add_summary_sheet(wb, measurements, default_gender)
+            if settings.EXCEL_REPORT_MODE == 'standard':
+                wb = self._build_standard_workbook(report_data, default_gender)
+            else:
+                wb = self._build_streaming_workbook(report_data, default_gender)
 
             # Save workbook
             wb.save(file_path)
@@ -150,25 +81,210 @@ class ReportGenerator:
             logger.error(f"Error generating Excel report: {str(e)}")
             raise
 
-    def _add_summary_sheet(self, wb, measurements: List[Measurement], default_gender: str):
+    def _build_streaming_workbook(self, report_data: ReportData, default_gender: str) -> Workbook:
         """
-        Add summary statistics sheet
+        Write-only workbook: rows are streamed to disk as they are appended and every
+        cell references one of the shared named styles, so memory stays flat with row count
         """
-        # Create summary sheet
+        wb = Workbook(write_only=True)
+        self._add_named_styles(wb)
+
+        ws = wb.create_sheet("Hasil Validasi")
+
+        # A write-only sheet needs its column widths before the first row, so measure
+        # them in a pass over the (immutable) report data before writing
+        widths = [len(header) for header in self.EXCEL_HEADERS]
+        for row_data, _ in self._excel_rows(report_data):
+            for col_index, value in enumerate(row_data):
+                length = len(str(value))
+                if length > widths[col_index]:
+                    widths[col_index] = length
+        self._set_column_widths(ws, widths)
+
+        # Freeze header row
+        ws.freeze_panes = 'A2'
+
+        styled_cell = self._cell_factory(ws)
+        ws.append([styled_cell(header, 'report_header') for header in self.EXCEL_HEADERS])
+        for row_data, status in self._excel_rows(report_data):
+            style = self.STATUS_STYLES.get(status, 'report_cell')
+            ws.append([styled_cell(value, style) for value in row_data])
+
+        # Add summary sheet
+        summary_data = self._summary_rows(report_data, default_gender)
         summary_ws = wb.create_sheet("Ringkasan")
+        self._set_column_widths(summary_ws, [
+            max(len(str(row_data[col_index])) for row_data in summary_data)
+            for col_index in range(len(summary_data[0]))
+        ])
+        styled_cell = self._cell_factory(summary_ws)
+        for row_num, row_data in enumerate(summary_data, 1):
+            summary_ws.append([
+                styled_cell(value, self._summary_style(row_num, col_num, value))
+                for col_num, value in enumerate(row_data, 1)
+            ])
+
+        return wb
+
+    def _add_named_styles(self, wb: Workbook):
+        """
+        Register the shared report styles on the workbook
+        """
+        styles = [
+            NamedStyle(name='report_header', font=self.header_font, fill=self.header_fill, border=self.thin_border,
+                       alignment=Alignment(horizontal='center', vertical='center')),
+            NamedStyle(name='report_cell', font=DEFAULT_FONT, border=self.thin_border),
+            NamedStyle(name='report_category', font=Font(bold=True), border=self.thin_border),
+        ]
+        for status, name in self.STATUS_STYLES.items():
+            styles.append(NamedStyle(name=name, font=DEFAULT_FONT, fill=self.colors[status], border=self.thin_border))
+
+        for style in styles:
+            wb.add_named_style(style)
+
+    def _cell_factory(self, ws):
+        """
+        Return styled_cell(value, style) creating write-only cells for ws.
+        Resolving a named style by name is a list scan, so each style is resolved
+        once on a prototype cell and copied from there.
+        """
+        prototypes = {}
+
+        def styled_cell(value, style: str) -> WriteOnlyCell:
+            prototype = prototypes.get(style)
+            if prototype is None:
+                prototype = prototypes[style] = WriteOnlyCell(ws)
+                prototype.style = style
+            cell = WriteOnlyCell(ws, value=value)
+            cell._style = copy(prototype._style)
+            return cell
+
+        return styled_cell
+
+    def _set_column_widths(self, ws, widths: List[int]):
+        for col_index, max_length in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(col_index)].width = min(max_length + 2, 50)  # Cap at 50 characters
+
+    def _summary_style(self, row_num: int, col_num: int, value) -> str:
+        if row_num == 1:
+            return 'report_header'
+        if value in ['', 'Status Validasi', 'Data Hilang', 'Informasi Analisis'] and col_num == 1:
+            return 'report_category'
+        return 'report_cell'
+
+    def _excel_rows(self, report_data: ReportData):
+        """
+        Yield (row values, validation status style key) for the Hasil Validasi sheet
+        """
+        row_num = 2
+        for result in report_data.children:
+            child = result.child
+
+            for i, measurement in enumerate(result.measurements):
+                # Only show child info in first row
+                nik = child.nik if i == 0 else ''
+                nama_anak = child.nama if i == 0 else ''
+                tgl_lahir = child.tgl_lahir.strftime('%d/%m/%Y') if child.tgl_lahir and i == 0 else ''
+
+                # Format measurement data
+                tgl_ukur = measurement.tgl_ukur.strftime('%d/%m/%Y') if measurement.tgl_ukur else ''
+                berat = f"{measurement.berat:.1f}" if measurement.berat is not None else ''
+                tinggi = f"{measurement.tinggi:.1f}" if measurement.tinggi is not None else ''
+                umur = str(measurement.umur_bulan) if measurement.umur_bulan is not None else ''
+
+                row_data = [
+                    row_num - 1,  # No
+                    nik,
+                    nama_anak,
+                    tgl_lahir,
+                    measurement.bulan,
+                    tgl_ukur,
+                    umur,
+                    berat,
+                    tinggi,
+                    measurement.cara_ukur or '',
+                    measurement.status_berat,
+                    measurement.status_tinggi,
+                    measurement.validasi_input,
+                    measurement.keterangan or ''
+                ]
+
+                # Color coding based on validation status
+                if measurement.validasi_input == 'WARNING' and 'Anomali berat' in (measurement.keterangan or ''):
+                    # Anomaly (weight loss > 10%)
+                    status = 'WARNING_ANOMALY'
+                else:
+                    status = measurement.validasi_input
+
+                yield row_data, status
+                row_num += 1
+
+    def _build_standard_workbook(self, report_data: ReportData, default_gender: str) -> Workbook:
+        """
+        Regular in-memory workbook with per-cell formatting
+        """
+        # Create workbook
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Hasil Validasi"
+
+        # Write headers
+        for col_num, header in enumerate(self.EXCEL_HEADERS, 1):
+            cell = ws.cell(row=1, column=col_num, value=header)
+            cell.font = self.header_font
+            cell.fill = self.header_fill
+            cell.border = self.thin_border
+            cell.alignment = Alignment(horizontal='center', vertical='center')
+
+        # Write data
+        for row_num, (row_data, status) in enumerate(self._excel_rows(report_data), 2):
+            for col_num, value in enumerate(row_data, 1):
+                cell = ws.cell(row=row_num, column=col_num, value=value)
+                cell.border = self.thin_border
+
+                # Apply color coding based on validation status
+                if status in self.STATUS_STYLES:
+                    cell.fill = self.colors[status]
+
+        # Auto-adjust column widths
+        for column in ws.columns:
+            max_length = 0
+            column_letter = column[0].column_letter
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
+            ws.column_dimensions[column_letter].width = adjusted_width
+
+        # Freeze header row
+        ws.freeze_panes = 'A2'
+
+        # Add summary sheet
+        self._add_summary_sheet(wb, report_data, default_gender)
+
+        return wb
+
+    def _summary_rows(self, report_data: ReportData, default_gender: str) -> List[List[Any]]:
+        """
+        Rows of the Ringkasan (summary statistics) sheet
+        """
+        counts = report_data.counts
 
         # Calculate statistics
-        total_anak = len(set(m.child_id for m in measurements))
-        total_records = len(measurements)
-        valid_count = len([m for m in measurements if m.validasi_input == 'OK'])
-        warning_count = len([m for m in measurements if m.validasi_input == 'WARNING'])
-        error_count = len([m for m in measurements if m.validasi_input == 'ERROR'])
-        missing_weight = len([m for m in measurements if m.status_berat == 'Missing'])
-        missing_height = len([m for m in measurements if m.status_tinggi == 'Missing'])
+        total_anak = len(report_data.children)
+        total_records = counts.total_records
+        valid_count = counts.valid
+        warning_count = counts.warning
+        error_count = counts.error
+        missing_weight = counts.missing_weight
+        missing_height = counts.missing_height
         missing_data = missing_weight + missing_height
 
         # Summary data
-        summary_data = [
+        return [
             ['Parameter', 'Jumlah', 'Persentase'],
             ['Total Anak', total_anak, '100%'],
             ['Total Data Pengukuran', total_records, '100%'],
@@ -188,6 +304,15 @@ class ReportGenerator:
             ['Tanggal Generate', datetime.now().strftime('%d/%m/%Y %H:%M:%S'), '-']
         ]
 
+    def _add_summary_sheet(self, wb, report_data: ReportData, default_gender: str):
+        """
+        Add summary statistics sheet
+        """
+        # Create summary sheet
+        summary_ws = wb.create_sheet("Ringkasan")
+
+        summary_data = self._summary_rows(report_data, default_gender)
+
         # Write summary data
         for row_num, row_data in enumerate(summary_data, 1):
             for col_num, value in enumerate(row_data, 1):
@@ -217,197 +342,20 @@ class ReportGenerator:
             adjusted_width = min(max_length + 2, 50)
             summary_ws.column_dimensions[column_letter].width = adjusted_width
 
-    async def generate_context_report(self, file_path: str, measurements: List[Measurement], summary: Dict, default_gender: str):
+    async def generate_context_report(self, file_path: str, report_data: ReportData, summary: Dict, default_gender: str):
+        """
+        Generate context report on a worker thread
+        """
+        await asyncio.to_thread(self.write_context_report, file_path, report_data, summary, default_gender)
+
+    def write_context_report(self, file_path: str, report_data: ReportData, summary: Dict, default_gender: str):
         """
         Generate comprehensive context report with complete Excel data for AI analysis
         """
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
-                # Write header
-                f.write("KONTEKS LENGKAP DATA ANALISIS PERTUMBUHAN ANAK\n")
-                f.write("=" * 60 + "\n\n")
-                f.write(f"Tanggal Generate: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                f.write(f"Jenis Kelamin Default: {default_gender}\n\n")
-
-                # Write summary statistics
-                f.write("RINGKASAN STATISTIK\n")
-                f.write("-" * 30 + "\n")
-                f.write(f"Total Anak: {summary['total_anak']}\n")
-                f.write(f"Total Data Pengukuran: {summary['total_records']}\n")
-                f.write(f"Valid (OK): {summary['valid']} ({summary['valid']/summary['total_records']*100:.1f}%)\n")
-                f.write(f"Peringatan (Warning): {summary['warning']} ({summary['warning']/summary['total_records']*100:.1f}%)\n")
-                f.write(f"Error: {summary['error']} ({summary['error']/summary['total_records']*100:.1f}%)\n")
-                f.write(f"Missing Data: {summary['missing']}\n\n")
-
-                # Group measurements by child
-                children_data = {}
-                for measurement in measurements:
-                    if measurement.child_id not in children_data:
-                        children_data[measurement.child_id] = {
-                            'child': measurement.child,
-                            'measurements': []
-                        }
-                    children_data[measurement.child_id]['measurements'].append(measurement)
-
-                f.write("DATA LENGKAP PER ANAK\n")
-                f.write("=" * 50 + "\n\n")
-
-                for child_id, data in children_data.items():
-                    child = data['child']
-                    child_measurements = sorted(data['measurements'], key=lambda x: x.umur_bulan or 0)
-
-                    # Child information
-                    f.write(f"ANAK: {child.nama}\n")
-                    if child.nik:
-                        f.write(f"NIK: {child.nik}\n")
-                    if child.tgl_lahir:
-                        f.write(f"TANGGAL LAHIR: {child.tgl_lahir.strftime('%d/%m/%Y')}\n")
-                    f.write("-" * 40 + "\n\n")
-
-                    # Complete data table for this child
-                    f.write("DATA PENGUKURAN LENGKAP:\n")
-                    f.write("Bulan\t| Tgl Ukur\t| Umur\t| Berat\t| Tinggi\t| Cara Ukur\t| Status Berat\t| Status Tinggi\t| Validasi\t| Keterangan\n")
-                    f.write("-" * 150 + "\n")
-
-                    for measurement in child_measurements:
-                        tgl_ukur = measurement.tgl_ukur.strftime('%d/%m/%Y') if measurement.tgl_ukur else ''
-                        umur = str(measurement.umur_bulan) if measurement.umur_bulan is not None else ''
-                        berat = f"{measurement.berat:.1f}" if measurement.berat is not None else ''
-                        tinggi = f"{measurement.tinggi:.1f}" if measurement.tinggi is not None else ''
-                        cara_ukur = measurement.cara_ukur or ''
-                        status_berat = measurement.status_berat or ''
-                        status_tinggi = measurement.status_tinggi or ''
-                        validasi = measurement.validasi_input or ''
-                        keterangan = measurement.keterangan or ''
-
-                        f.write(f"{measurement.bulan}\t| {tgl_ukur}\t| {umur}\t| {berat}\t| {tinggi}\t| {cara_ukur}\t\t| {status_berat}\t| {status_tinggi}\t| {validasi}\t| {keterangan}\n")
-
-                    f.write("\n" + "=" * 50 + "\n\n")
-
-                # Add detailed analysis section
-                f.write("ANALISIS DETAIL MASALAH PER ANAK\n")
-                f.write("=" * 50 + "\n\n")
-
-                for child_id, data in children_data.items():
-                    child = data['child']
-                    child_measurements = sorted(data['measurements'], key=lambda x: x.umur_bulan or 0)
-
-                    f.write(f"ANAK: {child.nama}\n")
-                    f.write("-" * 30 + "\n")
-
-                    # Analyze measurements for this child
-                    errors = []
-                    warnings = []
-                    missing_months = []
-                    height_issues = []
-                    weight_issues = []
-                    non_ideal_measurements = []
-
-                    previous_age = None
-                    previous_height = None
-                    previous_weight = None
-
-                    for measurement in child_measurements:
-                        # Check for missing data
-                        if measurement.status_berat == 'Missing' or measurement.status_tinggi == 'Missing':
-                            missing_months.append(measurement.bulan)
-
-                        # Check for height consistency
-                        if measurement.validasi_input == 'ERROR' and 'menurun' in (measurement.keterangan or '').lower():
-                            height_issues.append(f"{measurement.keterangan} (Bulan: {measurement.bulan})")
-
-                        # Check for weight anomalies
-                        if 'Anomali berat' in (measurement.keterangan or ''):
-                            weight_issues.append(f"{measurement.keterangan} (Bulan: {measurement.bulan})")
-
-                        # Check for non-ideal measurements
-                        if measurement.status_berat == 'Tidak Ideal' or measurement.status_tinggi == 'Tidak Ideal':
-                            non_ideal_measurements.append(measurement)
-
-                        # Check for age gaps
-                        if previous_age is not None and measurement.umur_bulan is not None:
-                            age_gap = measurement.umur_bulan - previous_age
-                            if age_gap > 1:
-                                warnings.append(f"Gap data: tidak ada pengukuran untuk {age_gap-1} bulan sebelum {measurement.bulan}")
-
-                        # Update previous values
-                        if measurement.umur_bulan is not None:
-                            previous_age = measurement.umur_bulan
-                        if measurement.tinggi is not None:
-                            previous_height = measurement.tinggi
-                        if measurement.berat is not None:
-                            previous_weight = measurement.berat
-
-                    # Write detailed findings
-                    if missing_months:
-                        f.write(f"Data hilang untuk bulan: {', '.join(missing_months)}\n")
-
-                    if height_issues:
-                        f.write("Masalah tinggi badan:\n")
-                        for issue in height_issues:
-                            f.write(f"  - {issue}\n")
-
-                    if weight_issues:
-                        f.write("Anomali berat badan:\n")
-                        for issue in weight_issues:
-                            f.write(f"  - {issue}\n")
-
-                    if non_ideal_measurements:
-                        f.write("Data di luar rentang ideal:\n")
-                        for m in non_ideal_measurements:
-                            if m.status_berat == 'Tidak Ideal':
-                                f.write(f"  - Berat tidak ideal: {m.berat}kg (Bulan: {m.bulan})\n")
-                            if m.status_tinggi == 'Tidak Ideal':
-                                f.write(f"  - Tinggi tidak ideal: {m.tinggi}cm (Bulan: {m.bulan})\n")
-
-                    if warnings:
-                        f.write("Peringatan:\n")
-                        for warning in warnings:
-                            f.write(f"  - {warning}\n")
-
-                    if not (missing_months or height_issues or weight_issues or non_ideal_measurements or warnings):
-                        f.write("Semua data valid ✓\n")
-
-                    f.write("\n")
-
-                # Add summary of all problems
-                f.write("RINGKASAN SEMUA MASALAH\n")
-                f.write("=" * 30 + "\n\n")
-
-                all_errors = []
-                all_warnings = []
-                all_missing = []
-
-                for child_id, data in children_data.items():
-                    child = data['child']
-                    child_measurements = data['measurements']
-
-                    for measurement in child_measurements:
-                        if measurement.validasi_input == 'ERROR':
-                            if measurement.keterangan:
-                                all_errors.append(f"{child.nama}: {measurement.keterangan} (Bulan: {measurement.bulan})")
-                        if measurement.validasi_input == 'WARNING' and measurement.keterangan:
-                            all_warnings.append(f"{child.nama}: {measurement.keterangan} (Bulan: {measurement.bulan})")
-                        if measurement.status_berat == 'Missing' or measurement.status_tinggi == 'Missing':
-                            all_missing.append(f"{child.nama}: Bulan {measurement.bulan}")
-
-                if all_errors:
-                    f.write("SEMUA ERROR:\n")
-                    for error in all_errors:
-                        f.write(f"- {error}\n")
-                    f.write("\n")
-
-                if all_warnings:
-                    f.write("SEMUA WARNING:\n")
-                    for warning in all_warnings:
-                        f.write(f"- {warning}\n")
-                    f.write("\n")
-
-                if all_missing:
-                    f.write("SEMUA DATA MISSING:\n")
-                    for missing in all_missing:
-                        f.write(f"- {missing}\n")
-                    f.write("\n")
+                for chunk in self.iter_context_report(report_data, summary, default_gender):
+                    f.write(chunk)
 
             logger.info(f"Context report saved to {file_path}")
 
@@ -415,130 +363,240 @@ class ReportGenerator:
             logger.error(f"Error generating context report: {str(e)}")
             raise
 
-    async def generate_text_report(self, file_path: str, measurements: List[Measurement], summary: Dict):
+    def iter_context_report(self, report_data: ReportData, summary: Dict, default_gender: str) -> Iterator[str]:
+        """
+        Context report text in chunks of about REPORT_CHUNK_SIZE characters
+        """
+        return self._chunked(self._context_report_pieces(report_data, summary, default_gender))
+
+    def _context_report_pieces(self, report_data: ReportData, summary: Dict, default_gender: str) -> Iterator[str]:
+        """
+        Context report as small pieces of text, in order
+        """
+        # Write header
+        yield "KONTEKS LENGKAP DATA ANALISIS PERTUMBUHAN ANAK\n"
+        yield "=" * 60 + "\n\n"
+        yield f"Tanggal Generate: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
+        yield f"Jenis Kelamin Default: {default_gender}\n\n"
+
+        # Write summary statistics
+        yield "RINGKASAN STATISTIK\n"
+        yield "-" * 30 + "\n"
+        yield f"Total Anak: {summary['total_anak']}\n"
+        yield f"Total Data Pengukuran: {summary['total_records']}\n"
+        yield f"Valid (OK): {summary['valid']} ({summary['valid']/summary['total_records']*100:.1f}%)\n"
+        yield f"Peringatan (Warning): {summary['warning']} ({summary['warning']/summary['total_records']*100:.1f}%)\n"
+        yield f"Error: {summary['error']} ({summary['error']/summary['total_records']*100:.1f}%)\n"
+        yield f"Missing Data: {summary['missing']}\n\n"
+
+        yield "DATA LENGKAP PER ANAK\n"
+        yield "=" * 50 + "\n\n"
+
+        for result in report_data.children:
+            child = result.child
+
+            # Child information
+            yield f"ANAK: {child.nama}\n"
+            if child.nik:
+                yield f"NIK: {child.nik}\n"
+            if child.tgl_lahir:
+                yield f"TANGGAL LAHIR: {child.tgl_lahir.strftime('%d/%m/%Y')}\n"
+            yield "-" * 40 + "\n\n"
+
+            # Complete data table for this child
+            yield "DATA PENGUKURAN LENGKAP:\n"
+            yield "Bulan\t| Tgl Ukur\t| Umur\t| Berat\t| Tinggi\t| Cara Ukur\t| Status Berat\t| Status Tinggi\t| Validasi\t| Keterangan\n"
+            yield "-" * 150 + "\n"
+
+            for measurement in result.measurements:
+                tgl_ukur = measurement.tgl_ukur.strftime('%d/%m/%Y') if measurement.tgl_ukur else ''
+                umur = str(measurement.umur_bulan) if measurement.umur_bulan is not None else ''
+                berat = f"{measurement.berat:.1f}" if measurement.berat is not None else ''
+                tinggi = f"{measurement.tinggi:.1f}" if measurement.tinggi is not None else ''
+                cara_ukur = measurement.cara_ukur or ''
+                status_berat = measurement.status_berat or ''
+                status_tinggi = measurement.status_tinggi or ''
+                validasi = measurement.validasi_input or ''
+                keterangan = measurement.keterangan or ''
+
+                yield f"{measurement.bulan}\t| {tgl_ukur}\t| {umur}\t| {berat}\t| {tinggi}\t| {cara_ukur}\t\t| {status_berat}\t| {status_tinggi}\t| {validasi}\t| {keterangan}\n"
+
+            yield "\n" + "=" * 50 + "\n\n"
+
+        # Add detailed analysis section
+        yield "ANALISIS DETAIL MASALAH PER ANAK\n"
+        yield "=" * 50 + "\n\n"
+
+        for result in report_data.children:
+            findings = result.findings
+
+            yield f"ANAK: {result.child.nama}\n"
+            yield "-" * 30 + "\n"
+
+            # Write detailed findings
+            if findings.missing_months:
+                yield f"Data hilang untuk bulan: {', '.join(findings.missing_months)}\n"
+
+            if findings.height_issues:
+                yield "Masalah tinggi badan:\n"
+                for issue in findings.height_issues:
+                    yield f"  - {issue}\n"
+
+            if findings.weight_issues:
+                yield "Anomali berat badan:\n"
+                for issue in findings.weight_issues:
+                    yield f"  - {issue}\n"
+
+            if findings.non_ideal:
+                yield "Data di luar rentang ideal:\n"
+                for issue in findings.non_ideal:
+                    yield f"  - {issue}\n"
+
+            if findings.gaps:
+                yield "Peringatan:\n"
+                for warning in findings.gaps:
+                    yield f"  - {warning}\n"
+
+            if findings.all_valid:
+                yield "Semua data valid ✓\n"
+
+            yield "\n"
+
+        # Add summary of all problems
+        yield "RINGKASAN SEMUA MASALAH\n"
+        yield "=" * 30 + "\n\n"
+
+        all_errors = []
+        all_warnings = []
+        all_missing = []
+
+        for result in report_data.children:
+            nama = result.child.nama
+            all_errors.extend(f"{nama}: {error}" for error in result.findings.errors)
+            all_warnings.extend(f"{nama}: {warning}" for warning in result.findings.warnings)
+            all_missing.extend(f"{nama}: Bulan {month}" for month in result.findings.missing_months)
+
+        if all_errors:
+            yield "SEMUA ERROR:\n"
+            for error in all_errors:
+                yield f"- {error}\n"
+            yield "\n"
+
+        if all_warnings:
+            yield "SEMUA WARNING:\n"
+            for warning in all_warnings:
+                yield f"- {warning}\n"
+            yield "\n"
+
+        if all_missing:
+            yield "SEMUA DATA MISSING:\n"
+            for missing in all_missing:
+                yield f"- {missing}\n"
+            yield "\n"
+
+    async def generate_text_report(self, file_path: str, report_data: ReportData, summary: Dict):
+        """
+        Generate text report on a worker thread
+        """
+        await asyncio.to_thread(self.write_text_report, file_path, report_data, summary)
+
+    def write_text_report(self, file_path: str, report_data: ReportData, summary: Dict):
         """
         Generate descriptive text report per child
         """
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
-                # Write header
-                f.write("LAPORAN VALIDASI DATA PERTUMBUHAN ANAK\n")
-                f.write("=" * 50 + "\n\n")
-                f.write(f"Tanggal Generate: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-
-                # Write summary
-                f.write("RINGKASAN ANALISIS\n")
-                f.write("-" * 20 + "\n")
-                f.write(f"Total Anak: {summary['total_anak']}\n")
-                f.write(f"Total Data Pengukuran: {summary['total_records']}\n")
-                f.write(f"Valid (OK): {summary['valid']} ({summary['valid']/summary['total_records']*100:.1f}%)\n")
-                f.write(f"Peringatan (Warning): {summary['warning']} ({summary['warning']/summary['total_records']*100:.1f}%)\n")
-                f.write(f"Error: {summary['error']} ({summary['error']/summary['total_records']*100:.1f}%)\n")
-                f.write(f"Missing Data: {summary['missing']}\n\n")
-
-                # Group measurements by child
-                children_data = {}
-                for measurement in measurements:
-                    if measurement.child_id not in children_data:
-                        children_data[measurement.child_id] = {
-                            'child': measurement.child,
-                            'measurements': []
-                        }
-                    children_data[measurement.child_id]['measurements'].append(measurement)
-
-                # Write detailed report per child
-                f.write("ANALISIS DETAIL PER ANAK\n")
-                f.write("=" * 30 + "\n\n")
-
-                for child_id, data in children_data.items():
-                    child = data['child']
-                    child_measurements = sorted(data['measurements'], key=lambda x: x.umur_bulan or 0)
-
-                    # Child information
-                    f.write(f"NAMA: {child.nama}\n")
-                    if child.nik:
-                        f.write(f"NIK: {child.nik}\n")
-                    if child.tgl_lahir:
-                        f.write(f"TANGGAL LAHIR: {child.tgl_lahir.strftime('%d/%m/%Y')}\n")
-                    f.write("-" * 20 + "\n")
-
-                    # Analyze measurements
-                    errors = []
-                    warnings = []
-                    missing_months = []
-                    height_issues = []
-                    weight_issues = []
-                    non_ideal_measurements = []
-
-                    previous_age = None
-                    previous_height = None
-                    previous_weight = None
-
-                    for measurement in child_measurements:
-                        # Check for missing data
-                        if measurement.status_berat == 'Missing' or measurement.status_tinggi == 'Missing':
-                            missing_months.append(measurement.bulan)
-
-                        # Check for height consistency
-                        if measurement.validasi_input == 'ERROR' and 'menurun' in (measurement.keterangan or '').lower():
-                            height_issues.append(f"{measurement.keterangan} (Bulan: {measurement.bulan})")
-
-                        # Check for weight anomalies
-                        if 'Anomali berat' in (measurement.keterangan or ''):
-                            weight_issues.append(f"{measurement.keterangan} (Bulan: {measurement.bulan})")
-
-                        # Check for non-ideal measurements
-                        if measurement.status_berat == 'Tidak Ideal' or measurement.status_tinggi == 'Tidak Ideal':
-                            non_ideal_measurements.append(measurement)
-
-                        # Check for age gaps
-                        if previous_age is not None and measurement.umur_bulan is not None:
-                            age_gap = measurement.umur_bulan - previous_age
-                            if age_gap > 1:
-                                warnings.append(f"Gap data: tidak ada pengukuran untuk {age_gap-1} bulan sebelum {measurement.bulan}")
-
-                        # Update previous values
-                        if measurement.umur_bulan is not None:
-                            previous_age = measurement.umur_bulan
-                        if measurement.tinggi is not None:
-                            previous_height = measurement.tinggi
-                        if measurement.berat is not None:
-                            previous_weight = measurement.berat
-
-                    # Write findings
-                    if missing_months:
-                        f.write(f"Tidak diukur pada bulan: {', '.join(missing_months)}\n")
-
-                    if height_issues:
-                        f.write("\nMASALAH TINGGI BADAN:\n")
-                        for issue in height_issues:
-                            f.write(f"- {issue}\n")
-
-                    if weight_issues:
-                        f.write("\nANOMALI BERAT BADAN:\n")
-                        for issue in weight_issues:
-                            f.write(f"- {issue}\n")
-
-                    if non_ideal_measurements:
-                        f.write("\nDATA DI LUAR RENTANG IDEAL:\n")
-                        for m in non_ideal_measurements:
-                            if m.status_berat == 'Tidak Ideal':
-                                f.write(f"- Berat tidak ideal: {m.berat}kg (Bulan: {m.bulan})\n")
-                            if m.status_tinggi == 'Tidak Ideal':
-                                f.write(f"- Tinggi tidak ideal: {m.tinggi}cm (Bulan: {m.bulan})\n")
-
-                    if warnings:
-                        f.write("\nPERINGATAN:\n")
-                        for warning in warnings:
-                            f.write(f"- {warning}\n")
-
-                    if not (missing_months or height_issues or weight_issues or non_ideal_measurements or warnings):
-                        f.write("SEMUA DATA VALID ✓\n")
-
-                    f.write("\n" + "=" * 50 + "\n\n")
+                for chunk in self.iter_text_report(report_data, summary):
+                    f.write(chunk)
 
             logger.info(f"Text report saved to {file_path}")
 
         except Exception as e:
             logger.error(f"Error generating text report: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def iter_text_report(self, report_data: ReportData, summary: Dict) -> Iterator[str]:
+        """
+        Text report in chunks of about REPORT_CHUNK_SIZE characters
+        """
+        return self._chunked(self._text_report_pieces(report_data, summary))
+
+    def _text_report_pieces(self, report_data: ReportData, summary: Dict) -> Iterator[str]:
+        """
+        Text report as small pieces of text, in order
+        """
+        # Write header
+        yield "LAPORAN VALIDASI DATA PERTUMBUHAN ANAK\n"
+        yield "=" * 50 + "\n\n"
+        yield f"Tanggal Generate: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n"
+
+        # Write summary
+        yield "RINGKASAN ANALISIS\n"
+        yield "-" * 20 + "\n"
+        yield f"Total Anak: {summary['total_anak']}\n"
+        yield f"Total Data Pengukuran: {summary['total_records']}\n"
+        yield f"Valid (OK): {summary['valid']} ({summary['valid']/summary['total_records']*100:.1f}%)\n"
+        yield f"Peringatan (Warning): {summary['warning']} ({summary['warning']/summary['total_records']*100:.1f}%)\n"
+        yield f"Error: {summary['error']} ({summary['error']/summary['total_records']*100:.1f}%)\n"
+        yield f"Missing Data: {summary['missing']}\n\n"
+
+        # Write detailed report per child
+        yield "ANALISIS DETAIL PER ANAK\n"
+        yield "=" * 30 + "\n\n"
+
+        for result in report_data.children:
+            child = result.child
+            findings = result.findings
+
+            # Child information
+            yield f"NAMA: {child.nama}\n"
+            if child.nik:
+                yield f"NIK: {child.nik}\n"
+            if child.tgl_lahir:
+                yield f"TANGGAL LAHIR: {child.tgl_lahir.strftime('%d/%m/%Y')}\n"
+            yield "-" * 20 + "\n"
+
+            # Write findings
+            if findings.missing_months:
+                yield f"Tidak diukur pada bulan: {', '.join(findings.missing_months)}\n"
+
+            if findings.height_issues:
+                yield "\nMASALAH TINGGI BADAN:\n"
+                for issue in findings.height_issues:
+                    yield f"- {issue}\n"
+
+            if findings.weight_issues:
+                yield "\nANOMALI BERAT BADAN:\n"
+                for issue in findings.weight_issues:
+                    yield f"- {issue}\n"
+
+            if findings.non_ideal:
+                yield "\nDATA DI LUAR RENTANG IDEAL:\n"
+                for issue in findings.non_ideal:
+                    yield f"- {issue}\n"
+
+            if findings.gaps:
+                yield "\nPERINGATAN:\n"
+                for warning in findings.gaps:
+                    yield f"- {warning}\n"
+
+            if findings.all_valid:
+                yield "SEMUA DATA VALID ✓\n"
+
+            yield "\n" + "=" * 50 + "\n\n"
+
+    def _chunked(self, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Join small pieces of text into chunks of about REPORT_CHUNK_SIZE characters
+        """
+        buffer = []
+        size = 0
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= self.REPORT_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer)
\ No newline at end of file
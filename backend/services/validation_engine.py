@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+import logging
+
+from .growth_reference import GrowthReference
+
+logger = logging.getLogger(__name__)
+
+
+class MeasurementValidator:
+    """
+    Applies the validation hierarchy to a whole long measurement table at once.
+
+    Rules, in the order they are applied to each measurement of a child sorted by age:
+      1. Missing data (weight and/or height empty)
+      2. Gap of more than one month since the previous measured age
+      3. Height decrease (ERROR) or increase of more than 5cm (WARNING)
+      4. Weight loss of more than 10%
+      5. Weight/height outside the reference range for the child's gender and age
+    "Previous" values are the last non-empty value among the child's earlier rows,
+    computed with grouped forward-fill + shift instead of a per-child loop.
+    """
+
+    def validate(self, children: pd.DataFrame, measurements: pd.DataFrame,
+                 reference: GrowthReference, default_gender: str) -> pd.DataFrame:
+        """
+        children: ExcelParser children table (index = child_index, jenis_kelamin column)
+        measurements: ExcelParser measurements table
+        Returns: measurements sorted by child then age, with status_berat, status_tinggi,
+                 validasi_input and keterangan columns added
+        """
+        df = measurements.sort_values(['child_index', 'umur_bulan'], kind='stable', na_position='last')
+        df = df.reset_index(drop=True)
+        n = len(df)
+
+        child = df['child_index'].to_numpy()
+        age = df['umur_bulan'].astype('float64').to_numpy()
+        weight = df['berat'].to_numpy(dtype='float64')
+        height = df['tinggi'].to_numpy(dtype='float64')
+
+        # Child-specific gender, default gender when not provided
+        gender = children['jenis_kelamin'].reindex(child).to_numpy(dtype=object)
+        gender = np.where(pd.isna(gender), default_gender, gender)
+
+        has_weight = ~np.isnan(weight)
+        has_height = ~np.isnan(height)
+        has_age = ~np.isnan(age)
+        both_missing = ~has_weight & ~has_height
+        checked = ~both_missing
+
+        # Rows with neither weight nor height do not advance the previous age
+        previous_age = self._previous(child, np.where(both_missing, np.nan, age))
+        previous_height = self._previous(child, height)
+        previous_weight = self._previous(child, weight)
+
+        status = np.full(n, 'OK', dtype=object)
+        status_berat = np.full(n, None, dtype=object)
+        status_tinggi = np.full(n, None, dtype=object)
+        notes: List[Tuple[np.ndarray, List[str]]] = []
+
+        # Rule 1: Missing data check
+        rule = checked & ~has_weight
+        status_berat[rule] = 'Missing'
+        status[rule] = 'WARNING'
+        notes.append((rule, ['Data berat kosong'] * int(rule.sum())))
+
+        rule = checked & has_weight & ~has_height
+        status_tinggi[rule] = 'Missing'
+        status[rule] = 'WARNING'
+        notes.append((rule, ['Data tinggi kosong'] * int(rule.sum())))
+
+        # Rule 2: Missing month gap check
+        with np.errstate(invalid='ignore'):
+            gap = age - previous_age
+            rule = checked & has_age & ~np.isnan(previous_age) & (gap > 1)
+        status[rule] = 'WARNING'
+        notes.append((rule, [f'Gap data: tidak ada pengukuran untuk {int(months)} bulan'
+                             for months in (gap[rule] - 1).tolist()]))
+
+        # Rule 3: Height consistency check
+        with np.errstate(invalid='ignore'):
+            comparable = checked & has_height & ~np.isnan(previous_height)
+            decrease = comparable & (height < previous_height)
+            jump = comparable & ~decrease & (status == 'OK') & (height - previous_height > 5)
+        status[decrease] = 'ERROR'
+        notes.append((decrease, [f'Tinggi menurun: {before}cm → {after}cm'
+                                 for before, after in zip(previous_height[decrease].tolist(), height[decrease].tolist())]))
+        status[jump] = 'WARNING'
+        notes.append((jump, [f'Tinggi naik drastis: +{increase:.1f}cm'
+                             for increase in (height[jump] - previous_height[jump]).tolist()]))
+
+        # Rule 4: Weight anomaly check
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change = weight - previous_weight
+            loss_percentage = np.abs(change) / previous_weight * 100
+            rule = checked & has_weight & ~np.isnan(previous_weight) & (change < 0) & (loss_percentage > 10)
+        status[rule] = 'WARNING'
+        notes.append((rule, [f'Anomali berat: turun {loss:.1f}%' for loss in loss_percentage[rule].tolist()]))
+
+        # Rule 5: Rationality vs reference table
+        for metric, values, present, statuses, label, unit in (
+            ('BB', weight, has_weight, status_berat, 'Berat', 'kg'),
+            ('PB', height, has_height, status_tinggi, 'Tinggi', 'cm'),
+        ):
+            low, high = reference.lookup(metric, gender, age)
+            applies = checked & has_age & present
+            with np.errstate(invalid='ignore'):
+                outside = applies & ~np.isnan(low) & ~((low <= values) & (values <= high))
+            statuses[applies & ~outside] = 'Ideal'
+            statuses[outside] = 'Tidak Ideal'
+            rule = outside & (status == 'OK')
+            status[rule] = 'WARNING'
+            notes.append((rule, [f'{label} tidak ideal: {value}{unit} (rentang: {lo}-{hi}{unit})'
+                                 for value, lo, hi in zip(values[rule].tolist(), low[rule].tolist(), high[rule].tolist())]))
+
+        # Set default statuses if not already set
+        unset = pd.isna(status_berat)
+        status_berat[unset] = np.where(has_weight[unset], 'Ideal', 'Missing')
+        unset = pd.isna(status_tinggi)
+        status_tinggi[unset] = np.where(has_height[unset], 'Ideal', 'Missing')
+
+        keterangan = np.full(n, '', dtype=object)
+        for rule, messages in notes:
+            if not messages:
+                continue
+            current = keterangan[rule]
+            keterangan[rule] = [f'{existing}; {message}' if existing else message
+                                for existing, message in zip(current.tolist(), messages)]
+
+        # Rows without weight and height skip every other rule
+        status_berat[both_missing] = 'Missing'
+        status_tinggi[both_missing] = 'Missing'
+        status[both_missing] = 'WARNING'
+        keterangan[both_missing] = 'Data berat dan tinggi kosong'
+
+        df['status_berat'] = status_berat
+        df['status_tinggi'] = status_tinggi
+        df['validasi_input'] = status
+        df['keterangan'] = keterangan
+        return df
+
+    def _previous(self, child: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Last non-empty value among each row's earlier rows of the same child (NaN if none)
+        """
+        series = pd.Series(values)
+        return series.groupby(child).ffill().groupby(child).shift(1).to_numpy(dtype='float64')
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import socket
+from pathlib import Path
+from typing import Any, Dict, Optional
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerStats:
+    """
+    Cache statistics of the processes that run analyses.
+
+    Analyses run in pool or queue worker processes, so the column matcher and reference
+    cache counters of the API process say nothing. Each analysis process writes a
+    snapshot of its own counters to the shared file store after every job, and the API
+    sums the snapshots. Snapshots of processes that stopped reporting are dropped after
+    MAX_AGE_SECONDS.
+    """
+
+    MAX_AGE_SECONDS = 7 * 24 * 3600
+
+    def __init__(self, stats_dir: Optional[str] = None):
+        self.stats_dir = Path(stats_dir) if stats_dir else Path(settings.FILE_STORE) / "cache" / "worker_stats"
+
+    def publish(self):
+        """
+        Write this process' cache counters, called after each analysis
+        """
+        from .excel_parser import column_matcher
+        from .reference_cache import reference_cache
+
+        snapshot = {
+            'column_matcher': column_matcher.stats(),
+            'reference_cache': reference_cache.stats()
+        }
+        path = self.stats_dir / f"{socket.gethostname()}-{os.getpid()}.json"
+        try:
+            self.stats_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(snapshot))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write worker stats {path}: {e}")
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Counters summed over all analysis processes; sizes are the largest process cache
+        """
+        totals = {
+            'column_matcher': {'processes': 0, 'templates': 0, 'hits': 0, 'misses': 0},
+            'reference_cache': {'processes': 0, 'entries': 0, 'hits': 0, 'misses': 0}
+        }
+        if self.stats_dir.is_dir():
+            now = time.time()
+            for path in self.stats_dir.glob('*.json'):
+                try:
+                    if now - path.stat().st_mtime > self.MAX_AGE_SECONDS:
+                        path.unlink()
+                        continue
+                    snapshot = json.loads(path.read_text())
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping worker stats {path}: {e}")
+                    continue
+
+                for name, size_key in (('column_matcher', 'templates'), ('reference_cache', 'entries')):
+                    stats = snapshot.get(name, {})
+                    total = totals[name]
+                    total['processes'] += 1
+                    total[size_key] = max(total[size_key], stats.get(size_key, 0))
+                    total['hits'] += stats.get('hits', 0)
+                    total['misses'] += stats.get('misses', 0)
+
+        for total in totals.values():
+            lookups = total['hits'] + total['misses']
+            total['hit_rate'] = total['hits'] / lookups if lookups else 0.0
+        return totals
+
+
+# Global instance
+worker_stats = WorkerStats()
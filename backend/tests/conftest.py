@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+
+# Modules import each other flat (from config import settings), like when run from backend/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Never touch a real database or file store, settings are read on first import.
+# TEST_DATABASE_URL runs the suite on another database, e.g. an empty local PostgreSQL one:
+#   TEST_DATABASE_URL=postgresql+psycopg2://postgres@localhost/sitracking_test pytest tests
+_test_dir = tempfile.mkdtemp(prefix="sitracking-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{os.path.join(_test_dir, 'test.db')}")
+os.environ["FILE_STORE"] = os.path.join(_test_dir, "data")
+# FileManager (./data) and the log file (sitracking.log) are relative to the working directory
+os.chdir(_test_dir)
+
+
+# Imported once the environment above is set
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from database import Base, engine, SessionLocal
+from models import Job, Child, Measurement
+
+
+@pytest.fixture
+def make_job():
+    """
+    Create jobs with test defaults, make_job("job-2", default_gender="P").
+    The jobs, their children and measurements are removed after the test.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    def make(job_id: str = "job-1", **fields) -> Job:
+        return Job.create(**{
+            'default_gender': "L", 'lapangan_path': "lapangan.xlsx", 'referensi_path': "referensi.xlsx",
+            'analyzer_name': "Test", 'analyzer_institution': "Test", **fields, 'job_id': job_id
+        })
+
+    yield make
+    db = SessionLocal()
+    for model in (Measurement, Child, Job):
+        db.query(model).delete()
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Record the statements executed on the engine:
+        with count_queries() as statements: ...
+    statements is a list of (statement, parameters)
+    """
+    @contextmanager
+    def recording():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return recording
@@ -0,0 +1,82 @@
+"""
+Queueing a job waits for the SQLite writer lock off the event loop, other requests are
+served meanwhile.
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import main
+from database import IS_SQLITE, Base, engine, SessionLocal, serialized_writer
+from dependencies import get_current_active_user
+from models import Job, JobQueueEntry, MasterReference, User
+from services.executor import analysis_executor
+from services.job_queue import job_queue
+
+pytestmark = pytest.mark.skipif(not IS_SQLITE, reason="writer lock is only taken on SQLite")
+
+
+@pytest.fixture
+def user():
+    Base.metadata.create_all(bind=engine)
+    user = User.create(username="petugas", password_hash="-", full_name="Petugas")
+    reference = MasterReference.create(name="Referensi", file_path="referensi.xlsx", file_name="referensi.xlsx")
+    main.app.dependency_overrides[get_current_active_user] = lambda: user
+    yield user, reference
+    main.app.dependency_overrides.clear()
+    db = SessionLocal()
+    for model in (JobQueueEntry, Job, MasterReference, User):
+        db.query(model).delete()
+    db.commit()
+    db.close()
+
+
+def test_enqueue_waiting_for_the_writer_lock_does_not_block_requests(user, monkeypatch):
+    _, reference = user
+    monkeypatch.setattr(analysis_executor, 'backend', 'queue')
+    entered = threading.Event()
+    enqueue = job_queue.enqueue
+
+    def entering_enqueue(job_id):
+        entered.set()
+        return enqueue(job_id)
+
+    monkeypatch.setattr(job_queue, 'enqueue', entering_enqueue)
+
+    held, release = threading.Event(), threading.Event()
+
+    def hold_writer():
+        with serialized_writer():
+            held.set()
+            release.wait(10)
+
+    holder = threading.Thread(target=hold_writer)
+    holder.start()
+    assert held.wait(10)
+
+    async def requests():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            analyze = asyncio.create_task(client.post("/api/analyze", data={
+                'analyzer_name': "Test", 'analyzer_institution': "Test", 'master_reference_id': str(reference.id),
+                'jenis_kelamin_default': "L"
+            }, files={'lapangan': ("lapangan.xlsx", b"PK", "application/octet-stream")}))
+            assert await asyncio.to_thread(entered.wait, 10)
+
+            health = await client.get("/health")
+            analyze_pending = not analyze.done()
+            release.set()
+            return health, analyze_pending, await analyze
+
+    try:
+        health, analyze_pending, analyzed = asyncio.run(requests())
+    finally:
+        release.set()
+        holder.join()
+
+    assert health.status_code == 200
+    assert analyze_pending
+    assert analyzed.status_code == 200
+    assert job_queue.stats()["queued"] == 1
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+import main
+from database import SessionLocal, session_scope
+from models import Job, Child, Measurement
+from services.artifact_cache import ArtifactCache
+
+
+def test_concurrent_downloads_render_once(tmp_path):
+    cache = ArtifactCache(cache_dir=str(tmp_path), max_mb=10, max_age_hours=1)
+    calls = []
+
+    def render(path):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        with open(path, 'w') as f:
+            f.write('laporan')
+
+    async def download_many():
+        return await asyncio.gather(*(cache.get_or_render('job-1', 'laporan_validasi.txt', render)
+                                      for _ in range(5)))
+
+    paths = asyncio.run(download_many())
+
+    assert len(calls) == 1
+    assert set(paths) == {str(tmp_path / 'job-1' / 'laporan_validasi.txt')}
+    assert open(paths[0]).read() == 'laporan'
+
+    # Served from disk afterwards
+    asyncio.run(cache.get_or_render('job-1', 'laporan_validasi.txt', render))
+    assert len(calls) == 1
+    assert cache.stats()['renders'] == 1
+
+
+def test_failed_render_leaves_no_file(tmp_path):
+    cache = ArtifactCache(cache_dir=str(tmp_path), max_mb=10, max_age_hours=1)
+
+    def render(path):
+        with open(path, 'w') as f:
+            f.write('partial')
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_render('job-1', 'hasil_validasi.xlsx', render))
+    assert list(tmp_path.glob('*/*')) == []
+
+
+def test_evicts_expired_then_least_recently_used(tmp_path):
+    cache = ArtifactCache(cache_dir=str(tmp_path), max_mb=2.5 / 1024, max_age_hours=1)
+    now = time.time()
+    for job_id, age in (('old', 7200), ('a', 300), ('b', 200), ('c', 100)):
+        path = tmp_path / job_id / 'laporan_validasi.txt'
+        path.parent.mkdir()
+        path.write_bytes(b'x' * 1024)
+        os.utime(path, (now - age, now - age))
+
+    assert cache.evict() == 2
+    assert sorted(p.parent.name for p in tmp_path.glob('*/*')) == ['b', 'c']
+    assert not (tmp_path / 'old').exists()
+
+
+def test_lazy_render_does_not_use_the_request_session(make_job, tmp_path):
+    make_job().save_results({'total_anak': 1, 'total_records': 1, 'valid': 1, 'warning': 0, 'error': 0, 'missing': 0},
+                            excel_path=None, report_path=None)
+    db = SessionLocal()
+    child = Child(job_id="job-1", nama="Ani")
+    db.add(child)
+    db.flush()
+    db.add(Measurement(job_id="job-1", child_id=child.id, bulan="JANUARI", umur_bulan=12, berat=9.0, tinggi=75.0,
+                       status_berat='Ideal', status_tinggi='Ideal', validasi_input='OK'))
+    db.commit()
+    db.close()
+
+    with session_scope() as scope:
+        render = main.report_renderer(Job.get_by_id("job-1"), 'laporan_validasi.txt')
+        queries = scope.queries
+        # The middleware may close the request's session while the render runs
+        render(str(tmp_path / 'laporan_validasi.txt'))
+        assert scope.queries == queries
+
+    assert 'Ani' in (tmp_path / 'laporan_validasi.txt').read_text(encoding='utf-8')
+
+
+def test_invalidate_drops_artifacts_still_being_rendered(tmp_path):
+    cache = ArtifactCache(cache_dir=str(tmp_path), max_mb=10, max_age_hours=1)
+    rendering = threading.Event()
+
+    def render(path):
+        rendering.set()
+        time.sleep(0.2)
+        with open(path, 'w') as f:
+            f.write('laporan')
+
+    async def delete_during_render():
+        download = asyncio.create_task(cache.get_or_render('job-1', 'laporan_validasi.txt', render))
+        assert await asyncio.to_thread(rendering.wait, 10)
+        cache.invalidate('job-1')  # The job is deleted while its report renders
+        await download
+
+    asyncio.run(delete_during_render())
+    assert not (tmp_path / 'job-1').exists()
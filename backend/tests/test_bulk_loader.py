@@ -0,0 +1,69 @@
+"""
+Saving a batch round-trips every value: executemany on SQLite, COPY on PostgreSQL
+(run with TEST_DATABASE_URL, see conftest.py).
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import engine, SessionLocal
+from models import Child, Measurement
+from services.analyzer import GrowthAnalyzer
+from services.bulk_loader import uses_copy
+
+
+@pytest.fixture
+def db(make_job):
+    make_job()
+    db = SessionLocal()
+    yield db
+    db.rollback()
+    db.close()
+
+
+def test_batch_round_trips(db):
+    children = pd.DataFrame({
+        'nama_anak': ['Ani\tPutri', 'Budi \\ Santoso', 'Çitra'],
+        'nik': ['3201', None, ''],
+        'jenis_kelamin': ['P', 'L', None],
+        'tgl_lahir': pd.to_datetime(['2022-01-31', None, '2021-12-01'])
+    }, index=[5, 6, 7])
+    validated = pd.DataFrame({
+        'child_index': [5, 5, 7],
+        'bulan': ['JANUARI', 'FEBRUARI', 'JANUARI'],
+        'tgl_ukur': pd.to_datetime(['2023-01-05', None, '2023-01-06']),
+        'umur_bulan': pd.array([11, 12, None], dtype='Int64'),
+        'berat': [8.5, np.nan, 10.25],
+        'tinggi': [70.1, 71.0, np.nan],
+        'cara_ukur': ['Berdiri', None, 'Telentang'],
+        'status_berat': ['Ideal', 'Missing', 'Ideal'],
+        'status_tinggi': ['Ideal', 'Ideal', 'Missing'],
+        'validasi_input': ['OK', 'WARNING', 'ERROR'],
+        'keterangan': ['', 'Baris 1\nBaris 2\r', '\\N bukan null']
+    })
+
+    assert uses_copy(db) == (engine.dialect.name == "postgresql")
+    GrowthAnalyzer()._save_batch(db, "job-1", children, validated)
+    db.commit()
+
+    saved_children = db.query(Child).filter(Child.job_id == "job-1").order_by(Child.id).all()
+    assert [(c.nama, c.nik, c.jenis_kelamin, c.tgl_lahir) for c in saved_children] == [
+        ('Ani\tPutri', '3201', 'P', date(2022, 1, 31)),
+        ('Budi \\ Santoso', None, 'L', None),
+        ('Çitra', '', None, date(2021, 12, 1))
+    ]
+
+    saved = db.query(Measurement).filter(Measurement.job_id == "job-1").order_by(Measurement.id).all()
+    assert [m.child_id for m in saved] == [saved_children[0].id, saved_children[0].id, saved_children[2].id]
+    assert [(m.bulan, m.tgl_ukur, m.umur_bulan, m.berat, m.tinggi, m.cara_ukur) for m in saved] == [
+        ('JANUARI', date(2023, 1, 5), 11, 8.5, 70.1, 'Berdiri'),
+        ('FEBRUARI', None, 12, None, 71.0, None),
+        ('JANUARI', date(2023, 1, 6), None, 10.25, None, 'Telentang')
+    ]
+    assert [(m.status_berat, m.status_tinggi, m.validasi_input, m.keterangan) for m in saved] == [
+        ('Ideal', 'Ideal', 'OK', ''),
+        ('Missing', 'Ideal', 'WARNING', 'Baris 1\nBaris 2\r'),
+        ('Ideal', 'Missing', 'ERROR', '\\N bukan null')
+    ]
@@ -0,0 +1,49 @@
+"""
+A streamed workbook whose later chunk fails to parse fails the job like an invalid file,
+without a retry.
+"""
+import asyncio
+
+import pytest
+from openpyxl import Workbook
+
+from config import settings
+from database import SessionLocal
+from models import Job, Child, Measurement
+from services.analyzer import FieldDataError, GrowthAnalyzer, TransientAnalysisError
+
+
+@pytest.fixture
+def files(tmp_path):
+    reference = Workbook()
+    reference.active.append(["Umur", "BB Ideal (L)", "PB Ideal (L)", "BB Ideal (P)", "PB Ideal (P)"])
+    for age in range(25):
+        reference.active.append([age, "5.0-12.0", "60.0-90.0", "5.0-12.0", "60.0-90.0"])
+    reference.save(tmp_path / "referensi.xlsx")
+
+    lapangan = Workbook()
+    lapangan.active.append(["Nama Anak", "Jenis Kelamin", "JANUARI_UMUR", "JANUARI_BERAT", "JANUARI_TINGGI"])
+    for number in range(5):
+        lapangan.active.append([f"Anak {number}", "L", 12, 9.0, 75.0])
+    lapangan.active.append(["Anak 5", "L", 1e20, 9.0, 75.0])  # Age out of range, in the second chunk
+    lapangan.save(tmp_path / "lapangan.xlsx")
+    return str(tmp_path / "lapangan.xlsx"), str(tmp_path / "referensi.xlsx")
+
+
+def test_bad_row_in_a_later_chunk_fails_the_job(make_job, files, monkeypatch):
+    make_job()
+    monkeypatch.setattr(settings, 'STREAMING_PARSE_THRESHOLD_MB', 0)
+    monkeypatch.setattr(settings, 'STREAMING_CHUNK_ROWS', 3)
+    lapangan_path, referensi_path = files
+
+    with pytest.raises(FieldDataError) as raised:
+        asyncio.run(GrowthAnalyzer().run_analysis("job-1", lapangan_path, referensi_path, "L"))
+
+    assert not isinstance(raised.value, TransientAnalysisError)
+    assert str(raised.value).startswith("Format file data lapangan tidak valid: ")
+    failed = Job.get_by_id("job-1")
+    assert failed.status == "failed" and failed.error_message == str(raised.value)
+    # The first chunk was saved before the error, and removed with the failed run
+    db = SessionLocal()
+    assert db.query(Measurement).count() == db.query(Child).count() == 0
+    db.close()
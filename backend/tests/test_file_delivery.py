@@ -0,0 +1,137 @@
+import asyncio
+import gzip
+import os
+
+import pytest
+from fastapi import Request
+
+from services.file_delivery import FileDelivery
+
+
+def download(delivery, path, **headers):
+    """
+    Run the download response through ASGI, returning (status, headers, body)
+    """
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': '/api/download/laporan_validasi.txt', 'query_string': b'',
+        'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]
+    }
+    messages = []
+    received = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        response = await delivery.response(Request(scope), str(path), 'laporan_validasi.txt', 'text/plain')
+        await response(scope, receive, send)
+
+    asyncio.run(run())
+    start = messages[0]
+    body = b''.join(m.get('body', b'') for m in messages[1:])
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body
+
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / 'laporan_validasi.txt'
+    path.write_bytes(('LAPORAN VALIDASI DATA\n' * 2000).encode())
+    return path
+
+
+def test_etag_and_not_modified(report):
+    delivery = FileDelivery()
+    status, headers, body = download(delivery, report)
+    assert status == 200 and body == report.read_bytes()
+    etag = headers['etag']
+
+    status, headers, body = download(delivery, report, if_none_match=etag)
+    assert status == 304 and body == b'' and headers['etag'] == etag
+
+    # Same content elsewhere, same ETag; other content, other ETag
+    copy = report.with_name('copy.txt')
+    copy.write_bytes(report.read_bytes())
+    assert download(delivery, copy)[1]['etag'] == etag
+    copy.write_bytes(b'lain')
+    assert download(delivery, copy)[1]['etag'] != etag
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'zstd'])
+def test_precompressed_variant(report, encoding):
+    delivery = FileDelivery()
+    if encoding not in delivery.encodings:
+        pytest.skip(f'{encoding} not available')
+
+    status, headers, body = download(delivery, report, accept_encoding=f'{encoding}, br;q=0.5')
+    assert status == 200 and headers['content-encoding'] == encoding
+    assert headers['vary'] == 'Accept-Encoding'
+    if encoding == 'gzip':
+        assert gzip.decompress(body) == report.read_bytes()
+    else:
+        import zstandard
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(body) == report.read_bytes()
+    assert len(body) < report.stat().st_size / 10
+
+    plain_etag = download(delivery, report)[1]['etag']
+    assert headers['etag'] != plain_etag
+    assert download(delivery, report, accept_encoding=encoding, if_none_match=headers['etag'])[0] == 304
+
+    # Rewriting the artifact rebuilds the variant
+    report.write_bytes(b'baru')
+    os.utime(report, ns=(1, 1))
+    status, headers, body = download(delivery, report, accept_encoding=encoding)
+    assert status == 200 and headers['etag'] != plain_etag
+
+
+def test_preference_and_quality(report):
+    delivery = FileDelivery()
+    delivery.encodings = ('zstd', 'gzip')
+    assert delivery.choose_encoding('gzip, deflate, br') == 'gzip'
+    assert delivery.choose_encoding('gzip;q=0.5, zstd') == 'zstd'
+    assert delivery.choose_encoding('zstd;q=0.2, gzip;q=0.8') == 'gzip'
+    assert delivery.choose_encoding('gzip;q=0, identity') is None
+    assert delivery.choose_encoding('') is None
+
+
+def test_byte_ranges(report):
+    delivery = FileDelivery()
+    content = report.read_bytes()
+    etag = download(delivery, report)[1]['etag']
+
+    status, headers, body = download(delivery, report, range='bytes=10-29')
+    assert status == 206 and body == content[10:30]
+    assert headers['content-range'] == f'bytes 10-29/{len(content)}'
+
+    assert download(delivery, report, range='bytes=-5')[2] == content[-5:]
+    assert download(delivery, report, range='bytes=40000-')[2] == content[40000:]
+    assert download(delivery, report, range=f'bytes={len(content)}-')[0] == 416
+
+    # Several ranges or a stale If-Range get the whole file
+    assert download(delivery, report, range='bytes=0-1,5-6')[0] == 200
+    assert download(delivery, report, range='bytes=0-1', if_range='"lama"')[0] == 200
+    assert download(delivery, report, range='bytes=0-1', if_range=etag)[0] == 206
+
+
+def test_x_accel_redirect(report, monkeypatch):
+    from config import settings
+    monkeypatch.setattr(settings, 'FILE_STORE', str(report.parent.parent))
+    monkeypatch.setattr(settings, 'DOWNLOAD_DELIVERY', 'x-accel')
+    delivery = FileDelivery()
+
+    status, headers, body = download(delivery, report)
+    assert status == 200 and body == b''
+    assert headers['x-accel-redirect'] == f'/protected-files/{report.parent.name}/laporan_validasi.txt'
+    assert headers['content-disposition'] == 'attachment; filename="laporan_validasi.txt"'
+    # nginx picks the variant with gzip_static
+    assert gzip.decompress((report.parent / 'laporan_validasi.txt.gz').read_bytes()) == report.read_bytes()
+
+    # Files outside the store are served by the app
+    monkeypatch.setattr(settings, 'FILE_STORE', str(report.parent / 'lain'))
+    status, headers, body = download(delivery, report)
+    assert 'x-accel-redirect' not in headers and body == report.read_bytes()
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import Base, engine, SessionLocal
+from models import Job, JobQueueEntry, Child
+from services.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue():
+    Base.metadata.create_all(bind=engine)
+    yield JobQueue(lease_seconds=60, max_attempts=3, backoff_seconds=0)
+    db = SessionLocal()
+    try:
+        for model in (JobQueueEntry, Child, Job):
+            db.query(model).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def create_job(job_id: str):
+    Job.create(job_id=job_id, default_gender="L", lapangan_path="lapangan.xlsx", referensi_path="referensi.xlsx",
+               analyzer_name="Test", analyzer_institution="Test")
+
+
+def expire_lease(entry_id: int):
+    db = SessionLocal()
+    try:
+        db.query(JobQueueEntry).filter(JobQueueEntry.id == entry_id).update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+    finally:
+        db.close()
+
+
+def entry_state(entry_id: int):
+    db = SessionLocal()
+    try:
+        entry = db.query(JobQueueEntry).filter(JobQueueEntry.id == entry_id).one()
+        return entry.status, entry.lease_owner
+    finally:
+        db.close()
+
+
+def test_owner_completes_claimed_entry(queue):
+    create_job("job-1")
+    entry_id = queue.enqueue("job-1")
+
+    claimed = queue.claim("worker-a")
+    assert claimed.entry_id == entry_id and claimed.worker_id == "worker-a"
+    assert queue.holds_lease(entry_id, "worker-a")
+    assert queue.complete(claimed)
+    assert entry_state(entry_id) == ("done", None)
+
+
+def test_lost_lease_cannot_complete_or_fail_reclaimed_entry(queue):
+    create_job("job-1")
+    entry_id = queue.enqueue("job-1")
+    stale = queue.claim("worker-a")
+
+    expire_lease(entry_id)
+    assert queue.reclaim_expired() == 1
+    current = queue.claim("worker-b")
+    assert current.attempts == 2
+
+    # The worker that lost the lease changes nothing
+    assert not queue.renew(entry_id, "worker-a")
+    assert not queue.holds_lease(entry_id, "worker-a")
+    assert not queue.complete(stale)
+    assert not queue.fail(stale, "boom", retry=False)
+    assert entry_state(entry_id) == ("running", "worker-b")
+    assert Job.get_by_id("job-1").status == "processing"
+
+    assert queue.complete(current)
+    assert entry_state(entry_id) == ("done", None)
+
+
+def test_retry_resets_partial_results_only_for_owner(queue):
+    create_job("job-1")
+    entry_id = queue.enqueue("job-1")
+    claimed = queue.claim("worker-a")
+
+    db = SessionLocal()
+    db.add(Child(job_id="job-1", nama="partial"))
+    db.commit()
+    db.close()
+
+    assert not queue.fail(claimed._replace(worker_id="worker-b"), "boom", retry=True)
+    assert SessionLocal().query(Child).filter(Child.job_id == "job-1").count() == 1
+
+    assert queue.fail(claimed, "boom", retry=True)
+    assert entry_state(entry_id) == ("queued", None)
+    assert SessionLocal().query(Child).filter(Child.job_id == "job-1").count() == 0
+
+
+def test_reclaim_skips_renewed_lease(queue):
+    create_job("job-1")
+    entry_id = queue.enqueue("job-1")
+    claimed = queue.claim("worker-a")
+
+    expire_lease(entry_id)
+    assert queue.renew(entry_id, "worker-a")
+    assert queue.reclaim_expired() == 0
+    assert queue.complete(claimed)
+
+
+def test_permanent_failure_marks_job_failed(queue):
+    create_job("job-1")
+    entry_id = queue.enqueue("job-1")
+    claimed = queue.claim("worker-a")
+
+    assert queue.fail(claimed, "Format tidak valid", retry=False)
+    assert entry_state(entry_id) == ("failed", None)
+    job = Job.get_by_id("job-1")
+    assert job.status == "failed" and job.error_message == "Format tidak valid"
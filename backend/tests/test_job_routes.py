@@ -0,0 +1,41 @@
+import asyncio
+
+import httpx
+
+import main
+from dependencies import get_current_active_user
+from models import Job, User
+from services.artifact_cache import artifact_cache
+
+
+def test_delete_job_removes_reports_variants_and_cached_artifacts(make_job, tmp_path):
+    reports = {name: tmp_path / name for name in ('hasil_validasi.xlsx', 'laporan_validasi.txt', 'konteks_lengkap.txt')}
+    for path in reports.values():
+        path.write_text('laporan')
+    for name in ('laporan_validasi.txt', 'konteks_lengkap.txt'):
+        for suffix in ('.gz', '.zst'):
+            (tmp_path / (name + suffix)).write_bytes(b'compressed')
+    make_job().save_results({'total_anak': 0}, excel_path=str(reports['hasil_validasi.xlsx']),
+                            report_path=str(reports['laporan_validasi.txt']),
+                            context_path=str(reports['konteks_lengkap.txt']))
+    cached = artifact_cache.path_for("job-1", 'laporan_validasi.txt')
+    cached.parent.mkdir(parents=True)
+    cached.write_text('laporan')
+
+    async def delete():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.delete("/auth/jobs/job-1")
+
+    main.app.dependency_overrides[get_current_active_user] = lambda: User(id=1, username="petugas", is_active=True)
+    try:
+        response = asyncio.run(delete())
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()['files_deleted'] == ["Excel report", "Text report", "Context report"]
+    assert list(tmp_path.iterdir()) == []
+    assert not cached.parent.exists()
+    assert Job.get_by_id("job-1") is None
+
@@ -0,0 +1,72 @@
+import csv
+import io
+from datetime import date
+
+import pytest
+
+from database import SessionLocal
+from models import Child, Measurement
+from services.measurement_export import MeasurementExporter, ExportUnavailableError
+
+
+@pytest.fixture
+def jobs(make_job):
+    for job_id in ('job-1', 'job-2', 'job-3'):
+        make_job(job_id)
+
+    db = SessionLocal()
+    for job_id in ('job-1', 'job-2', 'job-3'):
+        for number in range(3):
+            child = Child(job_id=job_id, nama=f"{job_id} anak {number}", nik=None if number else '3507',
+                          tgl_lahir=date(2022, 1, number + 1), jenis_kelamin='L')
+            db.add(child)
+            db.flush()
+            for month, bulan in enumerate(('JANUARI', 'FEBRUARI')):
+                db.add(Measurement(job_id=job_id, child_id=child.id, bulan=bulan, tgl_ukur=date(2023, month + 1, 10),
+                                   umur_bulan=12 + month, berat=9.5 if month else None, tinggi=75.0,
+                                   status_berat='Ideal' if month else 'Missing', status_tinggi='Ideal',
+                                   validasi_input='OK' if month else 'WARNING', keterangan='Data BB kosong'))
+    db.commit()
+    db.close()
+
+
+def export(fmt, job_ids, chunk_rows=4):
+    exporter = MeasurementExporter(chunk_rows=chunk_rows)
+    exporter.check_format(fmt)
+    return list(exporter.iter_export(job_ids, fmt))
+
+
+def test_csv_export(jobs):
+    chunks = export('csv', ['job-1', 'job-3'])
+    rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+
+    assert len(rows) == 12 and len(chunks) == 3
+    assert {row['job_id'] for row in rows} == {'job-1', 'job-3'}
+    assert rows[0]['nik'] == '3507' and rows[0]['berat'] == '' and rows[0]['validasi_input'] == 'WARNING'
+    assert [int(row['measurement_id']) for row in rows] == sorted(int(row['measurement_id']) for row in rows)
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_columnar_export(jobs, fmt):
+    pa = pytest.importorskip('pyarrow')
+    data = b''.join(export(fmt, ['job-2']))
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(io.BytesIO(data))
+        assert parquet.metadata.num_row_groups == 2
+        table = parquet.read()
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+
+    assert table.num_rows == 6
+    assert table.schema.field('tgl_ukur').type == pa.date32()
+    assert table.column('umur_bulan').to_pylist() == [12, 13] * 3
+    assert table.column('berat').null_count == 3
+    assert set(table.column('job_id').to_pylist()) == {'job-2'}
+
+
+def test_empty_and_unknown_format(jobs):
+    assert b''.join(export('csv', [])).decode().startswith('job_id,child_id')
+    with pytest.raises(ExportUnavailableError):
+        MeasurementExporter().check_format('xlsx')
@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+
+from database import SessionLocal
+from models import Child, Measurement
+from schemas import JobStatus
+
+
+@pytest.fixture
+def job(make_job):
+    job = make_job()
+    job.save_results({'total_anak': 4, 'total_records': 12, 'valid': 6, 'warning': 6, 'error': 0, 'missing': 6},
+                     excel_path=None, report_path=None)
+
+    db = SessionLocal()
+    # Children inserted out of name order, measurements interleaved across children
+    children = [Child(job_id="job-1", nama=nama, tgl_lahir=date(2022, 1, 1)) for nama in ('Dewi', 'Ani', 'Citra', 'Budi')]
+    db.add_all(children)
+    db.flush()
+    for bulan in ('JANUARI', 'FEBRUARI', 'MARET'):
+        for child in reversed(children):
+            ok = bulan != 'FEBRUARI'
+            db.add(Measurement(job_id="job-1", child_id=child.id, bulan=bulan, umur_bulan=12, berat=9.0, tinggi=75.0,
+                               status_berat='Ideal' if ok else 'Missing', status_tinggi='Ideal',
+                               validasi_input='OK' if ok else 'WARNING'))
+    db.commit()
+    db.close()
+    return job
+
+
+def all_pages(limit, **filters):
+    pages, after = [], None
+    while True:
+        rows = Measurement.get_page("job-1", after=after, limit=limit, **filters)
+        if not rows:
+            return pages
+        pages.append(rows)
+        after = (rows[-1][0].child_id, rows[-1][0].id)
+
+
+def test_keyset_pages_cover_job_in_child_order(job):
+    pages = all_pages(limit=5)
+    rows = [row for page in pages for row in page]
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    keys = [(m.child_id, m.id) for m, _ in rows]
+    assert keys == sorted(keys) and len(set(keys)) == 12
+    assert [nama for _, nama in rows[:3]] == ['Dewi'] * 3
+
+
+def test_filters(job):
+    rows = [row for page in all_pages(limit=2, validasi_input='WARNING') for row in page]
+    assert len(rows) == 4 and {m.bulan for m, _ in rows} == {'FEBRUARI'}
+
+    rows = Measurement.get_page("job-1", bulan='maret', nama='bud')
+    assert [(nama, m.bulan) for m, nama in rows] == [('Budi', 'MARET')]
+
+    assert Measurement.get_page("job-1", status_berat='Missing', status_tinggi='Ideal', limit=50)[0][0].bulan == 'FEBRUARI'
+
+
+def test_preview_is_ordered_single_query(job, count_queries):
+    with count_queries() as statements:
+        status = JobStatus.from_job(job)
+
+    assert len(statements) == 1
+    assert [row.nama_anak for row in status.preview] == ['Dewi'] * 3 + ['Ani'] * 3 + ['Citra'] * 3 + ['Budi']
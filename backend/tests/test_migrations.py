@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from database import Base
+import models  # noqa: F401
+from migrations import applied_versions, create_tables, discover, run_migrations
+from migrations.v0004_lookup_indexes import INDEXES
+
+
+def indexes(engine):
+    inspector = inspect(engine)
+    return {(index['name'], tuple(index['column_names']))
+            for table in ('jobs', 'children', 'measurements') for index in inspector.get_indexes(table)}
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """
+    Database as created before the migrations: no indexes, no later jobs columns
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for name, _, _ in INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+        for column in ('context_path', 'error_message', 'report_timings_json'):
+            connection.execute(text(f"ALTER TABLE jobs DROP COLUMN {column}"))
+        connection.execute(text("INSERT INTO jobs (id, default_gender, analyzer_name, analyzer_institution) "
+                                "VALUES ('lama', 'L', 'a', 'b')"))
+    yield engine
+    engine.dispose()
+
+
+def test_upgrades_legacy_database(legacy_engine, tmp_path):
+    versions = [migration.version for migration in discover()]
+    assert versions == sorted(versions) and versions[:4] == [1, 2, 3, 4]
+    assert applied_versions(legacy_engine) == []
+
+    assert run_migrations(legacy_engine) == versions
+    assert applied_versions(legacy_engine) == versions
+    assert run_migrations(legacy_engine) == []
+
+    columns = {column['name'] for column in inspect(legacy_engine).get_columns('jobs')}
+    assert {'context_path', 'error_message', 'report_timings_json'} <= columns
+    with legacy_engine.connect() as connection:
+        assert connection.execute(text("SELECT id FROM jobs")).scalar() == 'lama'
+
+    # Same indexes as a database created from the models
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(bind=fresh)
+    assert indexes(legacy_engine) == indexes(fresh)
+    assert {(name, tuple(columns)) for name, _, columns in INDEXES} <= indexes(fresh)
+
+    # On a fresh database the migrations are only recorded
+    assert run_migrations(fresh) == versions
+    assert indexes(fresh) == indexes(legacy_engine)
+    fresh.dispose()
+
+
+def test_tables_created_by_another_process_after_the_check(tmp_path, monkeypatch):
+    """
+    The API and the worker start together: both see no table, one of them creates it first
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'started.db'}")
+    create_tables(Base.metadata, engine)
+    assert run_migrations(engine)
+
+    has_table = engine.dialect.has_table
+    missed = set()
+
+    def check_too_early(connection, table_name, *args, **kwargs):
+        if table_name not in missed:
+            missed.add(table_name)
+            return False  # Created by the other process right after this check
+        return has_table(connection, table_name, *args, **kwargs)
+
+    monkeypatch.setattr(engine.dialect, 'has_table', check_too_early)
+    create_tables(Base.metadata, engine)
+    assert run_migrations(engine) == []
+    assert {'jobs', 'schema_migrations'} <= missed
+    engine.dispose()
+
@@ -0,0 +1,99 @@
+"""
+The hot queries must use the lookup indexes (migrations/v0004_lookup_indexes.py)
+instead of scanning tables or sorting.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from database import IS_SQLITE, engine, SessionLocal
+from models import Job, Child, Measurement
+from services.measurement_export import MeasurementExporter
+from services.report_data import load_report_data
+
+pytestmark = pytest.mark.skipif(not IS_SQLITE, reason="SQLite query plans")
+
+
+@pytest.fixture
+def jobs(make_job):
+    for job_id in ('job-1', 'job-2'):
+        make_job(job_id)
+    db = SessionLocal()
+    for job_id in ('job-1', 'job-2'):
+        for number in range(5):
+            child = Child(job_id=job_id, nama=f"anak {number}", tgl_lahir=date(2022, 1, 1))
+            db.add(child)
+            db.flush()
+            for bulan in ('JANUARI', 'FEBRUARI'):
+                db.add(Measurement(job_id=job_id, child_id=child.id, bulan=bulan, umur_bulan=12,
+                                   status_berat='Ideal', status_tinggi='Ideal', validasi_input='OK'))
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def query_plans(count_queries):
+    """
+    EXPLAIN QUERY PLAN details of the SELECT statements executed by run():
+        query_plans(run)
+    """
+    def explain(run):
+        with count_queries() as statements:
+            run()
+        selects = [(statement, parameters) for statement, parameters in statements
+                   if statement.lstrip().upper().startswith('SELECT')]
+
+        assert selects
+        plans = []
+        with engine.connect() as connection:
+            for statement, parameters in selects:
+                rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                plans.append(' | '.join(row[3] for row in rows))
+        return plans
+
+    return explain
+
+
+def assert_plan(plan, *expected):
+    for detail in expected:
+        assert detail in plan, plan
+    assert 'SCAN measurements' not in plan and 'SCAN children' not in plan, plan
+
+
+def test_report_query_reads_job_in_id_order(jobs, query_plans):
+    plan, = query_plans(lambda: load_report_data('job-1'))
+    assert_plan(plan, 'measurements USING INDEX ix_measurements_job_id (job_id=?)')
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_measurement_page_seeks_by_child(jobs, query_plans):
+    plans = query_plans(lambda: (Measurement.get_page('job-1', limit=10),
+                                 Measurement.get_page('job-1', after=(3, 5), limit=10)))
+    first, later = plans
+    assert_plan(first, 'USING INDEX ix_measurements_job_id_child_id (job_id=?)')
+    # Later pages seek to the cursor instead of reading the job from the start
+    assert_plan(later, 'USING INDEX ix_measurements_job_id_child_id (job_id=? AND child_id>?)')
+    assert 'TEMP B-TREE' not in first + later
+
+
+def test_export_chunks_use_job_index(jobs, query_plans):
+    plans = query_plans(lambda: list(MeasurementExporter(chunk_rows=4).iter_chunks(['job-1', 'job-2'])))
+    for plan in plans:
+        assert_plan(plan, 'USING INDEX ix_measurements_job_id (job_id=? AND rowid>?)')
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_job_queries(jobs, query_plans):
+    plans = query_plans(lambda: (
+        Job.get_all(limit=10),
+        SessionLocal().query(Job).filter(Job.referensi_path == 'referensi.xlsx', Job.id != 'job-1').count(),
+        SessionLocal().query(Job.id).filter(Job.status == 'completed', Job.created_at >= date(2024, 1, 1))
+        .order_by(Job.created_at).all(),
+        SessionLocal().execute(select(func.count()).select_from(Child).where(Child.job_id == 'job-1')).scalar()
+    ))
+    listing, sharing, ranged, children = plans
+    assert 'SCAN jobs USING INDEX ix_jobs_created_at' in listing and 'TEMP B-TREE' not in listing
+    assert 'USING INDEX ix_jobs_referensi_path (referensi_path=?)' in sharing
+    assert 'USING INDEX ix_jobs_status_created_at (status=? AND created_at>?)' in ranged
+    assert 'USING COVERING INDEX ix_children_job_id (job_id=?)' in children
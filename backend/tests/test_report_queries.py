@@ -0,0 +1,62 @@
+"""
+Reports are rendered from the in-memory ReportData and must not query the database.
+"""
+import asyncio
+
+import pandas as pd
+import pytest
+
+from config import settings
+from services.growth_reference import GrowthReference
+from services.report_data import ReportData, build_child_results, count_statuses
+from services.report_generator import ReportGenerator
+from services.validation_engine import MeasurementValidator
+
+
+@pytest.fixture
+def report_data() -> ReportData:
+    children = pd.DataFrame({
+        'nama_anak': ['Ani', 'Budi', 'Citra'],
+        'nik': ['3507010101010001', None, '3507010101010003'],
+        'jenis_kelamin': ['P', 'L', None],
+        'tgl_lahir': pd.to_datetime(['2022-01-05', None, '2021-11-20'])
+    })
+    measurements = pd.DataFrame({
+        'child_index': [0, 0, 0, 1, 1, 2],
+        'bulan': ['JANUARI', 'FEBRUARI', 'APRIL', 'JANUARI', 'FEBRUARI', 'JANUARI'],
+        'tgl_ukur': pd.to_datetime(['2023-01-10', '2023-02-10', '2023-04-10', '2023-01-12', None, '2023-01-15']),
+        'umur_bulan': pd.array([12, 13, 15, 6, None, 14], dtype='Int64'),
+        'berat': [9.0, 7.5, 8.0, None, 7.0, 9.5],
+        'tinggi': [75.0, 74.0, 82.0, 65.0, None, 76.0],
+        'cara_ukur': ['Berdiri', 'Berdiri', None, 'Terlentang', None, 'Berdiri']
+    })
+    reference = GrowthReference({
+        'BB_L': {age: (5.0, 12.0) for age in range(25)},
+        'PB_L': {age: (60.0, 90.0) for age in range(25)},
+        'BB_P': {age: (5.0, 12.0) for age in range(25)},
+        'PB_P': {age: (60.0, 90.0) for age in range(25)},
+    })
+    validated = MeasurementValidator().validate(children, measurements, reference, 'L')
+    return ReportData(tuple(build_child_results(children, validated)), count_statuses(validated))
+
+
+@pytest.mark.parametrize('excel_mode', ['streaming', 'standard'])
+def test_reports_render_without_queries(report_data, count_queries, tmp_path, monkeypatch, excel_mode):
+    monkeypatch.setattr(settings, 'EXCEL_REPORT_MODE', excel_mode)
+    summary = {'total_anak': 3, 'total_records': 6, 'valid': 1, 'warning': 4, 'error': 1, 'missing': 3}
+    generator = ReportGenerator()
+
+    async def render_all():
+        await asyncio.gather(
+            generator.generate_excel_report(str(tmp_path / 'hasil_validasi.xlsx'), report_data, 'L'),
+            generator.generate_text_report(str(tmp_path / 'laporan_validasi.txt'), report_data, summary),
+            generator.generate_context_report(str(tmp_path / 'konteks_lengkap.txt'), report_data, summary, 'L')
+        )
+
+    with count_queries() as statements:
+        asyncio.run(render_all())
+
+    assert statements == []
+    for name in ('hasil_validasi.xlsx', 'laporan_validasi.txt', 'konteks_lengkap.txt'):
+        assert (tmp_path / name).stat().st_size > 0
+    assert 'Tinggi menurun' in (tmp_path / 'konteks_lengkap.txt').read_text(encoding='utf-8')
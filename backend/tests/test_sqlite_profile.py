@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+from sqlalchemy import text
+
+from database import IS_SQLITE, SerializedWriter, engine, fcntl, serialized_writer, sqlite_pragmas
+
+pytestmark = pytest.mark.skipif(not IS_SQLITE, reason="SQLite connection profile")
+
+
+def test_every_connection_uses_the_profile():
+    expected = dict(sqlite_pragmas())
+    with engine.connect() as connection:
+        values = {name: connection.execute(text(f"PRAGMA {name}")).scalar() for name in expected}
+
+    assert values['journal_mode'] == 'wal'
+    assert values['synchronous'] == 1  # NORMAL
+    assert values['busy_timeout'] == expected['busy_timeout'] == 30000
+    assert values['cache_size'] == expected['cache_size'] == -64 * 1024
+    assert values['mmap_size'] == expected['mmap_size']
+
+
+def test_writer_lock_file_sits_next_to_the_database():
+    assert serialized_writer.lock_path == os.path.abspath(engine.url.database) + ".writer.lock"
+
+
+def _hold_lock(lock_path, held, seconds):
+    writer = SerializedWriter(lock_path[:-len(".writer.lock")])
+    with writer():
+        held.set()
+        time.sleep(seconds)
+
+
+@pytest.mark.skipif(fcntl is None, reason="lock file needs fcntl")
+def test_writers_are_serialized_across_processes(tmp_path):
+    writer = SerializedWriter(str(tmp_path / "db.sqlite"))
+    context = multiprocessing.get_context("fork")
+    held = context.Event()
+    process = context.Process(target=_hold_lock, args=(writer.lock_path, held, 0.5))
+    process.start()
+    try:
+        assert held.wait(10)
+        start = time.perf_counter()
+        with writer():
+            waited = time.perf_counter() - start
+    finally:
+        process.join()
+
+    assert waited > 0.3
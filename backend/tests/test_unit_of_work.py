@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from database import Base, engine, SessionLocal, SessionScopeMiddleware, session_scope, unit_of_work
+from models import Job, JobQueueEntry, MasterReference
+from services.job_queue import JobQueue
+
+
+@pytest.fixture
+def job():
+    Base.metadata.create_all(bind=engine)
+    reference = MasterReference.create(name="Referensi", file_path="referensi.xlsx", file_name="referensi.xlsx")
+    job = Job.create(job_id="job-1", default_gender="L", lapangan_path="lapangan.xlsx", referensi_path="referensi.xlsx",
+                     analyzer_name="Test", analyzer_institution="Test", master_reference_id=reference.id)
+    yield job
+    db = SessionLocal()
+    for model in (JobQueueEntry, Job, MasterReference):
+        db.query(model).delete()
+    db.commit()
+    db.close()
+
+
+def test_helpers_share_the_scope_session(job):
+    with session_scope() as scope:
+        first = Job.get_by_id("job-1")
+        assert Job.get_by_id("job-1") is first
+        assert [listed.id for listed in Job.get_all()] == ["job-1"]
+        # Still attached: relationships load after the helper returned
+        assert first.master_reference.name == "Referensi"
+        first.save_results({'total_anak': 0}, excel_path=None, report_path=None)
+
+    assert scope.sessions == 1
+    assert scope.queries == 5  # 3 lookups, the lazy load and the commit's UPDATE
+    assert Job.get_by_id("job-1").status == "completed"
+
+
+def test_eager_loading_needs_no_extra_query(job):
+    with session_scope() as scope:
+        loaded = Job.get_by_id("job-1", with_relations=True)
+        queries = scope.queries
+        assert loaded.master_reference.name == "Referensi"
+        assert loaded.creator is None
+        assert scope.queries == queries == 1
+
+
+def test_queue_operations_commit_on_their_own(job):
+    queue = JobQueue(max_attempts=2)
+    with session_scope() as scope:
+        with unit_of_work() as db:
+            db.get(Job, "job-1").analyzer_name = "Belum disimpan"
+            queue.enqueue("job-1")
+            # The queue's commit did not flush the request's pending change
+            db.rollback()
+    assert scope.sessions == 2
+    assert queue.stats()["queued"] == 1
+    assert Job.get_by_id("job-1").analyzer_name == "Test"
+
+
+def test_scope_ends_with_its_session():
+    with session_scope() as scope:
+        with unit_of_work() as db:
+            pass
+    assert scope.session is None and not scope.active
+    with unit_of_work() as own:
+        assert own is not db
+
+
+def test_middleware_reports_counts(job):
+    async def app(scope, receive, send):
+        Job.get_by_id("job-1").master_reference
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    asyncio.run(SessionScopeMiddleware(app)({"type": "http"}, receive, send))
+    headers = dict(messages[0]["headers"])
+    assert headers[b"x-db-sessions"] == b"1" and headers[b"x-db-queries"] == b"2"
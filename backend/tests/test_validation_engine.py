@@ -0,0 +1,253 @@
+"""
+MeasurementValidator must give the same result as the original per-child validation
+loop, which is kept below as the reference implementation.
+"""
+import random
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.growth_reference import GrowthReference
+from services.validation_engine import MeasurementValidator
+
+REFERENCE = {
+    'BB_L': {age: (3.0 + age * 0.5, 5.0 + age * 0.6) for age in range(0, 25)},
+    'PB_L': {age: (48.0 + age * 1.5, 55.0 + age * 1.8) for age in range(0, 25)},
+    'BB_P': {age: (2.8 + age * 0.5, 4.8 + age * 0.6) for age in range(0, 25)},
+    'PB_P': {age: (47.0 + age * 1.5, 54.0 + age * 1.8) for age in range(0, 20)},  # No range after 19 months
+}
+
+
+def reference_validate(measurements: List[Dict], reference_data: Dict, gender: str) -> List[Dict]:
+    """
+    Original rules applied to one child's measurements sorted by age, row by row
+    """
+    validated_measurements = []
+    previous_height = None
+    previous_weight = None
+    previous_age = None
+
+    for measurement in measurements:
+        validated = measurement.copy()
+        current_age = measurement.get('umur_bulan')
+        current_weight = measurement.get('berat')
+        current_height = measurement.get('tinggi')
+        keterangan = []
+        validated['validasi_input'] = 'OK'
+
+        # Rule 1: Missing data check
+        if current_weight is None and current_height is None:
+            validated['status_berat'] = 'Missing'
+            validated['status_tinggi'] = 'Missing'
+            validated['validasi_input'] = 'WARNING'
+            validated['keterangan'] = 'Data berat dan tinggi kosong'
+            validated_measurements.append(validated)
+            continue
+        elif current_weight is None:
+            validated['status_berat'] = 'Missing'
+            validated['validasi_input'] = 'WARNING'
+            keterangan.append('Data berat kosong')
+        elif current_height is None:
+            validated['status_tinggi'] = 'Missing'
+            validated['validasi_input'] = 'WARNING'
+            keterangan.append('Data tinggi kosong')
+
+        # Rule 2: Missing month gap check
+        if previous_age is not None and current_age is not None:
+            age_gap = current_age - previous_age
+            if age_gap > 1:
+                validated['validasi_input'] = 'WARNING'
+                keterangan.append(f'Gap data: tidak ada pengukuran untuk {age_gap-1} bulan')
+
+        # Rule 3: Height consistency check
+        if previous_height is not None and current_height is not None:
+            if current_height < previous_height:
+                validated['validasi_input'] = 'ERROR'
+                keterangan.append(f'Tinggi menurun: {previous_height}cm → {current_height}cm')
+            elif validated['validasi_input'] == 'OK':
+                if current_height - previous_height > 5:
+                    validated['validasi_input'] = 'WARNING'
+                    keterangan.append(f'Tinggi naik drastis: +{current_height - previous_height:.1f}cm')
+
+        # Rule 4: Weight anomaly check
+        if previous_weight is not None and current_weight is not None:
+            weight_change = current_weight - previous_weight
+            if weight_change < 0:
+                loss_percentage = abs(weight_change) / previous_weight * 100
+                if loss_percentage > 10:
+                    validated['validasi_input'] = 'WARNING'
+                    keterangan.append(f'Anomali berat: turun {loss_percentage:.1f}%')
+
+        # Rule 5: Rationality vs reference table
+        if current_age is not None:
+            for metric, value, field, label, unit in (
+                ('BB', current_weight, 'status_berat', 'Berat', 'kg'),
+                ('PB', current_height, 'status_tinggi', 'Tinggi', 'cm'),
+            ):
+                if value is None:
+                    continue
+                value_range = reference_data.get(f'{metric}_{gender}', {}).get(current_age)
+                if value_range and not (value_range[0] <= value <= value_range[1]):
+                    validated[field] = 'Tidak Ideal'
+                    if validated['validasi_input'] == 'OK':
+                        validated['validasi_input'] = 'WARNING'
+                        keterangan.append(f'{label} tidak ideal: {value}{unit} (rentang: {value_range[0]}-{value_range[1]}{unit})')
+                else:
+                    validated[field] = 'Ideal'
+
+        # Set default statuses if not already set
+        if 'status_berat' not in validated:
+            validated['status_berat'] = 'Ideal' if current_weight is not None else 'Missing'
+        if 'status_tinggi' not in validated:
+            validated['status_tinggi'] = 'Ideal' if current_height is not None else 'Missing'
+
+        validated['keterangan'] = '; '.join(keterangan) if keterangan else ''
+
+        if current_height is not None:
+            previous_height = current_height
+        if current_weight is not None:
+            previous_weight = current_weight
+        if current_age is not None:
+            previous_age = current_age
+
+        validated_measurements.append(validated)
+
+    return validated_measurements
+
+
+def build_tables(children: List[Dict]):
+    """
+    ExcelParser-shaped (children, measurements) tables from
+    [{'jenis_kelamin': ..., 'measurements': [{'bulan', 'umur_bulan', 'berat', 'tinggi'}]}]
+    """
+    children_table = pd.DataFrame({'jenis_kelamin': [child['jenis_kelamin'] for child in children]}, dtype=object)
+    rows = [
+        {'child_index': index, **measurement}
+        for index, child in enumerate(children) for measurement in child['measurements']
+    ]
+    measurements = pd.DataFrame({
+        'child_index': [row['child_index'] for row in rows],
+        'bulan': [row['bulan'] for row in rows],
+        'tgl_ukur': pd.Series([pd.NaT] * len(rows), dtype='datetime64[ns]'),
+        'umur_bulan': pd.array([row['umur_bulan'] for row in rows], dtype='Int64'),
+        'berat': pd.array([row['berat'] for row in rows], dtype='float64'),
+        'tinggi': pd.array([row['tinggi'] for row in rows], dtype='float64'),
+        'cara_ukur': [None] * len(rows),
+    })
+    return children_table, measurements
+
+
+def assert_equivalent(children: List[Dict], default_gender: str = 'L'):
+    children_table, measurements = build_tables(children)
+    result = MeasurementValidator().validate(children_table, measurements, GrowthReference(REFERENCE), default_gender)
+
+    expected = []
+    for index, child in enumerate(children):
+        # Engine order: by age, unknown ages last, otherwise as given
+        ordered = sorted(child['measurements'], key=lambda m: (m['umur_bulan'] is None, m['umur_bulan'] or 0))
+        for validated in reference_validate(ordered, REFERENCE, child['jenis_kelamin'] or default_gender):
+            expected.append((index, validated['bulan'], validated['status_berat'], validated['status_tinggi'],
+                             validated['validasi_input'], validated['keterangan']))
+
+    actual = list(zip(result['child_index'].tolist(), result['bulan'].tolist(), result['status_berat'].tolist(),
+                      result['status_tinggi'].tolist(), result['validasi_input'].tolist(), result['keterangan'].tolist()))
+    assert actual == expected
+
+
+def measurement(bulan: str, umur: Optional[int], berat: Optional[float], tinggi: Optional[float]) -> Dict:
+    return {'bulan': bulan, 'umur_bulan': umur, 'berat': berat, 'tinggi': tinggi}
+
+
+def child(measurements: List[Dict], jenis_kelamin: Optional[str] = 'L') -> Dict:
+    return {'jenis_kelamin': jenis_kelamin, 'measurements': measurements}
+
+
+FIXTURES = {
+    'all_ok': [child([measurement('JANUARI', 6, 7.0, 62.0), measurement('FEBRUARI', 7, 7.4, 63.0)])],
+    'missing_values': [child([
+        measurement('JANUARI', 6, None, 62.0),
+        measurement('FEBRUARI', 7, 7.4, None),
+        measurement('MARET', 8, None, None),
+        measurement('APRIL', 9, 8.0, 65.0),
+    ])],
+    'month_gaps': [child([
+        measurement('JANUARI', 2, 4.5, 53.0),
+        measurement('FEBRUARI', 5, 5.8, 56.0),
+        measurement('MARET', 6, None, None),  # Does not advance the previous age
+        measurement('APRIL', 9, 7.5, 63.0),
+    ])],
+    'height_decrease_and_jump': [child([
+        measurement('JANUARI', 10, 8.0, 70.0),
+        measurement('FEBRUARI', 11, 8.2, 68.5),
+        measurement('MARET', 12, 8.4, 75.0),
+        measurement('APRIL', 13, 8.5, 74.0),
+    ])],
+    'weight_loss': [child([
+        measurement('JANUARI', 10, 9.0, 70.0),
+        measurement('FEBRUARI', 11, 7.5, 71.0),
+        measurement('MARET', 12, 7.3, 72.0),
+        measurement('APRIL', 13, None, 73.0),
+        measurement('MEI', 14, 6.0, 74.0),  # Compared with the last known weight
+    ])],
+    'out_of_range': [child([
+        measurement('JANUARI', 3, 2.0, 40.0),
+        measurement('FEBRUARI', 4, 12.0, 70.0),
+        measurement('MARET', 30, 12.0, 90.0),  # Older than the reference table
+    ])],
+    'unknown_gender_uses_default': [
+        child([measurement('JANUARI', 20, 12.5, 85.0), measurement('FEBRUARI', 21, 12.6, 86.0)], jenis_kelamin=None),
+        child([measurement('JANUARI', 20, 12.5, 85.0), measurement('FEBRUARI', 21, 12.6, 86.0)], jenis_kelamin='P'),
+    ],
+    'unknown_age': [child([
+        measurement('JANUARI', None, 7.0, 62.0),
+        measurement('FEBRUARI', 7, 7.4, 63.0),
+        measurement('MARET', 9, 6.0, 60.0),
+    ])],
+}
+
+
+@pytest.mark.parametrize('name', FIXTURES)
+@pytest.mark.parametrize('default_gender', ['L', 'P'])
+def test_matches_reference_rules(name, default_gender):
+    assert_equivalent(FIXTURES[name], default_gender)
+
+
+def test_matches_reference_rules_on_random_children():
+    rng = random.Random(20240601)
+    months = ['JANUARI', 'FEBRUARI', 'MARET', 'APRIL', 'MEI', 'JUNI', 'JULI', 'AGUSTUS',
+              'SEPTEMBER', 'OKTOBER', 'NOVEMBER', 'DESEMBER']
+
+    children = []
+    for _ in range(500):
+        age = rng.randint(0, 20)
+        weight = 3.0 + age * 0.55
+        height = 50.0 + age * 1.6
+        rows = []
+        for month in rng.sample(months, rng.randint(1, len(months))):
+            age += rng.choice([1, 1, 1, 2, 3])
+            weight = round(weight * rng.uniform(0.85, 1.1), 1)
+            height = round(height + rng.uniform(-1.5, 6.5), 1)
+            rows.append(measurement(
+                month,
+                None if rng.random() < 0.05 else age,
+                None if rng.random() < 0.1 else weight,
+                None if rng.random() < 0.1 else height,
+            ))
+        children.append(child(rows, jenis_kelamin=rng.choice(['L', 'P', None])))
+
+    assert_equivalent(children, 'L')
+    assert_equivalent(children, 'P')
+
+
+def test_returns_rows_sorted_by_child_then_age():
+    children_table, measurements = build_tables([
+        child([measurement('MARET', 8, 7.5, 64.0), measurement('JANUARI', None, 7.0, 62.0), measurement('FEBRUARI', 7, 7.4, 63.0)]),
+        child([measurement('JANUARI', 2, 4.5, 53.0)]),
+    ])
+    result = MeasurementValidator().validate(children_table, measurements.iloc[::-1], GrowthReference(REFERENCE), 'L')
+
+    assert result['child_index'].tolist() == [0, 0, 0, 1]
+    assert result['bulan'].tolist() == ['FEBRUARI', 'MARET', 'JANUARI', 'JANUARI']
+    assert np.array_equal(result.index, np.arange(4))
@@ -0,0 +1,173 @@
+"""
+Analysis queue worker.
+
+Consumes jobs enqueued by the API when ANALYSIS_EXECUTOR=queue:
+
+    python worker.py [--concurrency N]
+
+Each claimed job runs in the worker's process pool while its lease is renewed.
+On startup, jobs left running by a crashed worker (expired leases) are requeued.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+from concurrent.futures.process import BrokenProcessPool
+
+from config import settings
+from database import Base
+from migrations import create_tables, run_migrations
+from services.analyzer import TransientAnalysisError, LeaseLostError
+from services.executor import AnalysisExecutor
+from services.job_queue import job_queue, ClaimedJob
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('sitracking.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger("worker")
+
+
+class QueueWorker:
+    # Attempts at recording a job's outcome in the queue before leaving it to lease expiry
+    SETTLE_ATTEMPTS = 5
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.executor = AnalysisExecutor(backend="process", workers=self.concurrency)
+        self.stopping = asyncio.Event()
+        self.running = set()
+
+    async def run(self):
+        """
+        Claim and run jobs until a stop signal is received
+        """
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        last_reclaim = None
+
+        while not self.stopping.is_set():
+            claimed = None
+            try:
+                now = asyncio.get_running_loop().time()
+                if last_reclaim is None or now - last_reclaim > settings.JOB_LEASE_SECONDS:
+                    await asyncio.to_thread(job_queue.reclaim_expired)
+                    last_reclaim = now
+
+                if len(self.running) < self.concurrency:
+                    claimed = await asyncio.to_thread(job_queue.claim, self.worker_id)
+            except Exception as e:
+                # e.g. database locked by a running analysis, try again on the next poll
+                logger.warning(f"Could not poll the job queue: {str(e)}")
+
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._process(claimed))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+        # Let running analyses finish; their leases keep being renewed meanwhile
+        if self.running:
+            logger.info(f"Waiting for {len(self.running)} running job(s) to finish")
+            await asyncio.gather(*self.running, return_exceptions=True)
+        self.executor.shutdown()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def stop(self):
+        logger.info("Stop requested")
+        self.stopping.set()
+
+    async def _process(self, claimed: ClaimedJob):
+        from models import Job
+        job = Job.get_by_id(claimed.job_id)
+        if job is None:
+            job_queue.fail(claimed, f"Job {claimed.job_id} not found", retry=False)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(claimed))
+        try:
+            await self.executor.run(job.id, job.lapangan_path, job.referensi_path, job.default_gender,
+                                    lease=(claimed.entry_id, claimed.worker_id))
+        except LeaseLostError:
+            # The job was reclaimed and belongs to another attempt now
+            logger.warning(f"Lease on job {claimed.job_id} lost, result discarded")
+        except TransientAnalysisError as e:
+            await self._settle(job_queue.fail, claimed, str(e), retry=True)
+        except BrokenProcessPool as e:
+            await self._settle(job_queue.fail, claimed, f"Proses analisis berhenti tiba-tiba: {str(e)}", retry=True)
+        except Exception as e:
+            # Rejected input (invalid files etc.), retrying would fail the same way
+            await self._settle(job_queue.fail, claimed, str(e), retry=False)
+        else:
+            await self._settle(job_queue.complete, claimed)
+        finally:
+            heartbeat.cancel()
+
+    async def _settle(self, record, claimed: ClaimedJob, *args, **kwargs):
+        """
+        Record the outcome of a job, retrying while the database is busy. The heartbeat
+        keeps the lease meanwhile; if it still fails the lease expires and the job is rerun.
+        """
+        for attempt in range(1, self.SETTLE_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(record, claimed, *args, **kwargs)
+                return
+            except Exception as e:
+                logger.warning(f"Could not record result of job {claimed.job_id} (attempt {attempt}): {str(e)}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+        logger.error(f"Giving up recording result of job {claimed.job_id}")
+
+    async def _heartbeat(self, claimed: ClaimedJob):
+        """
+        Renew the lease until cancelled. Errors (e.g. the database is locked by a long
+        write) are logged and retried sooner; the heartbeat only stops when the lease
+        is gone, in which case the run's results are not saved.
+        """
+        interval = max(1.0, settings.JOB_LEASE_SECONDS / 3)
+        delay = interval
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                renewed = await asyncio.to_thread(job_queue.renew, claimed.entry_id, claimed.worker_id)
+            except Exception as e:
+                logger.warning(f"Could not renew lease on job {claimed.job_id}, retrying: {str(e)}")
+                delay = min(interval, 5.0)
+                continue
+            if not renewed:
+                logger.warning(f"Lost lease on job {claimed.job_id}")
+                return
+            delay = interval
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sitracking analysis queue worker")
+    parser.add_argument("--concurrency", type=int, default=settings.ANALYSIS_WORKERS,
+                        help="Number of analyses run in parallel (default: ANALYSIS_WORKERS)")
+    args = parser.parse_args()
+
+    create_tables(Base.metadata)
+    run_migrations()
+
+    async def run():
+        worker = QueueWorker(args.concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, worker.stop)
+        await worker.run()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()